@@ -1,6 +1,22 @@
+"""
+Модуль хеширования паролей.
+
+bcrypt намеренно медленный (десятки миллисекунд CPU на операцию), поэтому
+в async-маршрутах хеширование и проверка выполняются в отдельном пуле потоков
+ограниченного размера. Если очередь переполнена, новый запрос сразу получает
+503 вместо того, чтобы копить задачи и останавливать цикл событий.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import asyncio
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -8,3 +24,64 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class PasswordHasher:
+    """
+    Сервис хеширования паролей на ограниченном пуле потоков.
+
+    Библиотека bcrypt отпускает GIL во время вычислений, поэтому потоки
+    выполняют хеширование параллельно и не мешают циклу событий.
+    """
+
+    def __init__(self, pool_size: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="bcrypt")
+        self._max_pending = max_pending
+        self._pending = 0
+        self._lock = Lock()
+
+    def _acquire(self) -> None:
+        """Резервирует место в очереди или отклоняет запрос с кодом 503."""
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Сервер перегружен, повторите попытку позже",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, func, *args):
+        self._acquire()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Место освобождается по завершении задачи, даже если клиент уже отключился
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Хеширует пароль в пуле потоков."""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверяет пароль в пуле потоков."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Останавливает пул, дожидаясь выполняющихся задач."""
+        self._executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(settings.hash_pool_size, settings.hash_max_pending)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
@@ -0,0 +1,141 @@
+"""
+Модуль кэша аутентифицированных пользователей.
+
+get_current_user вызывается на каждом защищённом запросе: декодирует JWT и
+читает пользователя из базы. Кэш хранит результат по самому токену, поэтому
+для «горячих» токенов не нужны ни проверка подписи, ни SELECT. Запись живёт
+не дольше TTL и не дольше срока действия токена, а любое зафиксированное
+изменение пользователя удаляет все его записи.
+
+Массовые query(User).update()/delete() (и update(User)/delete(User) через
+сессию) не вызывают событий маппера и не сообщают, какие строки изменены,
+поэтому после фиксации такой транзакции кэш очищается целиком. Записи в
+обход ORM-сессии (Core на соединении, другие процессы) кэш не видит — для
+них устаревание ограничено TTL (auth_cache_ttl_seconds).
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.config import settings
+from app.models.models import User
+
+# Ключ в session.info со множеством ID изменённых пользователей
+_USERS_DIRTY_KEY = "identity_dirty_users"
+# Ключ в session.info: в транзакции был массовый UPDATE/DELETE пользователей
+_USERS_BULK_KEY = "identity_bulk_users"
+
+
+class IdentityCache:
+    """
+    Потокобезопасный LRU-кэш «токен -> пользователь» с ограничением по времени жизни.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._lock = Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Возвращает закэшированного пользователя для токена или None.
+
+        Аргументы:
+        token (str): JWT-токен.
+
+        Возвращает:
+        User: отсоединённый от сессии экземпляр пользователя.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None) -> None:
+        """
+        Сохраняет для токена отсоединённую копию пользователя.
+
+        Копия не связана с сессией текущего запроса, поэтому её можно
+        безопасно присоединять к другим сессиям через merge(load=False).
+
+        Аргументы:
+        token (str): JWT-токен.
+        user (User): пользователь, найденный по токену.
+        token_exp (Optional[float]): момент истечения токена (unix time), если известен.
+        """
+        ttl = self._ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        detached = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+        make_transient_to_detached(detached)
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, detached)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Удаляет все записи указанного пользователя."""
+        with self._lock:
+            stale = [token for token, (_, user) in self._entries.items() if user.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache(settings.auth_cache_size, settings.auth_cache_ttl_seconds)
+
+
+def _mark_user_dirty(mapper, connection, target):  # pylint: disable=unused-argument
+    """Запоминает в сессии ID изменённого или удалённого пользователя."""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_USERS_DIRTY_KEY, set()).add(target.id)
+
+
+for _event_name in ("after_update", "after_delete"):
+    event.listen(User, _event_name, _mark_user_dirty)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    """Запоминает в сессии массовый UPDATE/DELETE пользователей: изменённые ID неизвестны."""
+    is_write = orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and orm_execute_state.bind_mapper is User.__mapper__:
+        orm_execute_state.session.info[_USERS_BULK_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    """Сбрасывает записи пользователей, изменения которых зафиксированы."""
+    if session.info.pop(_USERS_BULK_KEY, False):
+        session.info.pop(_USERS_DIRTY_KEY, None)
+        identity_cache.clear()
+        return
+    for user_id in session.info.pop(_USERS_DIRTY_KEY, ()):
+        identity_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):  # pylint: disable=unused-argument
+    """Снимает пометки при откате транзакции."""
+    session.info.pop(_USERS_DIRTY_KEY, None)
+    session.info.pop(_USERS_BULK_KEY, None)
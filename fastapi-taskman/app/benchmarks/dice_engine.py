@@ -0,0 +1,77 @@
+# app/benchmarks/dice_engine.py
+"""
+Микробенчмарк движка записи бросков (app/dice.py).
+
+Замеряет:
+  - разбор выражения без кэша и обращение к кэшу compile_dice;
+  - одиночные броски roll() для разных выражений;
+  - пакетные броски roll_many() против цикла из roll();
+  - пакетные броски генератора кампании (CampaignRng.roll_many, NumPy) против
+    цикла бросков по одному потоку CounterRandom;
+  - прежний способ броска (random.randint по таблице) как точку отсчёта.
+
+Запуск:
+    python3 -m app.benchmarks.dice_engine [--rolls 100000]
+"""
+
+import argparse
+import random
+import timeit
+
+from app.campaign_rng import CampaignRng, CounterRandom
+from app.dice import _parse, compile_dice
+
+EXPRESSIONS = ["1d4", "1d12", "3d6", "4d6kh3", "2d10!+1d6-2", "1d20kl1+5"]
+
+
+def per_second(statement, number: int) -> float:
+    """Лучшая из трёх серий: число вызовов statement в секунду."""
+    best = min(timeit.repeat(statement, number=number, repeat=3))
+    return number / best
+
+
+def run(rolls: int) -> None:
+    """
+    Печатает таблицу результатов.
+
+    :param rolls: Число бросков в каждой серии
+    """
+    print(f"{'операция':<36}{'выражение':<16}{'оп/с':>14}")
+
+    for expression in EXPRESSIONS:
+        rate = per_second(lambda e=expression: _parse(e), number=max(rolls // 10, 1))
+        print(f"{'разбор без кэша':<36}{expression:<16}{rate:>14,.0f}")
+        rate = per_second(lambda e=expression: compile_dice(e), number=rolls)
+        print(f"{'compile_dice (кэш)':<36}{expression:<16}{rate:>14,.0f}")
+
+    sides = 4
+    rate = per_second(lambda: random.randint(1, sides), number=rolls)
+    print(f"{'прежний random.randint':<36}{'1d4':<16}{rate:>14,.0f}")
+
+    for expression in EXPRESSIONS:
+        dice = compile_dice(expression)
+        rate = per_second(dice.roll, number=rolls)
+        print(f"{'roll()':<36}{expression:<16}{rate:>14,.0f}")
+        rate = per_second(lambda d=dice: [d.roll() for _ in range(1000)], number=max(rolls // 1000, 1)) * 1000
+        print(f"{'цикл из 1000 roll()':<36}{expression:<16}{rate:>14,.0f}")
+        rate = per_second(lambda d=dice: d.roll_many(1000), number=max(rolls // 1000, 1)) * 1000
+        print(f"{'roll_many(1000)':<36}{expression:<16}{rate:>14,.0f}")
+
+    rng = CampaignRng("benchmark")
+    key = rng.key(None)
+    for expression in EXPRESSIONS:
+        dice = compile_dice(expression)
+        rate = per_second(
+            lambda d=dice: [d.roll(CounterRandom(key, rng.nonce, sequence)) for sequence in range(1000)],
+            number=max(rolls // 1000, 1),
+        ) * 1000
+        print(f"{'кампания: цикл из 1000 потоков':<36}{expression:<16}{rate:>14,.0f}")
+        rate = per_second(lambda d=dice: rng.roll_many(None, d, 1000), number=max(rolls // 1000, 1)) * 1000
+        print(f"{'кампания: roll_many(1000)':<36}{expression:<16}{rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Микробенчмарк движка записи бросков")
+    parser.add_argument("--rolls", type=int, default=100000, help="Число бросков в серии")
+    args = parser.parse_args()
+    run(args.rolls)
@@ -0,0 +1,151 @@
+# app/benchmarks/serialization.py
+"""
+Сравнение сериализации JSON-ответов: прежний путь через ORM-объекты и
+модели Pydantic против строк SQL и TypeAdapter (app/serialization.py).
+
+В SQLite в памяти создаются кампании и персонажи (по умолчанию 10 000), затем
+замеряются три ответа:
+  - страница GET /characters/ со всеми персонажами;
+  - поток NDJSON того же списка;
+  - список кампаний с персонажами (crud_campaign.get_all_campaigns).
+
+Прежний путь воспроизводит то, что делал обработчик с response_model:
+ORM-объекты, model_validate на каждый объект, dump_python(mode="json") и
+json.dumps в JSONResponse. Оба пути должны давать одинаковый JSON; если это
+не так, скрипт завершается с кодом 1.
+
+Запуск:
+    python3 -m app.benchmarks.serialization [--characters 10000]
+"""
+
+from typing import List
+import argparse
+import json
+import sys
+import timeit
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.crud import crud_campaign
+from app.crud.crud_character import characters_query, get_character_rows, iter_character_rows
+from app.models.database import Base
+from app.models.models import Campaign, Character
+from app.schemas.campaign import CampaignOut
+from app.schemas.character import CharacterOut, CharacterPage, CharacterSummary
+from app.serialization import dump_row, dump_rows, row_type, type_adapter
+
+CAMPAIGNS = 10
+
+
+def render(adapter: TypeAdapter, value) -> bytes:
+    """Сериализация ответа так, как её выполняют FastAPI и JSONResponse."""
+    return json.dumps(
+        adapter.dump_python(value, mode="json"), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def seed(db: Session, characters: int) -> None:
+    """
+    Создаёт кампании и поровну распределяет между ними персонажей.
+
+    :param db: Сессия базы данных
+    :param characters: Число персонажей
+    """
+    db.execute(insert(Campaign), [
+        {"id": c, "name": f"Кампания {c}", "description": "Описание кампании", "gm_id": 1, "rng_seed": str(c)}
+        for c in range(1, CAMPAIGNS + 1)
+    ])
+    db.execute(insert(Character), [
+        {"name": f"Персонаж {i}", "description": "Описание персонажа " * 3, "user_id": 1,
+         "campaign_id": i % CAMPAIGNS + 1}
+        for i in range(characters)
+    ])
+    db.commit()
+
+
+def legacy_page(engine) -> bytes:
+    """Прежняя страница: ORM-объекты профиля summary, модели, json.dumps."""
+    with Session(engine) as db:
+        items = characters_query(db, profile="summary").all()
+        page = CharacterPage(items=[CharacterSummary.model_validate(character) for character in items])
+        return render(TypeAdapter(CharacterPage), page)
+
+
+def rows_page(engine) -> bytes:
+    """Новая страница: строки колонок и dump_row."""
+    with Session(engine) as db:
+        return dump_row(CharacterPage, {"items": get_character_rows(db), "next_after_id": None})
+
+
+def legacy_ndjson(engine) -> bytes:
+    """Прежний поток: model_dump_json на каждый ORM-объект."""
+    with Session(engine) as db:
+        return b"".join(
+            CharacterSummary.model_validate(character).model_dump_json().encode() + b"\n"
+            for character in characters_query(db, profile="summary").yield_per(500)
+        )
+
+
+def rows_ndjson(engine) -> bytes:
+    """Новый поток: пачки строк колонок."""
+    dump = type_adapter(row_type(CharacterSummary)).dump_json
+    with Session(engine) as db:
+        return b"".join(b"".join(dump(row) + b"\n" for row in batch) for batch in iter_character_rows(db))
+
+
+def legacy_campaigns(engine) -> bytes:
+    """Прежний список кампаний: selectinload и CampaignOut, собранный вручную."""
+    with Session(engine) as db:
+        campaigns = db.query(Campaign).options(
+            selectinload(Campaign.characters).load_only(Character.id, Character.name, Character.campaign_id)
+        ).order_by(Campaign.id).all()
+        out = [
+            CampaignOut(
+                id=campaign.id, name=campaign.name, gm_id=campaign.gm_id, description=campaign.description,
+                characters=[CharacterOut(id=char.id, name=char.name) for char in campaign.characters],
+            )
+            for campaign in campaigns
+        ]
+        return render(TypeAdapter(List[CampaignOut]), out)
+
+
+def rows_campaigns(engine) -> bytes:
+    """Новый список кампаний: строки колонок, сериализованные через dump_rows без моделей."""
+    with Session(engine) as db:
+        return dump_rows(CampaignOut, crud_campaign.get_all_campaigns(db))
+
+
+def main() -> int:
+    """Печатает таблицу замеров и возвращает код завершения."""
+    parser = argparse.ArgumentParser(description="Сравнение сериализации JSON-ответов")
+    parser.add_argument("--characters", type=int, default=10000, help="Число персонажей")
+    parser.add_argument("--repeat", type=int, default=5, help="Число повторов (берётся лучший)")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        seed(db, args.characters)
+
+    cases = [
+        ("страница персонажей", legacy_page, rows_page, json.loads),
+        ("NDJSON персонажей", legacy_ndjson, rows_ndjson, lambda body: [json.loads(line) for line in body.splitlines()]),
+        ("список кампаний", legacy_campaigns, rows_campaigns, json.loads),
+    ]
+    print(f"{'ответ':<22}{'прежний, мс':>14}{'строки, мс':>14}{'ускорение':>12}{'байт':>12}")
+    failed = False
+    for label, legacy, rows, parse in cases:
+        legacy_body, rows_body = legacy(engine), rows(engine)
+        same = parse(legacy_body) == parse(rows_body)
+        legacy_ms = min(timeit.repeat(lambda: legacy(engine), number=1, repeat=args.repeat)) * 1000
+        rows_ms = min(timeit.repeat(lambda: rows(engine), number=1, repeat=args.repeat)) * 1000
+        status = "" if same else "  РАЗЛИЧАЮТСЯ"
+        print(f"{label:<22}{legacy_ms:>14.1f}{rows_ms:>14.1f}{legacy_ms / rows_ms:>11.1f}x{len(rows_body):>12}{status}")
+        failed = failed or not same
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# app/benchmarks/sqlite_profile.py
+"""
+Бенчмарк профиля производительности SQLite.
+
+Сравнивает пропускную способность конкурентных чтений и записей на временной
+базе с настройками SQLite по умолчанию (rollback journal) и с профилем
+производительности (WAL, synchronous=NORMAL и т.д.).
+
+Запуск:
+    python3 -m app.benchmarks.sqlite_profile [--seconds 5] [--readers 4] [--writers 2]
+"""
+
+from threading import Event, Thread
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.models.database import enable_sqlite_performance_mode
+
+
+def run(performance_mode: bool, seconds: float, readers: int, writers: int) -> dict:
+    """
+    Запускает читателей и писателей на отдельной временной базе.
+
+    :param performance_mode: Включить ли профиль производительности
+    :param seconds: Длительность замера
+    :param readers: Число потоков-читателей
+    :param writers: Число потоков-писателей
+    :return: Число операций и ошибок блокировки по типам
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=readers + writers,
+        )
+        if performance_mode:
+            enable_sqlite_performance_mode(engine, settings)
+        else:
+            # Без профиля ждём блокировку так же долго, чтобы сравнение было честным
+            @event.listens_for(engine, "connect")
+            def _busy_timeout(dbapi_connection, _):
+                dbapi_connection.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE rolls (id INTEGER PRIMARY KEY, character_id INTEGER, result INTEGER)"))
+            conn.execute(
+                text("INSERT INTO rolls (character_id, result) VALUES (:c, :r)"),
+                [{"c": i % 100, "r": i % 12} for i in range(10000)],
+            )
+
+        stop = Event()
+        counters = {"reads": 0, "writes": 0, "busy_errors": 0}
+
+        def reader():
+            done = errors = 0
+            while not stop.is_set():
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            text("SELECT count(*), avg(result) FROM rolls WHERE character_id = :c"),
+                            {"c": done % 100},
+                        ).one()
+                    done += 1
+                except OperationalError:
+                    errors += 1
+            counters["reads"] += done
+            counters["busy_errors"] += errors
+
+        def writer():
+            done = errors = 0
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("INSERT INTO rolls (character_id, result) VALUES (:c, :r)"),
+                            {"c": done % 100, "r": done % 12},
+                        )
+                    done += 1
+                except OperationalError:
+                    errors += 1
+            counters["writes"] += done
+            counters["busy_errors"] += errors
+
+        threads = [Thread(target=reader) for _ in range(readers)] + [Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        return counters
+
+
+def main() -> None:
+    """Печатает сравнение двух режимов."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+
+    for label, mode in (("по умолчанию", False), ("производительность", True)):
+        result = run(mode, args.seconds, args.readers, args.writers)
+        print(
+            f"{label:>20}: чтений/с {result['reads'] / args.seconds:10.1f}  "
+            f"записей/с {result['writes'] / args.seconds:10.1f}  "
+            f"ошибок блокировки {result['busy_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
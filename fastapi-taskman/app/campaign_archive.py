@@ -0,0 +1,451 @@
+# app/campaign_archive.py
+"""
+Модуль экспорта и импорта кампаний в потоковом архиве.
+
+Архив — NDJSON, сжатый gzip (схемы строк — app/schemas/campaign_archive.py):
+
+    {"type": "campaign", "format": 1, "name": ..., "attributes": {id: название}, "skills": {...}}
+    {"type": "character", "id": ..., "name": ..., "attributes": {id: значение}, "skills": {id: бонус}}
+    ...
+    {"type": "role", "character_id": ..., "role": ...}
+
+Экспорт читает персонажей keyset-пачками (по индексу (campaign_id, id)) и
+сжимает строки по мере чтения, поэтому память ограничена одной пачкой при
+любом размере кампании. Импорт разбирает поток так же, построчно, и
+записывает пачку персонажей одной командой INSERT ... RETURNING, а их
+характеристики и навыки — массово (на PostgreSQL с psycopg2 — через COPY).
+
+ID при импорте назначает база сервера: ID персонажей архива переводятся в
+новые, а ID характеристик и навыков — через названия в заголовке в ID
+справочника сервера (неизвестные пропускаются, как при обновлении персонажа).
+Пользователи у серверов разные, поэтому владельцем кампании, персонажей и
+ролей становится импортирующий пользователь. Зерно генератора бросков не
+экспортируется (по нему можно предсказать броски); импортированная кампания
+получает новое. Снимки листов персонажей пишутся вместе с персонажами.
+
+Команды:
+    python3 -m app.campaign_archive export <campaign_id> [-o campaign.ndjson.gz]
+    python3 -m app.campaign_archive import campaign.ndjson.gz --gm-id <user_id>
+"""
+
+from typing import BinaryIO, Dict, Iterator, List, Optional
+import argparse
+import csv
+import io
+import sys
+import zlib
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.catalog import catalog_cache
+from app.config import settings
+from app.crud.crud_character_sheet import build_sheet_data
+from app.models.models import (
+    Campaign, Character, CharacterAttribute, CharacterRole, CharacterSheet, CharacterSkill, new_rng_seed,
+)
+from app.schemas.campaign_archive import (
+    ArchiveCharacter, ArchiveHeader, ArchiveRecord, ArchiveRole, CampaignImportResult,
+)
+from app.serialization import row_type, type_adapter
+
+# Версия формата архива; импорт принимает только её
+ARCHIVE_FORMAT = 1
+# gzip-обёртка потока zlib
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+_GZIP_MAGIC = b"\x1f\x8b"
+# Размер куска при чтении архива и предел длины одной строки
+_READ_SIZE = 64 * 1024
+_MAX_LINE = 1024 * 1024
+
+
+def _line(model: type, row: dict) -> bytes:
+    return type_adapter(row_type(model)).dump_json(row) + b"\n"
+
+
+def iter_export_lines(db: Session, campaign_id: int, batch_size: int) -> Iterator[bytes]:
+    """
+    Строки NDJSON архива кампании (без сжатия).
+
+    :param db: Сессия базы данных
+    :param campaign_id: ID кампании
+    :param batch_size: Сколько персонажей и ролей читать за один запрос
+    :return: Итератор строк; ValueError, если кампании нет
+    """
+    campaign = db.execute(
+        select(Campaign.name, Campaign.description).where(Campaign.id == campaign_id)
+    ).first()
+    if campaign is None:
+        raise ValueError(f"Кампания {campaign_id} не найдена")
+
+    catalog = catalog_cache.get(db)
+    # Колонки читаются напрямую через соединение: ORM-обработка строк здесь не нужна
+    connection = db.connection()
+    yield _line(ArchiveHeader, {
+        "type": "campaign",
+        "format": ARCHIVE_FORMAT,
+        "name": campaign.name,
+        "description": campaign.description,
+        "attributes": catalog.attribute_names_by_id,
+        "skills": catalog.skill_names_by_id,
+    })
+
+    after_id = 0
+    while True:
+        characters = connection.execute(
+            select(Character.id, Character.name, Character.description)
+            .where(Character.campaign_id == campaign_id, Character.id > after_id)
+            .order_by(Character.id)
+            .limit(batch_size)
+        ).all()
+        if not characters:
+            break
+        ids = [character.id for character in characters]
+        attributes: Dict[int, Dict[int, int]] = {character_id: {} for character_id in ids}
+        for character_id, attribute_id, value in connection.execute(
+            select(CharacterAttribute.character_id, CharacterAttribute.attribute_id, CharacterAttribute.value)
+            .where(CharacterAttribute.character_id.in_(ids))
+        ):
+            attributes[character_id][attribute_id] = value
+        skills: Dict[int, Dict[int, int]] = {character_id: {} for character_id in ids}
+        for character_id, skill_id, bonus in connection.execute(
+            select(CharacterSkill.character_id, CharacterSkill.skill_id, CharacterSkill.bonus)
+            .where(CharacterSkill.character_id.in_(ids))
+        ):
+            skills[character_id][skill_id] = bonus
+
+        for character_id, name, description in characters:
+            yield _line(ArchiveCharacter, {
+                "type": "character",
+                "id": character_id,
+                "name": name,
+                "description": description,
+                "attributes": attributes[character_id],
+                "skills": skills[character_id],
+            })
+        after_id = ids[-1]
+
+    after_id = 0
+    while True:
+        roles = connection.execute(
+            select(CharacterRole.id, CharacterRole.character_id, CharacterRole.role)
+            .where(CharacterRole.campaign_id == campaign_id, CharacterRole.id > after_id)
+            .order_by(CharacterRole.id)
+            .limit(batch_size)
+        ).all()
+        if not roles:
+            break
+        for _, character_id, role in roles:
+            yield _line(ArchiveRole, {"type": "role", "character_id": character_id, "role": role})
+        after_id = roles[-1].id
+
+
+def export_campaign(db: Session, campaign_id: int, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Сжатый gzip архив кампании кусками по мере чтения базы.
+
+    Заголовок строится при первом обращении к итератору: проверить
+    существование кампании заранее можно через db.get(Campaign, ...).
+
+    :param db: Сессия базы данных
+    :param campaign_id: ID кампании
+    :param batch_size: Размер пачки чтения (по умолчанию campaign_archive_batch_size)
+    :return: Итератор кусков gzip
+    """
+    compressor = zlib.compressobj(wbits=_GZIP_WBITS)
+    for line in iter_export_lines(db, campaign_id, batch_size or settings.campaign_archive_batch_size):
+        chunk = compressor.compress(line)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def _iter_data(stream: BinaryIO) -> Iterator[bytes]:
+    """Распакованные куски архива; gzip распознаётся по сигнатуре, иначе поток отдаётся как есть."""
+    chunk = stream.read(_READ_SIZE)
+    if chunk[:2] != _GZIP_MAGIC:
+        while chunk:
+            yield chunk
+            chunk = stream.read(_READ_SIZE)
+        return
+
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    try:
+        while chunk:
+            data = chunk
+            while data:
+                # max_length ограничивает распаковку за шаг: память не растёт и на «zip-бомбе»
+                yield decompressor.decompress(data, _READ_SIZE * 16)
+                data = decompressor.unconsumed_tail
+            chunk = stream.read(_READ_SIZE)
+        yield decompressor.flush()
+    except zlib.error as exc:
+        raise ValueError(f"Повреждённый архив: {exc}") from exc
+    if not decompressor.eof:
+        raise ValueError("Архив обрывается: поток gzip не завершён")
+
+
+def iter_archive_records(stream: BinaryIO) -> Iterator[object]:
+    """
+    Разбирает архив построчно, не читая его в память целиком.
+
+    :param stream: Двоичный поток архива (gzip или несжатый NDJSON)
+    :return: Итератор записей (ArchiveHeader, ArchiveCharacter, ArchiveRole);
+             ValueError при повреждённом архиве или неверной строке
+    """
+    adapter = type_adapter(ArchiveRecord)
+    line_number = 0
+    buffer = b""
+    for data in _iter_data(stream):
+        *lines, buffer = (buffer + data).split(b"\n")
+        if len(buffer) > _MAX_LINE:
+            raise ValueError(f"Строка {line_number + len(lines) + 1} архива слишком длинная")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                try:
+                    yield adapter.validate_json(line)
+                except ValueError as exc:
+                    raise ValueError(f"Строка {line_number} архива: {exc}") from exc
+    if buffer.strip():
+        try:
+            yield adapter.validate_json(buffer)
+        except ValueError as exc:
+            raise ValueError(f"Строка {line_number + 1} архива: {exc}") from exc
+
+
+def _copy_rows(db: Session, model, rows: List[dict]) -> None:
+    """COPY ... FROM STDIN для psycopg2: строки передаются в CSV одним потоком."""
+    connection = db.connection()
+    table = connection.dialect.identifier_preparer.format_table(model.__table__)
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _bulk_insert(db: Session, model, rows: List[dict]) -> None:
+    """
+    Массовая вставка строк: COPY на PostgreSQL с psycopg2, иначе INSERT в режиме executemany.
+
+    Команда строится по таблице, а не по модели: ORM-путь массовой вставки
+    разбирает каждую строку в Python и в несколько раз медленнее.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        _copy_rows(db, model, rows)
+    else:
+        db.connection().execute(insert(model.__table__), rows)
+
+
+def _insert_characters(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Вставляет персонажей пачкой и возвращает их новые ID в порядке строк.
+
+    PostgreSQL упорядочивает RETURNING по строкам параметров сам
+    (sort_by_parameter_order). SQLite этого не поддерживает, и SQLAlchemy
+    вставлял бы строки по одной; там вставка идёт многострочным VALUES, а
+    rowid внутри одной команды растут в порядке строк (запись в SQLite
+    единоличная), поэтому достаточно отсортировать возвращённые ID.
+    """
+    table = Character.__table__
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        return sorted(connection.execute(insert(table).returning(table.c.id), rows).scalars())
+    return connection.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+class _Importer:
+    """
+    Состояние одного импорта: перевод ID и счётчики.
+
+    В памяти держатся только пачка персонажей, пачка ролей и соответствие
+    ID персонажей (по два целых на персонажа).
+    """
+
+    def __init__(self, db: Session, header: ArchiveHeader, campaign_id: int, gm_id: int, batch_size: int):
+        self.db = db
+        self.campaign_id = campaign_id
+        self.gm_id = gm_id
+        self.batch_size = batch_size
+        catalog = catalog_cache.get(db)
+        self.attribute_ids = {
+            source_id: catalog.attribute_ids[name]
+            for source_id, name in header.attributes.items() if name in catalog.attribute_ids
+        }
+        self.skill_ids = {
+            source_id: catalog.skill_ids[name]
+            for source_id, name in header.skills.items() if name in catalog.skill_ids
+        }
+        self.character_ids: Dict[int, int] = {}
+        self.characters: List[ArchiveCharacter] = []
+        self.roles: List[ArchiveRole] = []
+        self.counts = {"characters": 0, "attributes": 0, "skills": 0, "roles": 0, "skipped": 0}
+
+    def add(self, record) -> None:
+        if isinstance(record, ArchiveCharacter):
+            if record.id in self.character_ids:
+                raise ValueError(f"Персонаж {record.id} встречается в архиве дважды")
+            self.characters.append(record)
+            if len(self.characters) >= self.batch_size:
+                self.flush_characters()
+        elif isinstance(record, ArchiveRole):
+            self.roles.append(record)
+            if len(self.roles) >= self.batch_size:
+                self.flush_roles()
+        else:
+            raise ValueError("Заголовок кампании может быть только первой строкой архива")
+
+    def flush_characters(self) -> None:
+        """Вставляет пачку персонажей, затем их характеристики, навыки и снимки листов."""
+        batch, self.characters = self.characters, []
+        if not batch:
+            return
+        character_rows = [
+            {"name": character.name, "description": character.description,
+             "campaign_id": self.campaign_id, "user_id": self.gm_id}
+            for character in batch
+        ]
+        new_ids = _insert_characters(self.db, character_rows)
+
+        attribute_rows = []
+        skill_rows = []
+        sheet_rows = []
+        for character, row, new_id in zip(batch, character_rows, new_ids):
+            self.character_ids[character.id] = new_id
+            attribute_values = {}
+            for source_id, value in character.attributes.items():
+                attribute_id = self.attribute_ids.get(source_id)
+                if attribute_id is None:
+                    self.counts["skipped"] += 1
+                else:
+                    attribute_values[attribute_id] = value
+                    attribute_rows.append({"character_id": new_id, "attribute_id": attribute_id, "value": value})
+            skill_bonuses = {}
+            for source_id, bonus in character.skills.items():
+                skill_id = self.skill_ids.get(source_id)
+                if skill_id is None:
+                    self.counts["skipped"] += 1
+                else:
+                    skill_bonuses[skill_id] = bonus
+                    skill_rows.append({"character_id": new_id, "skill_id": skill_id, "bonus": bonus})
+            sheet_rows.append({
+                "character_id": new_id,
+                "version": 1,
+                "data": build_sheet_data({"id": new_id, **row}, attribute_values, skill_bonuses),
+            })
+        _bulk_insert(self.db, CharacterAttribute, attribute_rows)
+        _bulk_insert(self.db, CharacterSkill, skill_rows)
+        # Снимки — JSON, поэтому мимо COPY: колонку сериализует сам SQLAlchemy
+        self.db.connection().execute(insert(CharacterSheet.__table__), sheet_rows)
+        self.counts["characters"] += len(batch)
+        self.counts["attributes"] += len(attribute_rows)
+        self.counts["skills"] += len(skill_rows)
+
+    def flush_roles(self) -> None:
+        """Вставляет пачку ролей; роли должны ссылаться на уже вставленных персонажей."""
+        self.flush_characters()
+        batch, self.roles = self.roles, []
+        rows = []
+        for role in batch:
+            if role.character_id is not None and role.character_id not in self.character_ids:
+                self.counts["skipped"] += 1
+                continue
+            rows.append({
+                "character_id": self.character_ids.get(role.character_id),
+                "user_id": self.gm_id,
+                "campaign_id": self.campaign_id,
+                "role": role.role,
+            })
+        _bulk_insert(self.db, CharacterRole, rows)
+        self.counts["roles"] += len(rows)
+
+
+def import_campaign(db: Session, stream: BinaryIO, gm_id: int, batch_size: Optional[int] = None) -> CampaignImportResult:
+    """
+    Импортирует кампанию из архива одной транзакцией: либо целиком, либо никак.
+
+    :param db: Сессия базы данных
+    :param stream: Двоичный поток архива (gzip или несжатый NDJSON)
+    :param gm_id: ID импортирующего пользователя — ведущего новой кампании и владельца персонажей
+    :param batch_size: Размер пачки вставки (по умолчанию campaign_archive_batch_size)
+    :return: Итог импорта; ValueError, если архив неверен (транзакция откатывается)
+    """
+    records = iter_archive_records(stream)
+    try:
+        header = next(records, None)
+        if not isinstance(header, ArchiveHeader):
+            raise ValueError("Архив должен начинаться с заголовка кампании")
+        if header.format != ARCHIVE_FORMAT:
+            raise ValueError(f"Неподдерживаемая версия архива: {header.format}")
+
+        # Кампания создаётся через ORM: события кэша страниц отмечают новую кампанию
+        campaign = Campaign(name=header.name, description=header.description, gm_id=gm_id, rng_seed=new_rng_seed())
+        db.add(campaign)
+        db.flush()
+
+        campaign_id = campaign.id
+        importer = _Importer(db, header, campaign_id, gm_id, batch_size or settings.campaign_archive_batch_size)
+        for record in records:
+            importer.add(record)
+        importer.flush_roles()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return CampaignImportResult(campaign_id=campaign_id, **importer.counts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Команды export и import; возвращает код завершения."""
+    from app.models.database import SessionLocal  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Экспорт и импорт кампаний")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Выгрузить кампанию в архив")
+    export_parser.add_argument("campaign_id", type=int)
+    export_parser.add_argument("-o", "--output", help="Файл архива (по умолчанию stdout)")
+    import_parser = commands.add_parser("import", help="Загрузить кампанию из архива")
+    import_parser.add_argument("archive", help="Файл архива (- — stdin)")
+    import_parser.add_argument("--gm-id", type=int, required=True, help="ID ведущего новой кампании")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            if db.get(Campaign, args.campaign_id) is None:
+                raise ValueError(f"Кампания {args.campaign_id} не найдена")
+            output = open(args.output, "wb") if args.output else sys.stdout.buffer
+            try:
+                for chunk in export_campaign(db, args.campaign_id):
+                    output.write(chunk)
+            finally:
+                if args.output:
+                    output.close()
+        else:
+            source = sys.stdin.buffer if args.archive == "-" else open(args.archive, "rb")
+            try:
+                result = import_campaign(db, source, args.gm_id)
+            finally:
+                if args.archive != "-":
+                    source.close()
+            print(result.model_dump_json())
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
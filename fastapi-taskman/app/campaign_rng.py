@@ -0,0 +1,267 @@
+# app/campaign_rng.py
+"""
+Модуль детерминированных генераторов бросков по кампаниям.
+
+Каждый бросок получает собственный поток случайных чисел, однозначно
+заданный тройкой (ключ кампании, nonce процесса, номер броска):
+
+    поток = BLAKE2b(key=ключ кампании, data="<nonce>:<номер>:<блок>"), блок = 0, 1, ...
+
+Каждый блок — 64 байта, то есть 8 чисел; одному броску обычно хватает одного блока.
+
+Это генератор со счётчиком (counter-based): состояние не хранится и не
+разделяется между потоками, поэтому блокировки не нужны, а любой бросок
+можно получить повторно, зная его nonce и номер (они записываются в журнал
+бросков). Ключ кампании выводится из Campaign.rng_seed и наружу не отдаётся,
+так что будущие броски нельзя предсказать по журналу. Персонажи без кампании
+бросают с ключом из случайного зерна установки (таблица install_secrets),
+которое создаётся при первом таком броске.
+
+Пакет бросков одного обычного выражения (roll_many) вычисляется массивами
+NumPy: первые блоки потоков всех бросков разворачиваются в матрицу чисел,
+а кубики и суммы считаются над ней целиком. Результат совпадает с броском
+по одному, поэтому повтор по журналу не зависит от того, как шёл бросок.
+
+Номера выдаются счётчиком itertools.count кампании — это атомарная операция
+под GIL. nonce меняется при каждом запуске процесса, поэтому номера разных
+процессов и разных запусков не пересекаются без согласования через базу.
+"""
+
+from itertools import count
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import secrets
+import struct
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.dice import DiceExpression, DiceRoll
+from app.models.models import Campaign, InstallSecret, new_rng_seed
+
+# Имя зерна персонажей без кампании в install_secrets
+INSTALL_SEED = "roll_seed"
+
+_UNPACK = struct.Struct("<8Q").unpack
+# 53 старших бита 64-битного слова дают равномерное число в [0, 1), как random.random()
+_TO_UNIT = 2.0 ** -53
+# Чисел в одном блоке потока (64 байта BLAKE2b)
+_BLOCK_VALUES = 8
+
+
+def campaign_key(seed: str):
+    """
+    Ключ генератора кампании из её зерна (любая строка).
+
+    Возвращается BLAKE2b, уже инициализированный ключом: потоки бросков
+    копируют его состояние, а не повторяют инициализацию ключа.
+
+    :param seed: Campaign.rng_seed
+    :return: Объект hashlib.blake2b с ключом кампании
+    """
+    return hashlib.blake2b(key=hashlib.blake2b(seed.encode(), digest_size=32, person=b"campaign-rng").digest())
+
+
+class CampaignNotFound(LookupError):
+    """Кампании нет в базе: ключ её генератора не загрузить."""
+
+    def __init__(self, campaign_ids: Iterable[int]):
+        self.campaign_ids = sorted(campaign_ids)
+        super().__init__(f"Кампании не найдены: {self.campaign_ids}")
+
+
+def install_seed(db: Session) -> str:
+    """
+    Зерно установки для бросков без кампании; создаётся при первом обращении.
+
+    Запись выполняется отдельной транзакцией, не затрагивая сессию вызывающего
+    кода. Если зерно одновременно создают несколько процессов, остаётся первое.
+
+    :param db: Сессия базы данных
+    :return: Зерно из install_secrets
+    """
+    bind = db.get_bind()
+    statement = select(InstallSecret.value).where(InstallSecret.name == INSTALL_SEED)
+    with bind.connect() as conn:
+        value = conn.execute(statement).scalar()
+    if value is None:
+        try:
+            with bind.begin() as conn:
+                conn.execute(insert(InstallSecret).values(name=INSTALL_SEED, value=new_rng_seed()))
+        except IntegrityError:
+            pass
+        with bind.connect() as conn:
+            value = conn.execute(statement).scalar_one()
+    return value
+
+
+def first_blocks(key, nonce: str, sequences: List[int]) -> np.ndarray:
+    """
+    Первые блоки потоков бросков с номерами sequences.
+
+    :param key: Ключ кампании (campaign_key)
+    :param nonce: nonce процесса
+    :param sequences: Номера бросков
+    :return: Матрица (len(sequences), 8) uint64 — те же числа, что выдаёт CounterRandom
+    """
+    digests = []
+    for sequence in sequences:
+        block = key.copy()
+        block.update(f"{nonce}:{sequence}:0".encode())
+        digests.append(block.digest())
+    return np.frombuffer(b"".join(digests), dtype="<u8").reshape(len(sequences), _BLOCK_VALUES)
+
+
+class CounterRandom:
+    """
+    Поток случайных чисел одного броска, совместимый с тем подмножеством
+    интерфейса random, которое использует app.dice (метод random()).
+    """
+
+    __slots__ = ("_key", "_prefix", "_block", "_values")
+
+    def __init__(self, key, nonce: str, sequence: int):
+        self._key = key
+        self._prefix = f"{nonce}:{sequence}:".encode()
+        self._block = 0
+        self._values: Iterator[int] = iter(())
+
+    def _refill(self) -> Iterator[int]:
+        block = self._key.copy()
+        block.update(self._prefix + str(self._block).encode())
+        digest = block.digest()
+        self._block += 1
+        self._values = iter(_UNPACK(digest))
+        return self._values
+
+    def random(self) -> float:
+        """Следующее число из [0, 1)."""
+        value = next(self._values, None)
+        if value is None:
+            value = next(self._refill())
+        return (value >> 11) * _TO_UNIT
+
+
+class CampaignRng:
+    """
+    Реестр генераторов кампаний: кэш ключей и счётчики номеров бросков.
+
+    Зерно кампании не меняется после создания, поэтому ключи кэшируются
+    без инвалидации. Персонажи без кампании используют общий ключ из
+    зерна установки (install_seed), если зерно не передано явно (default_seed).
+    """
+
+    def __init__(self, default_seed: Optional[str] = None):
+        self.nonce = secrets.token_hex(4)
+        self._default_key = campaign_key(default_seed) if default_seed is not None else None
+        self._keys: Dict[int, object] = {}
+        self._counters: Dict[Optional[int], count] = {}
+
+    def load_keys(self, db: Session, campaign_ids: Iterable[Optional[int]]) -> None:
+        """
+        Загружает в кэш ключи кампаний одним запросом (только отсутствующие).
+
+        :param db: Сессия базы данных
+        :param campaign_ids: ID кампаний (None — ключ персонажей без кампании)
+        :raises CampaignNotFound: Если каких-то кампаний нет в базе
+        """
+        campaign_ids = set(campaign_ids)
+        if None in campaign_ids and self._default_key is None:
+            self._default_key = campaign_key(install_seed(db))
+        missing = {campaign_id for campaign_id in campaign_ids
+                   if campaign_id is not None and campaign_id not in self._keys}
+        if missing:
+            for campaign_id, seed in db.query(Campaign.id, Campaign.rng_seed).filter(Campaign.id.in_(missing)):
+                self._keys[campaign_id] = campaign_key(seed)
+            missing.difference_update(self._keys)
+            if missing:
+                raise CampaignNotFound(missing)
+
+    def key(self, campaign_id: Optional[int]):
+        """
+        Ключ кампании, загруженный через load_keys.
+
+        :raises CampaignNotFound: Если ключ не загружен (кампании нет или load_keys не вызывался)
+        """
+        key = self._default_key if campaign_id is None else self._keys.get(campaign_id)
+        if key is None:
+            raise CampaignNotFound([] if campaign_id is None else [campaign_id])
+        return key
+
+    def next_sequence(self, campaign_id: Optional[int]) -> int:
+        """Следующий номер броска кампании в этом процессе; без блокировок."""
+        counter = self._counters.get(campaign_id)
+        if counter is None:
+            # setdefault атомарен: при гонке оба потока получат один и тот же счётчик
+            counter = self._counters.setdefault(campaign_id, count(1))
+        return next(counter)
+
+    def roll(self, campaign_id: Optional[int], dice: DiceExpression) -> Tuple[DiceRoll, str, int]:
+        """
+        Бросает выражение в новом потоке кампании.
+
+        :param campaign_id: ID кампании
+        :param dice: Выражение броска
+        :return: (результат броска, nonce, номер броска)
+        """
+        sequence = self.next_sequence(campaign_id)
+        return dice.roll(CounterRandom(self.key(campaign_id), self.nonce, sequence)), self.nonce, sequence
+
+    def roll_many(self, campaign_id: Optional[int], dice: DiceExpression, times: int) -> List[Tuple[DiceRoll, int]]:
+        """
+        Выполняет times бросков выражения, каждый в своём потоке кампании.
+
+        :param campaign_id: ID кампании
+        :param dice: Выражение броска
+        :param times: Число бросков
+        :return: Пары (результат броска, номер броска); nonce у всех — self.nonce
+        """
+        key = self.key(campaign_id)
+        nonce = self.nonce
+        counter = self._counters.get(campaign_id) or self._counters.setdefault(campaign_id, count(1))
+        sequences = [next(counter) for _ in range(times)]
+        if dice.plain and dice.terms and sum(term.count for term in dice.terms) <= _BLOCK_VALUES:
+            return list(zip(_roll_blocks(dice, first_blocks(key, nonce, sequences)), sequences))
+        # Взрывы и отбор кубиков расходуют заранее неизвестное число значений — по одному броску
+        roll = dice.roll
+        return [(roll(CounterRandom(key, nonce, sequence)), sequence) for sequence in sequences]
+
+    def replay(self, campaign_id: Optional[int], dice: DiceExpression, nonce: str, sequence: int) -> DiceRoll:
+        """
+        Повторяет бросок по его nonce и номеру.
+
+        :param campaign_id: ID кампании
+        :param dice: Выражение броска
+        :param nonce: nonce процесса, выполнившего бросок
+        :param sequence: Номер броска
+        :return: Тот же результат, что и при исходном броске
+        """
+        return dice.roll(CounterRandom(self.key(campaign_id), nonce, sequence))
+
+
+def _roll_blocks(dice: DiceExpression, blocks: np.ndarray) -> List[DiceRoll]:
+    """
+    Броски обычного выражения по первым блокам их потоков, по строке на бросок.
+
+    Кубики берут числа блока по порядку, как DiceTerm.roll через CounterRandom.random():
+    (слово >> 11) * 2**-53 * граней + 1 с отбрасыванием дробной части.
+
+    :param dice: Выражение из обычных слагаемых, не больше 8 кубиков
+    :param blocks: Матрица first_blocks
+    :return: Результаты бросков
+    """
+    units = (blocks >> np.uint64(11)) * _TO_UNIT
+    columns = []
+    start = 0
+    for term in dice.terms:
+        values = (units[:, start:start + term.count] * term.sides).astype(np.int64) + 1
+        columns.append(values * term.sign)
+        start += term.count
+    matrix = np.hstack(columns)
+    totals = matrix.sum(axis=1) + dice.modifier
+    return [DiceRoll(tuple(row), total) for row, total in zip(matrix.tolist(), totals.tolist())]
+
+
+campaign_rng = CampaignRng()
@@ -0,0 +1,224 @@
+# app/catalog.py
+"""
+Модуль кэша справочника характеристик и навыков.
+
+Справочник (таблицы attributes и skills) заполняется из декларации app/skills.py
+при запуске приложения и меняется крайне редко, поэтому он загружается из базы один раз и хранится
+в памяти процесса в уже подготовленном для шаблонов виде. Кэш версионирован:
+любая зафиксированная запись в Attribute/Skill увеличивает версию, и
+следующий запрос перечитывает справочник.
+"""
+
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+import hashlib
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.models.models import Attribute, Skill
+
+# Ключ в session.info, которым помечаются сессии, изменившие справочник
+_CATALOG_DIRTY_KEY = "catalog_dirty"
+
+
+@dataclass(frozen=True)
+class AttributeEntry:
+    """
+    Неизменяемая запись характеристики из справочника.
+    """
+    id: int
+    name: str
+    dice_type: str
+    value: int
+
+
+@dataclass(frozen=True)
+class SkillEntry:
+    """
+    Неизменяемая запись навыка из справочника.
+    Название родительской характеристики хранится сразу, без ленивой загрузки.
+    """
+    id: int
+    name: str
+    attribute_id: int
+    attribute_name: str
+    bonus: int
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    Снимок справочника определённой версии.
+
+    Атрибуты:
+        version (int): Версия кэша, из которой построен снимок.
+        attributes (Tuple[AttributeEntry, ...]): Характеристики в порядке id.
+        skills (Tuple[SkillEntry, ...]): Навыки в порядке id.
+        grouped_skills (Dict[str, List[SkillEntry]]): Навыки, сгруппированные по названию характеристики.
+        attribute_ids (Dict[str, int]): Название характеристики -> id.
+        skill_ids (Dict[str, int]): Название навыка -> id.
+        attribute_names_by_id (Dict[int, str]): id характеристики -> название.
+        attribute_dice_types (Dict[int, str]): id характеристики -> базовый кубик (dice_type).
+        skill_names_by_id (Dict[int, str]): id навыка -> название.
+        checksum (str): Контрольная сумма содержимого; в отличие от version,
+            одинакова во всех процессах и после перезапуска.
+    """
+    version: int
+    attributes: Tuple[AttributeEntry, ...]
+    skills: Tuple[SkillEntry, ...]
+    grouped_skills: Dict[str, List[SkillEntry]]
+    attribute_ids: Dict[str, int]
+    skill_ids: Dict[str, int]
+    attribute_names_by_id: Dict[int, str]
+    attribute_dice_types: Dict[int, str]
+    skill_names_by_id: Dict[int, str]
+    checksum: str
+
+    @property
+    def attribute_names(self) -> List[str]:
+        """Названия характеристик в порядке их id."""
+        return [attr.name for attr in self.attributes]
+
+
+def load_catalog(db: Session, version: int = 0) -> Catalog:
+    """
+    Читает справочник из базы двумя запросами и строит снимок.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    version (int): версия, которой будет помечен снимок.
+
+    Возвращает:
+    Catalog: снимок справочника.
+    """
+    attributes = tuple(
+        AttributeEntry(id=row.id, name=row.name, dice_type=row.dice_type, value=row.value)
+        for row in db.query(Attribute.id, Attribute.name, Attribute.dice_type, Attribute.value)
+        .order_by(Attribute.id)
+    )
+    attribute_names_by_id = {attr.id: attr.name for attr in attributes}
+
+    skills = tuple(
+        SkillEntry(
+            id=row.id,
+            name=row.name,
+            attribute_id=row.attribute_id,
+            attribute_name=attribute_names_by_id[row.attribute_id],
+            bonus=row.bonus or 0,
+        )
+        for row in db.query(Skill.id, Skill.name, Skill.attribute_id, Skill.bonus).order_by(Skill.id)
+    )
+
+    grouped_skills = {attr.name: [] for attr in attributes}
+    for skill in skills:
+        grouped_skills[skill.attribute_name].append(skill)
+
+    checksum = hashlib.sha1(repr((attributes, skills)).encode()).hexdigest()
+
+    return Catalog(
+        version=version,
+        attributes=attributes,
+        skills=skills,
+        grouped_skills=grouped_skills,
+        attribute_ids={attr.name: attr.id for attr in attributes},
+        skill_ids={skill.name: skill.id for skill in skills},
+        attribute_names_by_id=attribute_names_by_id,
+        attribute_dice_types={attr.id: attr.dice_type for attr in attributes},
+        skill_names_by_id={skill.id: skill.name for skill in skills},
+        checksum=checksum,
+    )
+
+
+class CatalogCache:
+    """
+    Потокобезопасный версионированный кэш справочника.
+
+    Чтение уже загруженного снимка не требует ни блокировки, ни запросов к базе.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = 0
+        self._catalog: Optional[Catalog] = None
+
+    @property
+    def version(self) -> int:
+        """Текущая версия справочника."""
+        return self._version
+
+    def get(self, db: Session) -> Catalog:
+        """
+        Возвращает актуальный снимок справочника, при необходимости загружая его.
+
+        Аргументы:
+        db (Session): сессия, через которую выполняется загрузка при промахе кэша.
+
+        Возвращает:
+        Catalog: снимок справочника.
+        """
+        catalog = self._catalog
+        if catalog is not None and catalog.version == self._version:
+            return catalog
+
+        with self._lock:
+            version = self._version
+            catalog = self._catalog
+            if catalog is not None and catalog.version == version:
+                return catalog
+            catalog = load_catalog(db, version)
+            # Если во время загрузки справочник инвалидировали, снимок не сохраняем
+            if version == self._version:
+                self._catalog = catalog
+            return catalog
+
+    async def get_async(self, db: AsyncSession) -> Catalog:
+        """
+        Асинхронная версия get: при промахе загружает справочник через AsyncSession.
+
+        Аргументы:
+        db (AsyncSession): асинхронная сессия базы данных.
+
+        Возвращает:
+        Catalog: снимок справочника.
+        """
+        catalog = self._catalog
+        if catalog is not None and catalog.version == self._version:
+            return catalog
+        return await db.run_sync(self.get)
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш и увеличивает версию справочника."""
+        with self._lock:
+            self._version += 1
+            self._catalog = None
+
+
+catalog_cache = CatalogCache()
+
+
+def _mark_catalog_dirty(mapper, connection, target):  # pylint: disable=unused-argument
+    """Помечает сессию, в которой изменилась запись справочника."""
+    session = object_session(target)
+    if session is not None:
+        session.info[_CATALOG_DIRTY_KEY] = True
+
+
+for _model in (Attribute, Skill):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_catalog_dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    """Инвалидирует кэш только после фиксации транзакции, изменившей справочник."""
+    if session.info.pop(_CATALOG_DIRTY_KEY, False):
+        catalog_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):  # pylint: disable=unused-argument
+    """Снимает пометку при откате: справочник в базе не изменился."""
+    session.info.pop(_CATALOG_DIRTY_KEY, None)
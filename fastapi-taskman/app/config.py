@@ -1,5 +1,7 @@
 """Модуль конфигурации приложения."""
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 DATABASE_URL = "sqlite:///./app.db"
@@ -10,26 +12,83 @@ class Settings(BaseSettings):
     Класс настроек, считывающий конфигурацию из переменных окружения.
 
     Атрибуты:
-        db_username (str): Имя пользователя базы данных.
-        db_password (str): Пароль пользователя базы данных.
-        db_host (str): Адрес хоста базы данных.
-        db_port (int): Порт базы данных.
-        db_name (str): Название базы данных.
+        db_username (Optional[str]): Имя пользователя базы данных.
+        db_password (Optional[str]): Пароль пользователя базы данных.
+        db_host (Optional[str]): Адрес хоста базы данных.
+        db_port (Optional[int]): Порт базы данных.
+        db_name (Optional[str]): Название базы данных.
+        db_pool_size (int): Число постоянных соединений в пуле PostgreSQL.
+        db_max_overflow (int): Сколько соединений можно открыть сверх pool_size при пиковой нагрузке.
+        db_pool_timeout (float): Сколько секунд ждать свободное соединение из пула.
+        db_pool_recycle (int): Через сколько секунд пересоздавать соединение.
+        db_statement_timeout_ms (Optional[int]): Ограничение времени выполнения запроса в PostgreSQL.
+        sqlite_performance_mode (bool): Включать ли для SQLite WAL и настройки PRAGMA из полей ниже.
+        sqlite_mmap_size (int): Размер memory-mapped области SQLite в байтах.
+        sqlite_cache_size (int): Размер кэша страниц SQLite (отрицательное значение — в килобайтах).
+        sqlite_busy_timeout_ms (int): Сколько ждать освобождения блокировки, прежде чем вернуть SQLITE_BUSY.
         secret_key (str): Секретный ключ для JWT.
         algo (str): Алгоритм шифрования.
         access_token_expire_minutes (int): Время жизни токена доступа в минутах.
+        bcrypt_rounds (int): Стоимость (log2 числа раундов) хеширования bcrypt.
+        hash_pool_size (int): Число потоков, выполняющих хеширование паролей.
+        hash_max_pending (int): Максимум одновременно ожидающих и выполняемых операций хеширования.
+        auth_cache_size (int): Максимальное число токенов в кэше аутентифицированных пользователей.
+        auth_cache_ttl_seconds (float): Время жизни записи в этом кэше в секундах.
+        simulation_workers (int): Число процессов, выполняющих моделирование встреч.
+        simulation_max_pending (int): Максимум одновременно выполняемых запросов на моделирование.
+        simulation_max_contests (int): Бюджет одного запроса: максимум парных проверок (испытания × пары).
+        simulation_chunk_contests (int): Сколько парных проверок выполняет одна задача процесса.
+        roll_log_batch_size (int): При скольких накопленных бросках журнал записывается досрочно.
+        roll_log_flush_interval_seconds (float): Как часто буфер журнала бросков записывается в базу.
+        roll_log_max_buffer (int): Предел буфера журнала; не поместившиеся записи отбрасываются (счётчик roll_log.dropped).
+        live_queue_size (int): Сколько событий может ждать отправки одному клиенту (WebSocket или SSE), прежде чем его отключат.
+        live_buffer_size (int): Сколько последних событий кампании хранится в памяти для возобновления SSE по Last-Event-ID.
+        live_buffer_idle_seconds (float): Через сколько секунд после отключения последнего клиента удалять буфер событий кампании.
+        sse_keepalive_seconds (float): Как часто отправлять SSE-комментарий, чтобы прокси не закрывали простаивающий поток.
+        page_cache_size (int): Сколько отрисованных HTML-страниц хранить в памяти процесса.
+        character_stream_batch_size (int): Сколько персонажей читать из курсора за раз при потоковой выдаче списка.
+        campaign_archive_batch_size (int): Сколько персонажей читать или вставлять за раз при экспорте и импорте кампании.
+        seed_catalog_on_startup (bool): Проверять и при необходимости применять справочник характеристик и навыков при запуске.
     """
 
     model_config = SettingsConfigDict(env_file=".env")
-    db_username: str
-    db_password: str
-    db_host: str
-    db_port: int
-    db_name: str
-    secret_key: str
-    algo: str
-    access_token_expire_minutes: int
+    db_username: Optional[str] = None
+    db_password: Optional[str] = None
+    db_host: Optional[str] = None
+    db_port: Optional[int] = None
+    db_name: Optional[str] = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_statement_timeout_ms: Optional[int] = None
+    sqlite_performance_mode: bool = True
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000
+    sqlite_busy_timeout_ms: int = 5000
+    secret_key: str = "your_secret_key"
+    algo: str = "HS256"
+    access_token_expire_minutes: int = 60
+    bcrypt_rounds: int = 12
+    hash_pool_size: int = 2
+    hash_max_pending: int = 32
+    auth_cache_size: int = 1024
+    auth_cache_ttl_seconds: float = 60.0
+    simulation_workers: int = 2
+    simulation_max_pending: int = 4
+    simulation_max_contests: int = 20_000_000
+    simulation_chunk_contests: int = 1_000_000
+    roll_log_batch_size: int = 500
+    roll_log_flush_interval_seconds: float = 0.5
+    roll_log_max_buffer: int = 50_000
+    live_queue_size: int = 100
+    live_buffer_size: int = 256
+    live_buffer_idle_seconds: float = 60.0
+    sse_keepalive_seconds: float = 15.0
+    page_cache_size: int = 1024
+    character_stream_batch_size: int = 500
+    campaign_archive_batch_size: int = 1000
+    seed_catalog_on_startup: bool = True
 
 
 settings = Settings()
-
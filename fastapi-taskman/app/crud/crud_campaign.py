@@ -1,8 +1,10 @@
 # app/crud/crud_campaign.py
+from collections import defaultdict
+from typing import List, Optional
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
-from app.models.models import Campaign
-from app.schemas.campaign import CampaignCreate, CampaignOut
-from app.schemas.character import CharacterOut
+from app.models.models import Campaign, Character, CharacterRole
+from app.schemas.campaign import CampaignCreate
 
 # Модуль для работы с кампаниями (CRUD операции)
 
@@ -21,7 +23,7 @@ def create_campaign(db: Session, campaign: CampaignCreate, gm_id: int):
     db_campaign = Campaign(
         name=campaign.name,
         description=campaign.description,  # Сохраняем описание
-        gm_id=gm_id  # gm_id передаем здесь
+        gm_id=gm_id,  # gm_id передаем здесь
     )
     db.add(db_campaign)
     db.commit()
@@ -29,40 +31,109 @@ def create_campaign(db: Session, campaign: CampaignCreate, gm_id: int):
     return db_campaign
 
 
+def _campaigns_statement(campaign_id: Optional[int] = None, after_id: Optional[int] = None,
+                         limit: Optional[int] = None):
+    """
+    Запрос колонок кампаний, упорядоченных по ID (общий для синхронной и асинхронной версий).
+
+    :param campaign_id: ID одной кампании
+    :param after_id: ID последней кампании предыдущей страницы
+    :param limit: Максимальное количество кампаний (None — без ограничения)
+    :return: select по колонкам Campaign
+    """
+    stmt = select(Campaign.id, Campaign.name, Campaign.description, Campaign.gm_id).order_by(Campaign.id)
+    if campaign_id is not None:
+        stmt = stmt.where(Campaign.id == campaign_id)
+    if after_id is not None:
+        stmt = stmt.where(Campaign.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _characters_statement(campaign_ids: List[int]):
+    """
+    Запрос персонажей всех кампаний страницы одним IN, только нужные для вывода колонки.
+
+    :param campaign_ids: ID кампаний
+    :return: select по колонкам Character
+    """
+    return (
+        select(Character.id, Character.name, Character.campaign_id)
+        .where(Character.campaign_id.in_(campaign_ids))
+        .order_by(Character.id)
+    )
+
+
+def _to_campaign_rows(campaign_rows, character_rows) -> List[dict]:
+    """
+    Собирает из строк запросов словари с полями CampaignOut, без ORM-объектов и моделей
+    (сериализуются через dump_rows, шаблоны читают поля так же, как у модели).
+
+    :param campaign_rows: Строки _campaigns_statement
+    :param character_rows: Строки _characters_statement
+    :return: Данные кампаний
+    """
+    characters = defaultdict(list)
+    for character_id, name, campaign_id in character_rows:
+        characters[campaign_id].append({"id": character_id, "name": name})
+    return [{**row._asdict(), "characters": characters[row.id]} for row in campaign_rows]
+
+
+def _load_campaigns(db: Session, statement) -> List[dict]:
+    """
+    Выполняет запрос кампаний и догружает их персонажей: всего два запроса.
+
+    :param db: Сессия базы данных
+    :param statement: Запрос _campaigns_statement
+    :return: Данные кампаний
+    """
+    campaign_rows = db.execute(statement).all()
+    if not campaign_rows:
+        return []
+    character_rows = db.execute(_characters_statement([row.id for row in campaign_rows])).all()
+    return _to_campaign_rows(campaign_rows, character_rows)
+
+
 def get_campaign_by_id(db: Session, campaign_id: int):
     """
-    Получает кампанию по ID.
+    Получает кампанию по ID вместе со списком её персонажей.
 
     :param db: Сессия базы данных
     :param campaign_id: ID кампании
     :return: Данные кампании или None, если не найдено
     """
-    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
-    if campaign:
-        return CampaignOut(
-            id=campaign.id,
-            name=campaign.name,
-            gm_id=campaign.gm_id,
-            characters=[CharacterOut(id=char.id, name=char.name) for char in campaign.characters],
-            description=campaign.description  # добавляем описание
-        )
-    return None
+    campaigns = _load_campaigns(db, _campaigns_statement(campaign_id=campaign_id))
+    return campaigns[0] if campaigns else None
 
-def get_all_campaigns(db: Session):
+def get_all_campaigns(db: Session, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
     """
-    Получает все кампании.
+    Получает кампании, упорядоченные по ID.
+
+    Выполняет постоянное число запросов (два) независимо от количества кампаний и персонажей.
+    Поддерживает keyset-пагинацию: страница начинается сразу после кампании с ID after_id.
 
     :param db: Сессия базы данных
-    :return: Список всех кампаний
-    """
-    campaigns = db.query(Campaign).all()
-    return [
-        CampaignOut(
-            id=campaign.id,
-            name=campaign.name,
-            gm_id=campaign.gm_id,
-            characters=[CharacterOut(id=char.id, name=char.name) for char in campaign.characters],
-            description=campaign.description  # добавляем описание
-        )
-        for campaign in campaigns
-    ]
+    :param after_id: ID последней кампании предыдущей страницы
+    :param limit: Максимальное количество кампаний на странице (None — без ограничения)
+    :return: Список кампаний
+    """
+    return _load_campaigns(db, _campaigns_statement(after_id=after_id, limit=limit))
+
+
+def is_campaign_member(db: Session, campaign: Campaign, user_id: int) -> bool:
+    """
+    Проверяет, участвует ли пользователь в кампании.
+
+    Участник — ведущий кампании, владелец её персонажа или пользователь с ролью в ней.
+
+    :param db: Сессия базы данных
+    :param campaign: Кампания
+    :param user_id: ID пользователя
+    :return: True, если пользователь участвует в кампании
+    """
+    if campaign.gm_id == user_id:
+        return True
+    owns_character = exists().where(Character.campaign_id == campaign.id, Character.user_id == user_id)
+    has_role = exists().where(CharacterRole.campaign_id == campaign.id, CharacterRole.user_id == user_id)
+    return db.execute(select(owns_character | has_role)).scalar()
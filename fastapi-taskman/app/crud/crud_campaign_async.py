@@ -0,0 +1,70 @@
+# app/crud/crud_campaign_async.py
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Campaign
+from app.schemas.campaign import CampaignCreate
+from app.crud.crud_campaign import _campaigns_statement, _characters_statement, _to_campaign_rows
+
+# Асинхронные версии функций модуля crud_campaign
+
+async def create_campaign(db: AsyncSession, campaign: CampaignCreate, gm_id: int):
+    """
+    Создаёт новую кампанию в базе данных.
+
+    :param db: Асинхронная сессия базы данных
+    :param campaign: Данные для создания кампании
+    :param gm_id: ID ведущего кампании
+    :return: Созданная кампания
+    """
+    if not campaign.description:  # Проверка обязательности description
+        raise ValueError("Описание кампании обязательно")
+
+    db_campaign = Campaign(
+        name=campaign.name,
+        description=campaign.description,
+        gm_id=gm_id,
+    )
+    db.add(db_campaign)
+    await db.commit()
+    # Связь characters загружаем явно: ленивая загрузка при сериализации ответа в async-режиме невозможна
+    await db.refresh(db_campaign, ["characters"])
+    return db_campaign
+
+
+async def _load_campaigns(db: AsyncSession, statement) -> List[dict]:
+    """
+    Выполняет запрос кампаний и догружает их персонажей: всего два запроса.
+
+    :param db: Асинхронная сессия базы данных
+    :param statement: Запрос _campaigns_statement
+    :return: Данные кампаний
+    """
+    campaign_rows = (await db.execute(statement)).all()
+    if not campaign_rows:
+        return []
+    character_rows = (await db.execute(_characters_statement([row.id for row in campaign_rows]))).all()
+    return _to_campaign_rows(campaign_rows, character_rows)
+
+
+async def get_campaign_by_id(db: AsyncSession, campaign_id: int) -> Optional[dict]:
+    """
+    Получает кампанию по ID вместе со списком её персонажей.
+
+    :param db: Асинхронная сессия базы данных
+    :param campaign_id: ID кампании
+    :return: Данные кампании или None, если не найдено
+    """
+    campaigns = await _load_campaigns(db, _campaigns_statement(campaign_id=campaign_id))
+    return campaigns[0] if campaigns else None
+
+
+async def get_all_campaigns(db: AsyncSession, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    """
+    Получает кампании, упорядоченные по ID, с необязательной keyset-пагинацией.
+
+    :param db: Асинхронная сессия базы данных
+    :param after_id: ID последней кампании предыдущей страницы
+    :param limit: Максимальное количество кампаний на странице (None — без ограничения)
+    :return: Список кампаний
+    """
+    return await _load_campaigns(db, _campaigns_statement(after_id=after_id, limit=limit))
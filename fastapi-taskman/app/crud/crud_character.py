@@ -5,62 +5,237 @@
 Предоставляет функции для создания, обновления, удаления и получения персонажей.
 """
 
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-import random
-from app.models.models import Character, CharacterAttribute, CharacterSkill, Attribute, Skill
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, load_only, noload, object_session, raiseload, selectinload
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.campaign_rng import campaign_rng
+from app.catalog import catalog_cache
+from app.crud.crud_character_sheet import delete_character_sheet, rebuild_character_sheets
+from app.dice import DiceExpression, attribute_dice
+from app.live import campaign_hub, mark_character_changed
+from app.roll_log import roll_entry, roll_log
+from app.models.models import Character, CharacterAttribute, CharacterSkill
 from app.schemas.character import CharacterCreate, CharacterUpdate
 from app.schemas.character_attribute import CharacterAttributeCreate
 from app.schemas.character_skill import CharacterSkillCreate
+from app.schemas.roll import RollRequest, RollResult
 
 # Получение всех персонажей
 def get_characters(db: Session) -> List[Character]:
     return db.query(Character).all()
 
+# Профили загрузки персонажа: каждый загружает только то, что нужно вызывающему коду.
+# Коллекции грузятся selectinload — отдельным запросом на связь, без декартова
+# произведения характеристик и навыков в одном JOIN.
+LOAD_PROFILES = {
+    # Бросок: значения характеристик и бонусы навыков по ID, названия — из справочника
+    "roll": (
+        selectinload(Character.attributes).load_only(CharacterAttribute.attribute_id, CharacterAttribute.value),
+        selectinload(Character.skills).load_only(CharacterSkill.skill_id, CharacterSkill.bonus),
+    ),
+    # Полный лист: характеристики и навыки вместе с записями справочника (many-to-one, без размножения строк)
+    "sheet": (
+        selectinload(Character.attributes).joinedload(CharacterAttribute.attribute),
+        selectinload(Character.skills).joinedload(CharacterSkill.skill),
+    ),
+    # Только колонки персонажа; обращение к связям — ошибка, а не скрытый запрос
+    "summary": (
+        load_only(Character.id, Character.name, Character.description, Character.campaign_id, Character.user_id),
+        raiseload("*"),
+    ),
+    # Удаление: характеристики и навыки удаляются массово, их коллекции не загружаются
+    # (ответ DELETE /characters/{id} — CharacterSummary, без коллекций)
+    "for-delete": (
+        noload(Character.attributes),
+        noload(Character.skills),
+    ),
+}
+
+def character_load_options(profile: str) -> tuple:
+    """
+    Возвращает опции загрузки персонажа для профиля.
+
+    Аргументы:
+    profile (str): название профиля из LOAD_PROFILES.
+
+    Возвращает:
+    tuple: опции для Query.options / Select.options.
+    """
+    options = LOAD_PROFILES.get(profile)
+    if options is None:
+        raise ValueError(f"Неизвестный профиль загрузки персонажа: {profile}")
+    return options
+
 # Получение персонажа по ID
-def get_character_by_id(db: Session, character_id: int):
+def get_character_by_id(db: Session, character_id: int, profile: str = "sheet") -> Optional[Character]:
     """
-    Получает персонажа по ID, включая его атрибуты и навыки.
+    Получает персонажа по ID с данными выбранного профиля загрузки.
 
     Аргументы:
     db (Session): объект сессии для взаимодействия с базой данных.
     character_id (int): ID персонажа.
+    profile (str): профиль загрузки из LOAD_PROFILES ("roll", "sheet", "summary", "for-delete").
 
     Возвращает:
     Character: персонаж с указанным ID.
     """
     return db.query(Character) \
-        .options(
-            joinedload(Character.attributes).joinedload(CharacterAttribute.attribute).joinedload(Attribute.skills),
-            joinedload(Character.skills).joinedload(CharacterSkill.skill)
-        ) \
+        .options(*character_load_options(profile)) \
         .filter(Character.id == character_id) \
         .first()
 
-# Получение персонажей по пользователю или кампании
-def get_characters_by_user_or_campaign(db: Session, user_id: Optional[int] = None, campaign_id: Optional[int] = None) -> List[Character]:
+# Запрос персонажей с фильтрами и keyset-пагинацией
+def characters_query(db: Session, user_id: Optional[int] = None, campaign_id: Optional[int] = None,
+                     after_id: Optional[int] = None, profile: Optional[str] = None):
     """
-    Получает персонажей по ID пользователя или кампании.
+    Строит запрос персонажей, упорядоченных по ID.
+
+    Фильтры по владельцу и кампании обслуживаются составными индексами
+    (user_id, id) и (campaign_id, id), поэтому страница начинается с поиска
+    по индексу, а не со сдвига OFFSET.
 
     Аргументы:
     db (Session): объект сессии для взаимодействия с базой данных.
     user_id (Optional[int]): ID пользователя.
     campaign_id (Optional[int]): ID кампании.
+    after_id (Optional[int]): ID последнего персонажа предыдущей страницы.
+    profile (Optional[str]): профиль загрузки из LOAD_PROFILES.
 
     Возвращает:
-    List[Character]: список персонажей.
+    Query: запрос по Character.
     """
     query = db.query(Character)
+    if profile is not None:
+        query = query.options(*character_load_options(profile))
+    return _filter_characters(query, user_id, campaign_id, after_id)
+
+def _filter_characters(query, user_id: Optional[int], campaign_id: Optional[int], after_id: Optional[int]):
+    """Фильтры и порядок списка персонажей; общая часть запросов объектов и строк."""
     if user_id:
         query = query.filter(Character.user_id == user_id)
     if campaign_id:
         query = query.filter(Character.campaign_id == campaign_id)
+    if after_id is not None:
+        query = query.filter(Character.id > after_id)
+    return query.order_by(Character.id)
+
+# Получение персонажей по пользователю или кампании
+def get_characters_by_user_or_campaign(db: Session, user_id: Optional[int] = None, campaign_id: Optional[int] = None,
+                                       after_id: Optional[int] = None, limit: Optional[int] = None,
+                                       profile: Optional[str] = None) -> List[Character]:
+    """
+    Получает персонажей по ID пользователя или кампании.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    user_id (Optional[int]): ID пользователя.
+    campaign_id (Optional[int]): ID кампании.
+    after_id (Optional[int]): ID последнего персонажа предыдущей страницы.
+    limit (Optional[int]): размер страницы (None — без ограничения).
+    profile (Optional[str]): профиль загрузки из LOAD_PROFILES.
+
+    Возвращает:
+    List[Character]: список персонажей, упорядоченный по ID.
+    """
+    query = characters_query(db, user_id, campaign_id, after_id, profile)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
+# Колонки персонажа в списке: поля схемы CharacterSummary
+SUMMARY_COLUMNS = (Character.id, Character.name, Character.description, Character.campaign_id, Character.user_id)
+# Ключи словарей строк; dict(zip(...)) заметно быстрее Row._asdict()
+SUMMARY_KEYS = tuple(column.key for column in SUMMARY_COLUMNS)
+
+# Получение строк списка персонажей
+def get_character_rows(db: Session, user_id: Optional[int] = None, campaign_id: Optional[int] = None,
+                       after_id: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    """
+    Получает персонажей списка как словари колонок, без создания ORM-объектов.
+
+    Словари содержат ровно поля CharacterSummary и сериализуются
+    app.serialization.dump_rows без промежуточных моделей.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    user_id (Optional[int]): ID пользователя.
+    campaign_id (Optional[int]): ID кампании.
+    after_id (Optional[int]): ID последнего персонажа предыдущей страницы.
+    limit (Optional[int]): размер страницы (None — без ограничения).
+
+    Возвращает:
+    List[dict]: строки персонажей, упорядоченные по ID.
+    """
+    query = _filter_characters(db.query(*SUMMARY_COLUMNS), user_id, campaign_id, after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return [dict(zip(SUMMARY_KEYS, row)) for row in query]
+
+# Потоковое чтение персонажей
+def iter_character_rows(db: Session, user_id: Optional[int] = None, campaign_id: Optional[int] = None,
+                        after_id: Optional[int] = None, limit: Optional[int] = None,
+                        batch_size: int = 500) -> Iterator[List[dict]]:
+    """
+    Выдаёт строки персонажей пачками по мере чтения курсора (yield_per).
+
+    Читаются только колонки CharacterSummary, ORM-объекты не создаются,
+    поэтому потребление памяти ограничено одной пачкой.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    user_id (Optional[int]): ID пользователя.
+    campaign_id (Optional[int]): ID кампании.
+    after_id (Optional[int]): ID последнего персонажа предыдущей страницы.
+    limit (Optional[int]): максимум персонажей (None — все).
+    batch_size (int): сколько строк читать из курсора за раз.
+
+    Возвращает:
+    Iterator[List[dict]]: пачки строк в порядке ID.
+    """
+    query = _filter_characters(db.query(*SUMMARY_COLUMNS), user_id, campaign_id, after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(dict(zip(SUMMARY_KEYS, row)))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Строки характеристик и навыков для массовой вставки
+def character_stat_rows(characters: List[Character], characters_data: List[CharacterCreate]) -> tuple:
+    """
+    Готовит строки характеристик и навыков для уже получивших ID персонажей.
+
+    Общая часть для синхронной и асинхронной версий create_characters.
+
+    Аргументы:
+    characters (List[Character]): персонажи после flush (с заполненным id).
+    characters_data (List[CharacterCreate]): данные тех же персонажей в том же порядке.
+
+    Возвращает:
+    tuple: (строки CharacterAttribute, строки CharacterSkill).
+    """
+    attribute_rows = []
+    skill_rows = []
+    for character, data in zip(characters, characters_data):
+        attribute_rows.extend(
+            {"character_id": character.id, "attribute_id": attr_id, "value": attr_value}
+            for attr_id, attr_value in data.attributes.items()
+        )
+        skill_rows.extend(
+            {"character_id": character.id, "skill_id": skill_id, "bonus": bonus}
+            for skill_id, bonus in data.skills.items()
+        )
+    return attribute_rows, skill_rows
+
 # Создание нового персонажа
 def create_character(db: Session, character_data: CharacterCreate, user_id: int, campaign_id: int) -> Character:
     """
-    Создаёт нового персонажа и его атрибуты и навыки.
+    Создаёт нового персонажа и его атрибуты и навыки в одной транзакции.
 
     Аргументы:
     db (Session): объект сессии для взаимодействия с базой данных.
@@ -71,43 +246,143 @@ def create_character(db: Session, character_data: CharacterCreate, user_id: int,
     Возвращает:
     Character: созданный персонаж.
     """
-    new_character = Character(
-        name=character_data.name,
-        description=character_data.description,
-        user_id=user_id,
-        campaign_id=campaign_id,
-    )
-    db.add(new_character)
-    db.commit()
-    db.refresh(new_character)
-
-    # Атрибуты
-    for attr_id, attr_value in character_data.attributes.items():
-        character_attribute = CharacterAttribute(
-            character_id=new_character.id,
-            attribute_id=attr_id,
-            value=attr_value
-        )
-        db.add(character_attribute)
-
-    # Навыки
-    for skill_id, bonus in character_data.skills.items():
-        character_skill = CharacterSkill(
-            character_id=new_character.id,
-            skill_id=skill_id,
-            bonus=bonus
-        )
-        db.add(character_skill)
+    return create_characters(db, [character_data], user_id, campaign_id)[0]
+
+# Создание нескольких персонажей
+def create_characters(db: Session, characters_data: List[CharacterCreate], user_id: int, campaign_id: int) -> List[Character]:
+    """
+    Создаёт сразу несколько персонажей (импорт группы или списка NPC).
+
+    Все персонажи с их характеристиками и навыками записываются одним commit:
+    либо создаются все, либо ни один. Характеристики и навыки вставляются
+    массово, одной командой на таблицу.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    characters_data (List[CharacterCreate]): данные персонажей.
+    user_id (int): ID пользователя.
+    campaign_id (int): ID кампании.
 
+    Возвращает:
+    List[Character]: созданные персонажи в порядке входных данных.
+    """
+    new_characters = [
+        Character(name=data.name, description=data.description, user_id=user_id, campaign_id=campaign_id)
+        for data in characters_data
+    ]
+    db.add_all(new_characters)
+    db.flush()
+    ids = [character.id for character in new_characters]
+
+    # Дочерние строки вставляются пакетно (executemany) одной командой на таблицу
+    attribute_rows, skill_rows = character_stat_rows(new_characters, characters_data)
+    if attribute_rows:
+        db.execute(insert(CharacterAttribute), attribute_rows)
+    if skill_rows:
+        db.execute(insert(CharacterSkill), skill_rows)
+    rebuild_character_sheets(db, ids)
     db.commit()
-    db.refresh(new_character)
-    return new_character
+
+    # После commit объекты просрочены: перечитываем их одним запросом, а не по одному
+    if ids:
+        db.query(Character).filter(Character.id.in_(ids)).all()
+    return new_characters
+
+# Диалектные конструкции INSERT с поддержкой ON CONFLICT
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+def _build_upsert(dialect: str, model, key_column: str, value_column: str):
+    """
+    Строит команду INSERT ... ON CONFLICT DO UPDATE для связующей таблицы персонажа.
+
+    Аргументы:
+    dialect (str): имя диалекта базы данных.
+    model: модель связующей таблицы (CharacterAttribute или CharacterSkill).
+    key_column (str): колонка с ID характеристики или навыка.
+    value_column (str): колонка с обновляемым значением.
+
+    Возвращает:
+    Insert: команда для выполнения в режиме executemany.
+    """
+    dialect_insert = _UPSERT_INSERTS.get(dialect)
+    if dialect_insert is None:
+        raise ValueError(f"Массовое обновление не поддерживается для диалекта {dialect}")
+
+    stmt = dialect_insert(model.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["character_id", key_column],
+        set_={value_column: stmt.excluded[value_column]},
+    )
+
+def build_stats_upserts(
+    dialect: str,
+    character_id: int,
+    attributes: Optional[Dict[int, int]] = None,
+    skills: Optional[Dict[int, int]] = None,
+) -> list:
+    """
+    Готовит команды массового обновления характеристик и навыков персонажа.
+
+    Общая часть для синхронной и асинхронной версий upsert_character_stats.
+
+    Аргументы:
+    dialect (str): имя диалекта базы данных.
+    character_id (int): ID персонажа.
+    attributes (Optional[Dict[int, int]]): ID характеристики: значение.
+    skills (Optional[Dict[int, int]]): ID навыка: бонус.
+
+    Возвращает:
+    list: пары (команда, список строк параметров); пустые наборы пропускаются.
+    """
+    upserts = []
+    for model, key_column, value_column, values in (
+        (CharacterAttribute, "attribute_id", "value", attributes),
+        (CharacterSkill, "skill_id", "bonus", skills),
+    ):
+        if not values:
+            continue
+        rows = [
+            {"character_id": character_id, key_column: key, value_column: value}
+            for key, value in values.items()
+        ]
+        upserts.append((_build_upsert(dialect, model, key_column, value_column), rows))
+    return upserts
+
+def upsert_character_stats(
+    db: Session,
+    character_id: int,
+    attributes: Optional[Dict[int, int]] = None,
+    skills: Optional[Dict[int, int]] = None,
+) -> None:
+    """
+    Создаёт или обновляет характеристики и навыки персонажа массово.
+
+    На каждую таблицу выполняется одна команда INSERT ... ON CONFLICT DO UPDATE
+    (executemany) независимо от количества значений.
+    Транзакция не фиксируется — это делает вызывающий код.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    character_id (int): ID персонажа.
+    attributes (Optional[Dict[int, int]]): ID характеристики: значение.
+    skills (Optional[Dict[int, int]]): ID навыка: бонус.
+    """
+    dialect = db.get_bind().dialect.name
+    for stmt, rows in build_stats_upserts(dialect, character_id, attributes, skills):
+        db.execute(stmt, rows)
+    mark_character_changed(db, character_id)
 
 # Обновление персонажа
 def update_character(db: Session, character_id: int, character_data: CharacterUpdate) -> Optional[Character]:
     """
     Обновляет данные персонажа, включая атрибуты и навыки.
 
+    Названия характеристик и навыков переводятся в ID через кэш справочника,
+    а сами значения записываются массово в одной транзакции.
+
     Аргументы:
     db (Session): объект сессии для взаимодействия с базой данных.
     character_id (int): ID персонажа.
@@ -116,7 +391,7 @@ def update_character(db: Session, character_id: int, character_data: CharacterUp
     Возвращает:
     Character: обновлённый персонаж.
     """
-    character = get_character_by_id(db, character_id)
+    character = db.get(Character, character_id)
     if not character:
         return None
 
@@ -126,44 +401,20 @@ def update_character(db: Session, character_id: int, character_data: CharacterUp
     if character_data.description is not None:
         character.description = character_data.description
 
-    # Обновляем характеристики
-    if character_data.attributes:
-        for attr_name, attr_value in character_data.attributes.items():
-            # Ищем или создаём новый атрибут для персонажа
-            attribute = db.query(Attribute).filter(Attribute.name == attr_name).first()
-            if attribute:
-                char_attr = db.query(CharacterAttribute).filter(
-                    CharacterAttribute.character_id == character.id,
-                    CharacterAttribute.attribute_id == attribute.id
-                ).first()
-                if char_attr:
-                    char_attr.value = attr_value  # Обновляем значение
-                else:
-                    new_char_attr = CharacterAttribute(
-                        character_id=character.id,
-                        attribute_id=attribute.id,
-                        value=attr_value
-                    )
-                    db.add(new_char_attr)
-
-    # Обновляем навыки
-    if character_data.skills:
-        for skill_data in character_data.skills:
-            skill = db.query(Skill).filter(Skill.name == skill_data.name).first()
-            if skill:
-                char_skill = db.query(CharacterSkill).filter(
-                    CharacterSkill.character_id == character.id,
-                    CharacterSkill.skill_id == skill.id
-                ).first()
-                if char_skill:
-                    char_skill.bonus = skill_data.bonus  # Обновляем бонус
-                else:
-                    new_char_skill = CharacterSkill(
-                        character_id=character.id,
-                        skill_id=skill.id,
-                        bonus=skill_data.bonus
-                    )
-                    db.add(new_char_skill)
+    # Неизвестные названия пропускаются, как и раньше
+    catalog = catalog_cache.get(db)
+    attributes = {
+        catalog.attribute_ids[name]: value
+        for name, value in (character_data.attributes or {}).items()
+        if name in catalog.attribute_ids
+    }
+    skills = {
+        catalog.skill_ids[name]: bonus
+        for name, bonus in (character_data.skills or {}).items()
+        if name in catalog.skill_ids
+    }
+    upsert_character_stats(db, character.id, attributes, skills)
+    rebuild_character_sheets(db, [character.id])
 
     db.commit()
     db.refresh(character)
@@ -179,15 +430,16 @@ def delete_character(db: Session, character_id: int) -> Optional[Character]:
     character_id (int): ID персонажа.
 
     Возвращает:
-    Character: удалённый персонаж.
+    Character: удалённый персонаж; коллекции attributes и skills не загружены.
     """
-    character = get_character_by_id(db, character_id)
+    character = get_character_by_id(db, character_id, "for-delete")
     if not character:
         return None
 
     # Удаляем связи с атрибутами и навыками
     db.query(CharacterAttribute).filter(CharacterAttribute.character_id == character.id).delete()
     db.query(CharacterSkill).filter(CharacterSkill.character_id == character.id).delete()
+    delete_character_sheet(db, character.id)
 
     db.delete(character)
     db.commit()
@@ -198,6 +450,9 @@ def roll_attribute(character: Character, attribute: str, skill: str = None) -> i
     """
     Выполняет бросок атрибута с учётом бонуса от навыка.
 
+    Кубик и бонус определяются через справочник (roll_parameters), поэтому
+    персонажу достаточно профиля загрузки "roll".
+
     Аргументы:
     character (Character): персонаж, чьи атрибуты и навыки будут использоваться.
     attribute (str): название атрибута.
@@ -205,32 +460,173 @@ def roll_attribute(character: Character, attribute: str, skill: str = None) -> i
 
     Возвращает:
     int: результат броска.
-    """
-    # Сначала получаем значение характеристики
-    attribute_value = next((char_attr.value for char_attr in character.attributes if char_attr.attribute.name == attribute), 1)
-
-    # Определяем тип кубика в зависимости от значения характеристики
-    dice_type = {
-        1: 4,  # 1d4
-        2: 6,  # 1d6
-        3: 8,  # 1d8
-        4: 10,  # 1d10
-        5: 12,  # 1d12
-    }.get(attribute_value, 4)
-
-    # Бросаем кубик
-    dice_roll = random.randint(1, dice_type)
-
-    # Если навык передан, прибавляем бонус
-    bonus = 0
-    if skill:
-        skill_bonus = next(
-            (char_skill.bonus for char_skill in character.skills if char_skill.skill.name == skill), 0
-        )
-        bonus += skill_bonus
 
+    Исключения:
+    CampaignNotFound: кампании персонажа нет в базе (бросок не выполняется).
+    """
+    db = object_session(character)
+    # Базовый кубик характеристики повышается её значением; бонус навыка, если он передан
+    dice, bonus = roll_parameters(catalog_cache.get(db), character, attribute, skill)
+
+    # Бросаем кубик в собственном потоке генератора кампании
+    campaign_rng.load_keys(db, [character.campaign_id])
+    dice_result, rng_nonce, rng_sequence = campaign_rng.roll(character.campaign_id, dice)
+    dice_roll = dice_result.total
+
+    # Записываем бросок в журнал (буфер, без обращения к базе) и показываем его столу кампании
+    roll_log.append([
+        roll_entry(character.id, character.campaign_id, attribute, skill, dice.notation, bonus, dice_roll,
+                   rng_nonce, rng_sequence)
+    ])
+    campaign_hub.publish(character.campaign_id, roll_event(character, RollResult(
+        character_id=character.id, attribute=attribute, skill=skill, dice=dice.notation,
+        bonus=bonus, rolls=[dice_roll], results=[dice_roll + bonus],
+    )))
     return dice_roll + bonus
 
+# Событие броска для стола кампании
+def roll_event(character: Character, result: RollResult) -> dict:
+    """
+    Готовит событие броска для рассылки подключённым к кампании клиентам.
+
+    Аргументы:
+    character (Character): персонаж, выполнивший бросок.
+    result (RollResult): результат бросков.
+
+    Возвращает:
+    dict: событие типа roll.
+    """
+    return {"type": "roll", "character_name": character.name, **result.model_dump()}
+
+# Параметры броска персонажа
+def roll_parameters(catalog, character: Character, attribute: str,
+                    skill: Optional[str] = None) -> Tuple[DiceExpression, int]:
+    """
+    Определяет кубик характеристики и бонус навыка персонажа по их названиям.
+
+    Не обращается к связям CharacterAttribute.attribute и CharacterSkill.skill:
+    названия переводятся в ID через справочник.
+
+    Аргументы:
+    catalog (Catalog): снимок справочника.
+    character (Character): персонаж с загруженными attributes и skills.
+    attribute (str): название характеристики.
+    skill (Optional[str]): название навыка.
+
+    Возвращает:
+    Tuple[DiceExpression, int]: (кубик с учётом значения характеристики, бонус навыка).
+    """
+    attribute_id = catalog.attribute_ids.get(attribute)
+    attribute_value = next((ca.value for ca in character.attributes if ca.attribute_id == attribute_id), 1)
+    dice = attribute_dice(catalog.attribute_dice_types.get(attribute_id, "1d4"), attribute_value)
+    skill_id = catalog.skill_ids.get(skill) if skill else None
+    bonus = next((cs.bonus for cs in character.skills if cs.skill_id == skill_id), 0) if skill_id else 0
+    return dice, bonus
+
+# Персонажи для бросков
+def load_roll_characters(db: Session, character_ids) -> Optional[Dict[int, Character]]:
+    """
+    Загружает персонажей с характеристиками и навыками постоянным числом запросов.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    character_ids: ID персонажей.
+
+    Возвращает:
+    Dict[int, Character]: персонажи по ID или None, если какого-то персонажа нет.
+    """
+    characters = {
+        character.id: character
+        for character in db.query(Character)
+        .options(*character_load_options("roll"))
+        .filter(Character.id.in_(set(character_ids)))
+    }
+    if len(characters) != len(set(character_ids)):
+        return None
+    return characters
+
+# Параметры бросков для многих персонажей
+def load_roll_parameters(db: Session, requests) -> Optional[List[Tuple[DiceExpression, int]]]:
+    """
+    Определяет кубик и бонус для каждого запроса, загружая всех персонажей разом.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    requests: объекты с полями character_id, attribute и skill (RollRequest, Combatant).
+
+    Возвращает:
+    List[Tuple[DiceExpression, int]]: пары (кубик, бонус) в порядке запросов
+    или None, если какого-то персонажа нет.
+    """
+    characters = load_roll_characters(db, {request.character_id for request in requests})
+    if characters is None:
+        return None
+
+    catalog = catalog_cache.get(db)
+    return [
+        roll_parameters(catalog, characters[request.character_id], request.attribute, request.skill)
+        for request in requests
+    ]
+
+# Пакетный бросок
+def roll_batch(db: Session, requests: List[RollRequest]) -> Optional[List[RollResult]]:
+    """
+    Выполняет много бросков для многих персонажей за один раз.
+
+    Характеристики и навыки всех нужных персонажей загружаются постоянным числом
+    запросов. Каждый бросок получает свой поток генератора кампании
+    (app/campaign_rng.py), поэтому его можно повторить по записи журнала.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    requests (List[RollRequest]): запросы на броски.
+
+    Возвращает:
+    List[RollResult]: результаты в порядке запросов или None, если какого-то персонажа нет.
+
+    Исключения:
+    CampaignNotFound: кампании какого-то из персонажей нет в базе (ни один бросок не выполняется).
+    """
+    characters = load_roll_characters(db, {request.character_id for request in requests})
+    if characters is None:
+        return None
+
+    catalog = catalog_cache.get(db)
+    params = [
+        roll_parameters(catalog, characters[request.character_id], request.attribute, request.skill)
+        for request in requests
+    ]
+
+    campaign_rng.load_keys(db, {character.campaign_id for character in characters.values()})
+
+    results = []
+    entries = []
+    for request, (dice, bonus) in zip(requests, params):
+        campaign_id = characters[request.character_id].campaign_id
+        rolled = campaign_rng.roll_many(campaign_id, dice, request.count)
+        rolls = [dice_result.total for dice_result, _ in rolled]
+        entries.extend(
+            roll_entry(request.character_id, campaign_id, request.attribute, request.skill, dice.notation, bonus,
+                       dice_result.total, campaign_rng.nonce, rng_sequence)
+            for dice_result, rng_sequence in rolled
+        )
+        results.append(RollResult(
+            character_id=request.character_id,
+            attribute=request.attribute,
+            skill=request.skill,
+            dice=dice.notation,
+            bonus=bonus,
+            rolls=rolls,
+            results=[roll + bonus for roll in rolls],
+        ))
+
+    # Весь пакет попадает в журнал одним добавлением в буфер
+    roll_log.append(entries)
+    for result in results:
+        character = characters[result.character_id]
+        campaign_hub.publish(character.campaign_id, roll_event(character, result))
+    return results
+
 # Получение персонажей по ID кампании
 def get_characters_by_campaign_id(db: Session, campaign_id: int):
     return db.query(Character).filter(Character.campaign_id == campaign_id).all()
@@ -0,0 +1,199 @@
+# app/crud/crud_character_async.py
+
+"""
+Асинхронные версии функций модуля crud_character.
+Работают через AsyncSession и не блокируют цикл событий; связи, нужные
+вызывающему коду, загружаются жадно, так как ленивая загрузка в асинхронном
+режиме недоступна.
+"""
+
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import crud_character, crud_character_sheet
+from app.live import mark_character_changed
+from app.models.models import Character, CharacterAttribute, CharacterSheet, CharacterSkill
+from app.schemas.character import CharacterCreate, CharacterUpdate
+
+# Получение всех персонажей
+async def get_characters(db: AsyncSession) -> List[Character]:
+    result = await db.execute(select(Character))
+    return list(result.scalars().all())
+
+# Получение персонажа по ID
+async def get_character_by_id(db: AsyncSession, character_id: int, profile: str = "sheet") -> Optional[Character]:
+    """
+    Получает персонажа по ID с данными выбранного профиля загрузки.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_id (int): ID персонажа.
+    profile (str): профиль загрузки из crud_character.LOAD_PROFILES.
+
+    Возвращает:
+    Character: персонаж с указанным ID.
+    """
+    result = await db.execute(
+        select(Character)
+        .options(*crud_character.character_load_options(profile))
+        .where(Character.id == character_id)
+    )
+    return result.scalars().first()
+
+# Снимок листа персонажа
+async def get_character_sheet(db: AsyncSession, character_id: int) -> Optional[dict]:
+    """
+    Возвращает содержимое снимка листа персонажа для страницы детализации, ничего не записывая.
+
+    Снимок читается одним запросом по первичному ключу; если его нет, содержимое
+    собирается из таблиц персонажа синхронной реализацией через run_sync.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_id (int): ID персонажа.
+
+    Возвращает:
+    dict: содержимое снимка или None, если персонажа нет.
+    """
+    sheet = await db.get(CharacterSheet, character_id)
+    if sheet is not None:
+        return sheet.data
+    return await db.run_sync(crud_character_sheet.get_character_sheet, character_id)
+
+# Получение персонажей по пользователю или кампании
+async def get_characters_by_user_or_campaign(db: AsyncSession, user_id: Optional[int] = None, campaign_id: Optional[int] = None) -> List[Character]:
+    """
+    Получает персонажей по ID пользователя или кампании.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    user_id (Optional[int]): ID пользователя.
+    campaign_id (Optional[int]): ID кампании.
+
+    Возвращает:
+    List[Character]: список персонажей.
+    """
+    stmt = select(Character)
+    if user_id:
+        stmt = stmt.where(Character.user_id == user_id)
+    if campaign_id:
+        stmt = stmt.where(Character.campaign_id == campaign_id)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+# Создание нового персонажа
+async def create_character(db: AsyncSession, character_data: CharacterCreate, user_id: int, campaign_id: int) -> Character:
+    """
+    Создаёт нового персонажа и его атрибуты и навыки в одной транзакции.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_data (CharacterCreate): данные для создания нового персонажа.
+    user_id (int): ID пользователя.
+    campaign_id (int): ID кампании.
+
+    Возвращает:
+    Character: созданный персонаж.
+    """
+    return (await create_characters(db, [character_data], user_id, campaign_id))[0]
+
+# Создание нескольких персонажей
+async def create_characters(db: AsyncSession, characters_data: List[CharacterCreate], user_id: int, campaign_id: int) -> List[Character]:
+    """
+    Создаёт сразу несколько персонажей одним commit.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    characters_data (List[CharacterCreate]): данные персонажей.
+    user_id (int): ID пользователя.
+    campaign_id (int): ID кампании.
+
+    Возвращает:
+    List[Character]: созданные персонажи в порядке входных данных.
+    """
+    new_characters = [
+        Character(name=data.name, description=data.description, user_id=user_id, campaign_id=campaign_id)
+        for data in characters_data
+    ]
+    db.add_all(new_characters)
+    await db.flush()
+
+    attribute_rows, skill_rows = crud_character.character_stat_rows(new_characters, characters_data)
+    if attribute_rows:
+        await db.execute(insert(CharacterAttribute), attribute_rows)
+    if skill_rows:
+        await db.execute(insert(CharacterSkill), skill_rows)
+    await db.run_sync(crud_character_sheet.rebuild_character_sheets, [character.id for character in new_characters])
+    # expire_on_commit=False: после commit объекты остаются заполненными без повторного чтения
+    await db.commit()
+    return new_characters
+
+async def upsert_character_stats(
+    db: AsyncSession,
+    character_id: int,
+    attributes: Optional[Dict[int, int]] = None,
+    skills: Optional[Dict[int, int]] = None,
+) -> None:
+    """
+    Создаёт или обновляет характеристики и навыки персонажа массово.
+
+    Транзакция не фиксируется — это делает вызывающий код.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_id (int): ID персонажа.
+    attributes (Optional[Dict[int, int]]): ID характеристики: значение.
+    skills (Optional[Dict[int, int]]): ID навыка: бонус.
+    """
+    dialect = db.get_bind().dialect.name
+    for stmt, rows in crud_character.build_stats_upserts(dialect, character_id, attributes, skills):
+        await db.execute(stmt, rows)
+    mark_character_changed(db.sync_session, character_id)
+
+# Обновление персонажа
+async def update_character(db: AsyncSession, character_id: int, character_data: CharacterUpdate) -> Optional[Character]:
+    """
+    Обновляет данные персонажа, включая атрибуты и навыки.
+
+    Выполняет синхронную реализацию внутри AsyncSession.run_sync: запросы идут
+    через асинхронный драйвер, а логика обновления не дублируется.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_id (int): ID персонажа.
+    character_data (CharacterUpdate): новые данные для обновления.
+
+    Возвращает:
+    Character: обновлённый персонаж.
+    """
+    return await db.run_sync(crud_character.update_character, character_id, character_data)
+
+# Удаление персонажа
+async def delete_character(db: AsyncSession, character_id: int) -> Optional[Character]:
+    """
+    Удаляет персонажа из базы данных.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    character_id (int): ID персонажа.
+
+    Возвращает:
+    Character: удалённый персонаж; коллекции attributes и skills не загружены.
+    """
+    character = await get_character_by_id(db, character_id, "for-delete")
+    if not character:
+        return None
+
+    # Удаляем связи с атрибутами и навыками
+    await db.execute(delete(CharacterAttribute).where(CharacterAttribute.character_id == character.id))
+    await db.execute(delete(CharacterSkill).where(CharacterSkill.character_id == character.id))
+    await db.execute(delete(CharacterSheet).where(CharacterSheet.character_id == character.id))
+
+    await db.delete(character)
+    await db.commit()
+    return character
+
+# Получение персонажей по ID кампании
+async def get_characters_by_campaign_id(db: AsyncSession, campaign_id: int) -> List[Character]:
+    result = await db.execute(select(Character).where(Character.campaign_id == campaign_id))
+    return list(result.scalars().all())
@@ -0,0 +1,31 @@
+# app/crud/crud_character_role_async.py
+
+"""
+Асинхронные версии функций модуля crud_character_role.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import CharacterRole
+from app.schemas.character_role import CharacterRoleCreate
+
+async def create_character_role(db: AsyncSession, role_data: CharacterRoleCreate) -> CharacterRole:
+    """
+    Создаёт новую роль для персонажа и сохраняет её в базе данных.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    role_data (CharacterRoleCreate): данные для создания новой роли персонажа.
+
+    Возвращает:
+    CharacterRole: созданная роль персонажа.
+    """
+    new_role = CharacterRole(
+        role=role_data.role,
+        character_id=role_data.character_id,
+        user_id=role_data.user_id,
+        campaign_id=role_data.campaign_id,
+    )
+    db.add(new_role)
+    await db.commit()
+    await db.refresh(new_role)
+    return new_role
@@ -0,0 +1,160 @@
+# app/crud/crud_character_sheet.py
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.catalog import Catalog
+from app.models.models import Character, CharacterAttribute, CharacterSheet, CharacterSkill
+
+# Модуль снимков листа персонажа.
+# Снимок хранит только данные самого персонажа: его поля, значения характеристик
+# и бонусы навыков по ID. Он перестраивается в той же транзакции, что и запись
+# персонажа (и строится для существующих персонажей миграцией 0005), поэтому
+# страница персонажа читает одну строку по первичному ключу вместо персонажа,
+# его характеристик и навыков. Названия и группировка навыков берутся из кэша
+# справочника при выводе (sheet_context), поэтому изменение справочника не
+# делает снимки устаревшими.
+
+def build_sheet_data(character: dict, attribute_values: Dict[int, int], skill_bonuses: Dict[int, int]) -> dict:
+    """
+    Строит содержимое снимка.
+
+    Ключи словарей — строки: в таком виде они возвращаются из JSON-колонки.
+
+    Аргументы:
+    character (dict): поля персонажа (id, name, description, campaign_id, user_id).
+    attribute_values (Dict[int, int]): ID характеристики -> значение.
+    skill_bonuses (Dict[int, int]): ID навыка -> бонус.
+
+    Возвращает:
+    dict: character, attributes, skills.
+    """
+    return {
+        "character": character,
+        "attributes": {str(attribute_id): value for attribute_id, value in attribute_values.items()},
+        "skills": {str(skill_id): bonus for skill_id, bonus in skill_bonuses.items()},
+    }
+
+def sheet_context(catalog: Catalog, data: dict) -> dict:
+    """
+    Соединяет снимок со справочником в контекст шаблона characters/detail.html.
+
+    Аргументы:
+    catalog (Catalog): снимок справочника.
+    data (dict): содержимое снимка (build_sheet_data).
+
+    Возвращает:
+    dict: character, attribute_names, grouped_skills, char_attr_values, char_skill_values.
+    """
+    return {
+        "character": data["character"],
+        "attribute_names": catalog.attribute_names,
+        "grouped_skills": catalog.grouped_skills,
+        "char_attr_values": {
+            catalog.attribute_names_by_id[int(attribute_id)]: value
+            for attribute_id, value in data["attributes"].items()
+            if int(attribute_id) in catalog.attribute_names_by_id
+        },
+        "char_skill_values": {
+            catalog.skill_names_by_id[int(skill_id)]: bonus
+            for skill_id, bonus in data["skills"].items()
+            if int(skill_id) in catalog.skill_names_by_id
+        },
+    }
+
+def load_sheet_data(db: Session, character_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Читает данные снимков из таблиц персонажей постоянным числом запросов (тремя).
+
+    Данные читаются колонками, а не через связи ORM: загруженные ранее
+    коллекции в сессии могут не отражать массовые INSERT ... ON CONFLICT.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    character_ids (Iterable[int]): ID персонажей.
+
+    Возвращает:
+    Dict[int, dict]: ID персонажа -> содержимое снимка (только существующие персонажи).
+    """
+    ids = set(character_ids)
+    if not ids:
+        return {}
+    characters = {
+        row.id: row._asdict()
+        for row in db.query(
+            Character.id, Character.name, Character.description, Character.campaign_id, Character.user_id
+        ).filter(Character.id.in_(ids))
+    }
+    attribute_values = {character_id: {} for character_id in characters}
+    for character_id, attribute_id, value in db.query(
+        CharacterAttribute.character_id, CharacterAttribute.attribute_id, CharacterAttribute.value
+    ).filter(CharacterAttribute.character_id.in_(characters)):
+        attribute_values[character_id][attribute_id] = value
+    skill_bonuses = {character_id: {} for character_id in characters}
+    for character_id, skill_id, bonus in db.query(
+        CharacterSkill.character_id, CharacterSkill.skill_id, CharacterSkill.bonus
+    ).filter(CharacterSkill.character_id.in_(characters)):
+        skill_bonuses[character_id][skill_id] = bonus
+    return {
+        character_id: build_sheet_data(character, attribute_values[character_id], skill_bonuses[character_id])
+        for character_id, character in characters.items()
+    }
+
+def rebuild_character_sheets(db: Session, character_ids: Iterable[int]) -> List[CharacterSheet]:
+    """
+    Перестраивает снимки персонажей постоянным числом запросов.
+    Транзакция не фиксируется — это делает вызывающий код.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    character_ids (Iterable[int]): ID персонажей.
+
+    Возвращает:
+    List[CharacterSheet]: снимки существующих персонажей.
+    """
+    ids = set(character_ids)
+    if not ids:
+        return []
+    # Сессии создаются с autoflush=False: изменения имени и описания должны попасть в запрос
+    db.flush()
+
+    sheet_data = load_sheet_data(db, ids)
+    existing = {
+        sheet.character_id: sheet
+        for sheet in db.query(CharacterSheet).filter(CharacterSheet.character_id.in_(sheet_data))
+    }
+    sheets = []
+    for character_id, data in sheet_data.items():
+        sheet = existing.get(character_id)
+        if sheet is None:
+            sheet = CharacterSheet(character_id=character_id, version=1)
+            db.add(sheet)
+        else:
+            sheet.version += 1
+        sheet.data = data
+        sheets.append(sheet)
+    return sheets
+
+def get_character_sheet(db: Session, character_id: int) -> Optional[dict]:
+    """
+    Возвращает содержимое снимка листа персонажа, ничего не записывая.
+
+    Если снимка нет (схема создана create_all, без миграции 0005), содержимое
+    собирается из таблиц персонажа; сохранит его первая запись персонажа.
+
+    Аргументы:
+    db (Session): объект сессии для взаимодействия с базой данных.
+    character_id (int): ID персонажа.
+
+    Возвращает:
+    dict: содержимое снимка или None, если персонажа нет.
+    """
+    sheet = db.get(CharacterSheet, character_id)
+    if sheet is not None:
+        return sheet.data
+    return load_sheet_data(db, [character_id]).get(character_id)
+
+def delete_character_sheet(db: Session, character_id: int) -> None:
+    """
+    Удаляет снимок персонажа (перед удалением самого персонажа).
+    Транзакция не фиксируется — это делает вызывающий код.
+    """
+    db.query(CharacterSheet).filter(CharacterSheet.character_id == character_id).delete()
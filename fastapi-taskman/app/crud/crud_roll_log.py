@@ -0,0 +1,78 @@
+# app/crud/crud_roll_log.py
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.campaign_rng import campaign_rng
+from app.dice import compile_dice
+from app.models.models import Campaign, RollLog
+from app.schemas.roll_log import RollVerifyMismatch, RollVerifyResult
+
+# Модуль для чтения журнала бросков.
+# Журнал только пополняется (см. app/roll_log.py), поэтому здесь нет функций изменения.
+
+def _page(query, before_id: Optional[int], limit: int) -> List[RollLog]:
+    """
+    Keyset-страница от новых записей к старым: WHERE id < before_id ORDER BY id DESC LIMIT n.
+    Стоимость не зависит от глубины листания, в отличие от OFFSET.
+    """
+    if before_id is not None:
+        query = query.filter(RollLog.id < before_id)
+    return query.order_by(RollLog.id.desc()).limit(limit).all()
+
+def get_rolls_by_character(db: Session, character_id: int, before_id: Optional[int] = None,
+                           limit: int = 50) -> List[RollLog]:
+    """
+    Возвращает страницу истории бросков персонажа.
+
+    :param db: Сессия базы данных
+    :param character_id: ID персонажа
+    :param before_id: Вернуть записи старше этой (id из предыдущей страницы)
+    :param limit: Размер страницы
+    :return: Записи журнала, новые первыми
+    """
+    return _page(db.query(RollLog).filter(RollLog.character_id == character_id), before_id, limit)
+
+def get_rolls_by_campaign(db: Session, campaign_id: int, before_id: Optional[int] = None,
+                          limit: int = 50) -> List[RollLog]:
+    """
+    Возвращает страницу истории бросков всех персонажей кампании.
+
+    :param db: Сессия базы данных
+    :param campaign_id: ID кампании
+    :param before_id: Вернуть записи старше этой (id из предыдущей страницы)
+    :param limit: Размер страницы
+    :return: Записи журнала, новые первыми
+    """
+    return _page(db.query(RollLog).filter(RollLog.campaign_id == campaign_id), before_id, limit)
+
+def verify_campaign_rolls(db: Session, campaign_id: int, before_id: Optional[int] = None,
+                          limit: int = 500) -> Optional[RollVerifyResult]:
+    """
+    Повторяет броски страницы журнала кампании генератором кампании и сверяет
+    их с записанными значениями.
+
+    :param db: Сессия базы данных
+    :param campaign_id: ID кампании
+    :param before_id: Проверить записи старше этой (курсор предыдущей страницы)
+    :param limit: Размер страницы
+    :return: Итог проверки или None, если кампании нет
+    """
+    if db.get(Campaign, campaign_id) is None:
+        return None
+    campaign_rng.load_keys(db, [campaign_id])
+
+    items = get_rolls_by_campaign(db, campaign_id, before_id, limit)
+    checked = 0
+    mismatches = []
+    for item in items:
+        if item.rng_nonce is None:
+            continue
+        checked += 1
+        replayed = campaign_rng.replay(campaign_id, compile_dice(item.dice), item.rng_nonce, item.rng_sequence).total
+        if replayed != item.roll:
+            mismatches.append(RollVerifyMismatch(id=item.id, dice=item.dice, logged=item.roll, replayed=replayed))
+    return RollVerifyResult(
+        checked=checked,
+        skipped=len(items) - checked,
+        mismatches=mismatches,
+        next_before_id=items[-1].id if len(items) == limit else None,
+    )
@@ -0,0 +1,47 @@
+# app/crud/crud_user_async.py
+
+"""
+Асинхронные версии функций модуля crud_user.
+Работают через AsyncSession и не блокируют цикл событий.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import User
+from app.schemas.user import UserCreate
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """
+    Получает пользователя из базы данных по email.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    email (str): email пользователя.
+
+    Возвращает:
+    User: пользователь с указанным email, если он существует, иначе None.
+    """
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str):
+    """
+    Создаёт нового пользователя в базе данных.
+
+    Аргументы:
+    db (AsyncSession): асинхронная сессия базы данных.
+    user (UserCreate): данные для создания нового пользователя.
+    hashed_password (str): зашифрованный пароль.
+
+    Возвращает:
+    User: созданный пользователь.
+    """
+    db_user = User(
+        nickname=user.nickname,
+        email=user.email,
+        password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
@@ -1,12 +1,16 @@
 """Модуль для зависимостей, связанных с пользователем и авторизацией."""
 
-from fastapi import Depends, HTTPException
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Request
+from starlette.requests import HTTPConnection
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from app.models.models import User
 from app.models.database import get_db
+from app.auth.identity_cache import identity_cache
 
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
@@ -17,16 +21,57 @@ def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db:
     Получает текущего пользователя на основе токена.
     
     Пытается извлечь токен из cookies или из заголовков запроса. Декодирует его и проверяет.
-    Если токен валиден, возвращает пользователя из базы данных.
+    Если токен валиден, возвращает пользователя из базы данных (user_from_token).
     """
     if not token:
         # Проверяем токен в cookies
         token = request.cookies.get("access_token")
         print(f"Token from cookies: {token}")
 
+    return user_from_token(token, db)
+
+def connection_token(connection: HTTPConnection, token: Optional[str] = Query(None)) -> Optional[str]:
+    """
+    Токен долгого подключения: параметр token, затем заголовок Authorization или cookies.
+
+    Браузер не передаёт заголовок Authorization ни при открытии WebSocket, ни в EventSource.
+    """
+    if not token:
+        scheme, _, credentials = connection.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else connection.cookies.get("access_token")
+    return token
+
+def get_stream_user(token: Optional[str] = Depends(connection_token), db: Session = Depends(get_db)) -> User:
+    """
+    Получает пользователя потока Server-Sent Events.
+    """
+    return user_from_token(token, db)
+
+def get_websocket_user(token: Optional[str] = Depends(connection_token), db: Session = Depends(get_db)) -> User:
+    """
+    Получает пользователя WebSocket-подключения до его принятия.
+
+    При ошибке авторизации подключение отклоняется с кодом 1008.
+    """
+    try:
+        return user_from_token(token, db)
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail) from exc
+
+def user_from_token(token: Optional[str], db: Session) -> User:
+    """
+    Возвращает пользователя по токену доступа или HTTPException 401.
+
+    Для уже проверенных токенов пользователь берётся из identity_cache без декодирования и запросов.
+    """
     if not token:
         raise HTTPException(status_code=401, detail="Токен не предоставлен")
-    
+
+    cached_user = identity_cache.get(token)
+    if cached_user is not None:
+        # Присоединяем копию к текущей сессии без SELECT, чтобы работали ленивые связи
+        return db.merge(cached_user, load=False)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
@@ -38,5 +83,7 @@ def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db:
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="Пользователь не найден")
+
+    identity_cache.put(token, user, payload.get("exp"))
     return user
 
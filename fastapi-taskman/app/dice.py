@@ -0,0 +1,295 @@
+# app/dice.py
+"""
+Модуль записи бросков кубиков (dice notation).
+
+Поддерживаемая запись — сумма слагаемых со знаками + и -:
+    NdM       N кубиков с M гранями (N по умолчанию 1, d% — это d100);
+    NdM!      «взрывающиеся» кубики: максимум на кубике добавляет ещё один бросок;
+    NdMkhK    оставить K наибольших кубиков (khK), kK — то же самое;
+    NdMklK    оставить K наименьших кубиков;
+    C         целое число (модификатор).
+Например: "1d4", "4d6kh3", "2d10!+1d6-2".
+
+Выражение разбирается один раз и кэшируется в виде DiceExpression — готового
+вычислителя с заранее подготовленными слагаемыми. Многократные броски одного
+выражения выполняются пакетно (roll_many).
+
+Значение характеристики повышает кубик по лестнице DIE_CHAIN: базовый кубик
+характеристики (Attribute.dice_type, обычно "1d4") при значении 3 становится
+"1d8". Значения 1–5 дают те же кубики, что и прежняя таблица в roll_attribute
+(d4–d12). Значения за пределами лестницы теперь упираются в её край: 6 и
+выше — d12, 0 и меньше — базовый кубик (прежняя таблица для значений вне
+1–5 возвращала d4, то есть высокая характеристика бросала меньший кубик).
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+import random
+import re
+
+# Лестница кубиков, по которой их повышает значение характеристики
+DIE_CHAIN = (4, 6, 8, 10, 12)
+
+# Ограничения, защищающие сервер от чрезмерно тяжёлых выражений
+MAX_EXPRESSION_LENGTH = 100
+MAX_TERMS = 20
+MAX_DICE = 100
+MAX_SIDES = 1000
+# Максимум дополнительных бросков одного «взрывающегося» кубика
+MAX_EXPLOSIONS = 100
+
+_TERM = re.compile(
+    r"(?P<sign>[+-])?"
+    r"(?:(?P<count>\d*)d(?P<sides>\d+|%)(?P<explode>!)?(?:(?P<keep>kh|kl|k)(?P<keep_count>\d+))?"
+    r"|(?P<constant>\d+))"
+)
+
+
+class DiceSyntaxError(ValueError):
+    """Ошибка разбора записи броска."""
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    """
+    Слагаемое с кубиками.
+
+    Атрибуты:
+        count (int): Число кубиков.
+        sides (int): Число граней.
+        sign (int): 1 или -1.
+        explode (bool): Бросать ли ещё раз при максимуме на кубике.
+        keep (int): Сколько кубиков оставить (равно count, если отбор не задан).
+        keep_highest (bool): Оставлять наибольшие (True) или наименьшие (False).
+    """
+    count: int
+    sides: int
+    sign: int = 1
+    explode: bool = False
+    keep: int = 0
+    keep_highest: bool = True
+
+    @property
+    def plain(self) -> bool:
+        """Обычное слагаемое: без взрывов и отбора кубиков."""
+        return not self.explode and self.keep == self.count
+
+    @property
+    def notation(self) -> str:
+        text = f"{self.count}d{self.sides}"
+        if self.explode:
+            text += "!"
+        if self.keep != self.count:
+            text += f"{'kh' if self.keep_highest else 'kl'}{self.keep}"
+        return text
+
+    def roll(self, rng) -> List[int]:
+        """Бросает кубики слагаемого и возвращает оставленные значения."""
+        rnd = rng.random
+        sides = self.sides
+        dice = [int(rnd() * sides) + 1 for _ in range(self.count)]
+        if self.explode:
+            for index, value in enumerate(dice):
+                extra = value
+                explosions = 0
+                while extra == sides and explosions < MAX_EXPLOSIONS:
+                    extra = int(rnd() * sides) + 1
+                    value += extra
+                    explosions += 1
+                dice[index] = value
+        if self.keep != self.count:
+            dice = sorted(dice, reverse=self.keep_highest)[:self.keep]
+        return dice
+
+
+class DiceRoll(NamedTuple):
+    """
+    Результат одного броска выражения.
+
+    Атрибуты:
+        dice (Tuple[int, ...]): Оставленные значения кубиков по слагаемым (со знаком слагаемого).
+        total (int): Итог с учётом модификатора.
+    """
+    dice: Tuple[int, ...]
+    total: int
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    """
+    Разобранное выражение броска — готовый вычислитель.
+
+    Атрибуты:
+        terms (Tuple[DiceTerm, ...]): Слагаемые с кубиками.
+        modifier (int): Сумма числовых слагаемых.
+    """
+    terms: Tuple[DiceTerm, ...]
+    modifier: int = 0
+
+    @property
+    def notation(self) -> str:
+        """Каноническая запись, например 4d6kh3+2."""
+        parts = []
+        for term in self.terms:
+            parts.append(("-" if term.sign < 0 else "+") + term.notation)
+        if self.modifier:
+            parts.append(f"{self.modifier:+d}")
+        text = "".join(parts) or "0"
+        return text[1:] if text.startswith("+") else text
+
+    @property
+    def plain(self) -> bool:
+        """Выражение только из обычных положительных слагаемых — для него есть точные таблицы."""
+        return all(term.plain and term.sign > 0 for term in self.terms)
+
+    @property
+    def dice(self) -> Tuple[int, ...]:
+        """Размеры всех кубиков выражения (для точных распределений)."""
+        return tuple(term.sides for term in self.terms for _ in range(term.count))
+
+    def roll(self, rng=random) -> DiceRoll:
+        """
+        Бросает выражение один раз.
+
+        :param rng: Генератор случайных чисел (модуль random или random.Random)
+        :return: Значения кубиков и итог
+        """
+        if len(self.terms) == 1 and self.terms[0].sign > 0:
+            values = self.terms[0].roll(rng)
+            return DiceRoll(tuple(values), sum(values) + self.modifier)
+        dice = []
+        total = self.modifier
+        for term in self.terms:
+            values = term.roll(rng)
+            dice.extend(term.sign * value for value in values)
+            total += term.sign * sum(values)
+        return DiceRoll(tuple(dice), total)
+
+    def roll_many(self, times: int, rng=random) -> List[DiceRoll]:
+        """
+        Бросает выражение times раз.
+
+        Кубики обычных слагаемых бросаются одним списком на все броски сразу,
+        остальные — кубик за кубиком.
+
+        :param times: Число бросков
+        :param rng: Генератор случайных чисел (модуль random или random.Random)
+        :return: Результаты бросков
+        """
+        rnd = rng.random
+        columns = []
+        for term in self.terms:
+            if term.plain:
+                sides = term.sides
+                flat = [int(rnd() * sides) + 1 for _ in range(times * term.count)]
+                count = term.count
+                if count == 1:
+                    columns.append([(value,) for value in flat])
+                else:
+                    columns.append([flat[i * count:(i + 1) * count] for i in range(times)])
+            else:
+                columns.append([term.roll(rng) for _ in range(times)])
+
+        if len(self.terms) == 1 and self.terms[0].sign > 0:
+            modifier = self.modifier
+            return [DiceRoll(tuple(values), sum(values) + modifier) for values in columns[0]]
+
+        results = []
+        for index in range(times):
+            dice = []
+            total = self.modifier
+            for term, column in zip(self.terms, columns):
+                values = column[index]
+                dice.extend(term.sign * value for value in values)
+                total += term.sign * sum(values)
+            results.append(DiceRoll(tuple(dice), total))
+        return results
+
+    def stepped(self, steps: int) -> "DiceExpression":
+        """
+        Повышает (или понижает) кубики по лестнице DIE_CHAIN на steps ступеней;
+        за краями лестницы кубик остаётся крайним (d4 или d12).
+        Кубики вне лестницы (например, d20) не меняются.
+
+        :param steps: Число ступеней
+        :return: Новое выражение
+        """
+        if not steps:
+            return self
+        terms = []
+        for term in self.terms:
+            sides = term.sides
+            if sides in DIE_CHAIN:
+                index = min(max(DIE_CHAIN.index(sides) + steps, 0), len(DIE_CHAIN) - 1)
+                sides = DIE_CHAIN[index]
+            terms.append(DiceTerm(term.count, sides, term.sign, term.explode, term.keep, term.keep_highest))
+        return DiceExpression(terms=tuple(terms), modifier=self.modifier)
+
+
+def _parse(expression: str) -> DiceExpression:
+    # Пробелы допустимы только вокруг знаков: "1d4 2" — ошибка, а не 1d42
+    if re.search(r"[\w%!]\s+[\w%]", expression):
+        raise DiceSyntaxError(f"Некорректная запись броска: {expression!r}")
+    text = "".join(expression.lower().split())
+    if not text:
+        raise DiceSyntaxError("Пустая запись броска")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise DiceSyntaxError("Слишком длинная запись броска")
+
+    terms: List[DiceTerm] = []
+    modifier = 0
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if match is None or match.end() == position or (position and not match.group("sign")):
+            raise DiceSyntaxError(f"Некорректная запись броска: {expression!r}")
+        position = match.end()
+        sign = -1 if match.group("sign") == "-" else 1
+
+        if match.group("constant") is not None:
+            modifier += sign * int(match.group("constant"))
+            continue
+
+        count = int(match.group("count") or 1)
+        sides = 100 if match.group("sides") == "%" else int(match.group("sides"))
+        explode = match.group("explode") is not None
+        keep = int(match.group("keep_count")) if match.group("keep") else count
+        if not 1 <= count <= MAX_DICE or not 1 <= sides <= MAX_SIDES:
+            raise DiceSyntaxError(f"Недопустимое число кубиков или граней: {match.group(0)!r}")
+        if explode and sides == 1:
+            raise DiceSyntaxError("Кубик d1 не может взрываться")
+        if not 1 <= keep <= count:
+            raise DiceSyntaxError(f"Нельзя оставить {keep} из {count} кубиков")
+        terms.append(DiceTerm(count, sides, sign, explode, keep, match.group("keep") != "kl"))
+
+    if len(terms) > MAX_TERMS or sum(term.count for term in terms) > MAX_DICE:
+        raise DiceSyntaxError("Слишком много кубиков в записи броска")
+    return DiceExpression(terms=tuple(terms), modifier=modifier)
+
+
+@lru_cache(maxsize=1024)
+def compile_dice(expression: str) -> DiceExpression:
+    """
+    Разбирает запись броска; результат кэшируется по строке записи.
+
+    :param expression: Запись броска, например "4d6kh3+2"
+    :return: Готовый вычислитель
+    :raises DiceSyntaxError: Если запись некорректна
+    """
+    return _parse(expression)
+
+
+@lru_cache(maxsize=256)
+def attribute_dice(dice_type: str, attribute_value: int) -> DiceExpression:
+    """
+    Кубик характеристики с учётом её значения: значение 1 — базовый dice_type,
+    каждая следующая единица повышает кубик на ступень DIE_CHAIN, но не выше
+    последней ступени (d12); значения меньше 1 дают базовый кубик.
+
+    :param dice_type: Базовый кубик характеристики (Attribute.dice_type)
+    :param attribute_value: Значение характеристики у персонажа
+    :return: Готовый вычислитель
+    """
+    return compile_dice(dice_type or "1d4").stepped(max(attribute_value, 1) - 1)
+
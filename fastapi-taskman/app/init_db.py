@@ -1,15 +1,14 @@
-"""Модуль для инициализации базы данных и создания таблиц."""
+"""Модуль для инициализации базы данных: применяет миграции Alembic."""
 
-from app.models.database import Base, engine
-from app.models import models  # Импорт всех моделей для корректного создания таблиц
+from app.models.database import init_db
 
 def init() -> None:
     """
-    Инициализирует базу данных, создавая все необходимые таблицы.
+    Инициализирует базу данных: создаёт или обновляет схему миграциями Alembic.
     """
-    print("Создание таблиц...")
-    Base.metadata.create_all(bind=engine)
-    print("Таблицы созданы.")
+    print("Применение миграций...")
+    init_db()
+    print("Схема базы данных обновлена.")
 
 if __name__ == "__main__":
     init()
@@ -0,0 +1,339 @@
+# app/live.py
+"""
+Модуль «живого стола» кампании.
+
+Внутрипроцессный хаб публикаций: каждое подключение к кампании (WebSocket
+или поток Server-Sent Events) получает собственную ограниченную очередь
+(live_queue_size сообщений).
+Публикация никогда не ждёт: событие один раз сериализуется в JSON и кладётся
+в очереди без блокировки. Если очередь подключения заполнена, значит клиент
+не успевает читать — такое подключение отключается (WebSocket — с кодом 1013,
+SSE — концом потока), а остальные продолжают получать события.
+
+Публиковать можно из любого потока: синхронные обработчики FastAPI работают
+в пуле потоков, поэтому событие передаётся в цикл событий через
+call_soon_threadsafe.
+
+Каждое событие получает идентификатор «<запуск>-<номер>» и попадает в
+кольцевой буфер кампании (live_buffer_size событий). Переподключившийся
+SSE-клиент присылает Last-Event-ID и получает пропущенные события из буфера,
+без обращения к базе. Если пропущено больше, чем помещается в буфер, или
+процесс перезапускался, клиенту отправляется событие reset — ему нужно
+перечитать страницу. Буфер кампании без подключений удаляется через
+live_buffer_idle_seconds: этого хватает на переподключение SSE-клиента.
+
+Броски публикуются сразу, изменения персонажей — только после фиксации
+транзакции (after_commit), как и инвалидация кэша справочника.
+"""
+
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import json
+import secrets
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.util import identity_key
+
+from app.config import settings
+from app.models.models import Character
+
+# Ключ в session.info со словарём изменённых персонажей: id -> (campaign_id, имя, действие)
+_CHARACTERS_CHANGED_KEY = "live_changed_characters"
+
+# Код закрытия WebSocket для отключённого медленного клиента: «Try Again Later»
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Маркер в очереди: подключение отключено за медленное чтение
+_DROPPED = object()
+
+
+class LiveEvent(NamedTuple):
+    """
+    Опубликованное событие.
+
+    Атрибуты:
+        id (str): Идентификатор «<запуск>-<номер>», номер растёт в пределах кампании.
+        type (str): Тип события (roll, character).
+        data (str): Событие, уже сериализованное в JSON.
+    """
+    id: str
+    type: str
+    data: str
+
+
+class Subscription:
+    """
+    Подписка одного подключения на события кампании.
+
+    Атрибуты:
+        campaign_id (int): ID кампании.
+        queue (asyncio.Queue): Ограниченная очередь событий LiveEvent.
+    """
+
+    def __init__(self, campaign_id: int, queue_size: int):
+        self.campaign_id = campaign_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class CampaignHub:
+    """
+    Хаб публикаций событий по кампаниям.
+
+    Подписки, номера событий и кольцевые буферы меняются только в цикле
+    событий, поэтому блокировок не требуют. Буфер заводится для кампании при
+    первой подписке: события кампаний, которые никто не слушал, не хранятся.
+    Когда отключается последний клиент, буфер удаляется через buffer_idle
+    секунд, если за это время никто не подключился. Номер последнего события
+    кампании остаётся: по нему клиент со старым Last-Event-ID получит reset.
+    """
+
+    def __init__(self, queue_size: int, buffer_size: int, buffer_idle: float = 0.0):
+        self._queue_size = queue_size
+        self._buffer_size = buffer_size
+        self._buffer_idle = buffer_idle
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._buffers: Dict[int, Deque[Tuple[int, LiveEvent]]] = {}
+        self._expiry: Dict[int, asyncio.TimerHandle] = {}
+        self._sequences: Dict[int, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Идентификаторы прошлых запусков процесса не совпадут с текущими
+        self.boot = secrets.token_hex(4)
+        self.dropped = 0
+
+    def subscribers(self, campaign_id: int) -> int:
+        """Число подключений к кампании."""
+        return len(self._subscribers.get(campaign_id, ()))
+
+    def buffered(self, campaign_id: int) -> bool:
+        """Хранится ли буфер событий кампании."""
+        return campaign_id in self._buffers
+
+    def subscribe(self, campaign_id: int) -> Subscription:
+        """Создаёт подписку; вызывается из цикла событий."""
+        self._loop = asyncio.get_running_loop()
+        expiry = self._expiry.pop(campaign_id, None)
+        if expiry is not None:
+            expiry.cancel()
+        self._buffers.setdefault(campaign_id, deque(maxlen=self._buffer_size))
+        subscription = Subscription(campaign_id, self._queue_size)
+        self._subscribers.setdefault(campaign_id, set()).add(subscription)
+        return subscription
+
+    def missed_since(self, campaign_id: int, last_event_id: Optional[str]) -> Optional[List[LiveEvent]]:
+        """
+        События кампании после last_event_id из кольцевого буфера.
+
+        :param campaign_id: ID кампании
+        :param last_event_id: Последнее полученное клиентом событие
+        :return: Пропущенные события (возможно, пустой список) или None,
+                 если продолжить без пропусков нельзя и клиенту нужен reset
+        """
+        if not last_event_id:
+            return []
+        boot, _, number = last_event_id.partition("-")
+        if boot != self.boot or not number.isdigit():
+            return None
+        number = int(number)
+        current = self._sequences.get(campaign_id, 0)
+        buffer = self._buffers.get(campaign_id, ())
+        oldest = buffer[0][0] if buffer else current + 1
+        # Событие из будущего или часть пропущенных уже вытеснена из буфера
+        if number > current or number + 1 < oldest:
+            return None
+        return [live_event for sequence, live_event in buffer if sequence > number]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Удаляет подписку (повторный вызов безопасен); вызывается из цикла событий."""
+        campaign_id = subscription.campaign_id
+        subscribers = self._subscribers.get(campaign_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[campaign_id]
+                if self._buffer_idle > 0:
+                    self._expiry[campaign_id] = self._loop.call_later(
+                        self._buffer_idle, self._expire, campaign_id,
+                    )
+                else:
+                    self._expire(campaign_id)
+
+    def _expire(self, campaign_id: int) -> None:
+        """Удаляет буфер кампании, к которой так никто и не подключился."""
+        self._expiry.pop(campaign_id, None)
+        if campaign_id not in self._subscribers:
+            self._buffers.pop(campaign_id, None)
+
+    def publish(self, campaign_id: Optional[int], message: dict) -> None:
+        """
+        Публикует событие всем подключениям кампании. Не блокируется.
+
+        :param campaign_id: ID кампании
+        :param message: Событие (сериализуется в JSON один раз)
+        """
+        loop = self._loop
+        if campaign_id is None or loop is None or campaign_id not in self._buffers:
+            return
+        text = json.dumps(message, ensure_ascii=False, default=str)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(campaign_id, message["type"], text)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, campaign_id, message["type"], text)
+
+    def _deliver(self, campaign_id: int, event_type: str, text: str) -> None:
+        sequence = self._sequences.get(campaign_id, 0) + 1
+        self._sequences[campaign_id] = sequence
+        live_event = LiveEvent(f"{self.boot}-{sequence}", event_type, text)
+        self._buffers[campaign_id].append((sequence, live_event))
+        for subscription in list(self._subscribers.get(campaign_id, ())):
+            try:
+                subscription.queue.put_nowait(live_event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        """Отключает медленного клиента: очередь очищается и заменяется маркером."""
+        self.unsubscribe(subscription)
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(_DROPPED)
+
+    async def serve(self, websocket: WebSocket, campaign_id: int) -> None:
+        """
+        Обслуживает принятое WebSocket-подключение до его закрытия.
+
+        Входящие сообщения клиента не используются, но читаются, чтобы
+        вовремя заметить отключение.
+
+        :param websocket: Принятое подключение
+        :param campaign_id: ID кампании
+        """
+        subscription = self.subscribe(campaign_id)
+
+        async def send() -> None:
+            while True:
+                live_event = await subscription.queue.get()
+                if live_event is _DROPPED:
+                    await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Слишком медленное соединение")
+                    return
+                await websocket.send_text(live_event.data)
+
+        async def receive() -> None:
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+
+        tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.unsubscribe(subscription)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+    async def stream(self, campaign_id: int, last_event_id: Optional[str] = None,
+                     keepalive: float = 15.0) -> AsyncIterator[str]:
+        """
+        Поток Server-Sent Events кампании.
+
+        Сначала отдаёт пропущенные после last_event_id события из буфера, затем
+        новые. Медленный клиент получает конец потока и, переподключившись с
+        Last-Event-ID, дочитывает пропущенное из буфера.
+
+        :param campaign_id: ID кампании
+        :param last_event_id: Значение заголовка Last-Event-ID
+        :param keepalive: Интервал SSE-комментариев при отсутствии событий
+        :return: Асинхронный итератор кадров text/event-stream
+        """
+        subscription = self.subscribe(campaign_id)
+        try:
+            # Подписка и снимок буфера делаются без переключения задач — событие не потеряется
+            missed = self.missed_since(campaign_id, last_event_id)
+            yield "retry: 3000\n\n"
+            if missed is None:
+                missed = []
+                yield sse_frame(LiveEvent(f"{self.boot}-{self._sequences.get(campaign_id, 0)}", "reset", "{}"))
+            for live_event in missed:
+                yield sse_frame(live_event)
+            while True:
+                try:
+                    live_event = await asyncio.wait_for(subscription.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if live_event is _DROPPED:
+                    return
+                yield sse_frame(live_event)
+        finally:
+            self.unsubscribe(subscription)
+
+
+def sse_frame(live_event: LiveEvent) -> str:
+    """Кадр text/event-stream для события (data — однострочный JSON)."""
+    return f"id: {live_event.id}\nevent: {live_event.type}\ndata: {live_event.data}\n\n"
+
+
+campaign_hub = CampaignHub(settings.live_queue_size, settings.live_buffer_size, settings.live_buffer_idle_seconds)
+
+
+def character_event(character_id: int, name: str, action: str) -> dict:
+    """Событие изменения персонажа: клиенты сами перечитывают нужные данные."""
+    return {"type": "character", "action": action, "character_id": character_id, "name": name}
+
+
+def mark_character_changed(session: Session, character_id: int, action: str = "updated") -> None:
+    """
+    Помечает персонажа изменённым в текущей транзакции; событие уйдёт после commit.
+
+    Нужна для записей в обход ORM (массовые INSERT ... ON CONFLICT), которые
+    не вызывают событий маппера. Кампания берётся из уже загруженного в сессию
+    персонажа, без запроса к базе.
+
+    :param session: Сессия (для AsyncSession — её sync_session)
+    :param character_id: ID персонажа
+    :param action: created, updated или deleted
+    """
+    character = session.identity_map.get(identity_key(Character, character_id))
+    if character is not None:
+        changed = session.info.setdefault(_CHARACTERS_CHANGED_KEY, {})
+        changed.setdefault(character_id, (character.campaign_id, character.name, action))
+
+
+def _mark_from_mapper(action: str):
+    def listener(mapper, connection, target):  # pylint: disable=unused-argument
+        session = object_session(target)
+        if session is not None:
+            changed = session.info.setdefault(_CHARACTERS_CHANGED_KEY, {})
+            # created/deleted важнее updated в той же транзакции
+            if action != "updated" or target.id not in changed:
+                changed[target.id] = (target.campaign_id, target.name, action)
+    return listener
+
+
+event.listen(Character, "after_insert", _mark_from_mapper("created"))
+event.listen(Character, "after_update", _mark_from_mapper("updated"))
+event.listen(Character, "after_delete", _mark_from_mapper("deleted"))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session):
+    """Публикует изменения персонажей, только когда транзакция зафиксирована."""
+    for character_id, (campaign_id, name, action) in session.info.pop(_CHARACTERS_CHANGED_KEY, {}).items():
+        campaign_hub.publish(campaign_id, character_event(character_id, name, action))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):  # pylint: disable=unused-argument
+    """Снимает пометки при откате: изменений не было."""
+    session.info.pop(_CHARACTERS_CHANGED_KEY, None)
@@ -7,8 +7,13 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 
-from app.routes import users, campaigns, characters, character_roles, auth
-from app.models.database import init_db
+from app.routes import users, campaigns, characters, character_roles, auth, probability
+from app.config import settings
+from app.models.database import SessionLocal, init_db, pool_metrics
+from app.auth.hash import password_hasher
+from app.simulation import encounter_simulator
+from app.roll_log import roll_log
+from app.skills import apply_catalog
 
 
 # Определяем lifespan функцию
@@ -17,8 +22,15 @@ async def lifespan(app: FastAPI):
     """
     Lifespan функция для инициализации базы данных при старте приложения.
     """
-    init_db()  # создаёт таблицы
+    init_db()  # создаёт или обновляет схему миграциями Alembic
+    if settings.seed_catalog_on_startup:
+        with SessionLocal() as db:
+            apply_catalog(db)  # справочник не менялся — один запрос по ключу
+    roll_log.start()  # фоновая групповая запись журнала бросков
     yield
+    roll_log.stop()  # дописываем остаток журнала бросков
+    password_hasher.shutdown()  # дожидаемся незавершённых операций хеширования
+    encounter_simulator.shutdown()  # останавливаем процессы моделирования
 
 
 # Инициализация приложения FastAPI
@@ -71,6 +83,13 @@ async def login(request: Request):
     """
     return templates.TemplateResponse("auth/login.html", {"request": request})
 
+@app.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """
+    Метрики пула соединений с базой данных: число выдач, возвратов и занятых соединений.
+    """
+    return pool_metrics.snapshot()
+
 
 # Подключение всех маршрутов
 app.include_router(users.router)
@@ -78,4 +97,5 @@ app.include_router(campaigns.router)
 app.include_router(characters.router)
 app.include_router(character_roles.router)
 app.include_router(auth.router)
+app.include_router(probability.router)
 
@@ -1,21 +1,211 @@
 """Модуль для работы с базой данных с использованием SQLAlchemy."""
 
-from sqlalchemy import create_engine
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import URL, create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.orm import declarative_base
 
-# Пока используем SQLite — локальный файл базы
-DATABASE_URL = "sqlite:////home/anna/fastapi-taskman/app/app.db"
+from app.config import Settings, settings
+
+# SQLite — локальный файл базы для разработки, если PostgreSQL не настроен
+SQLITE_DATABASE_URL = "sqlite:////home/anna/fastapi-taskman/app/app.db"
+
+# Каталог миграций Alembic (корень проекта/migrations)
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Ключ рекомендательной блокировки PostgreSQL на время миграций при запуске
+_MIGRATION_LOCK_KEY = 7310250
+
+
+def build_database_url(config: Settings, use_async: bool = False) -> str:
+    """
+    Строит URL базы данных по настройкам.
+
+    Если заданы db_host и db_name, используется PostgreSQL (psycopg2 или asyncpg),
+    иначе — файл SQLite для разработки (pysqlite или aiosqlite).
+
+    :param config: Настройки приложения
+    :param use_async: Нужен ли URL для асинхронного драйвера
+    :return: URL подключения
+    """
+    if config.db_host and config.db_name:
+        return URL.create(
+            "postgresql+asyncpg" if use_async else "postgresql+psycopg2",
+            username=config.db_username,
+            password=config.db_password,
+            host=config.db_host,
+            port=config.db_port,
+            database=config.db_name,
+        ).render_as_string(hide_password=False)
+    if use_async:
+        return SQLITE_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return SQLITE_DATABASE_URL
+
+
+def engine_options(config: Settings, url: str, use_async: bool = False) -> dict:
+    """
+    Возвращает параметры create_engine для выбранного бэкенда.
+
+    Для PostgreSQL настраивается пул соединений и, при необходимости, statement_timeout
+    на уровне сессии сервера; для SQLite — только флаг многопоточного доступа.
+
+    :param config: Настройки приложения
+    :param url: URL подключения
+    :param use_async: Создаётся ли асинхронный движок
+    :return: Именованные аргументы для create_engine/create_async_engine
+    """
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+        "pool_recycle": config.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+    if config.db_statement_timeout_ms:
+        timeout = str(config.db_statement_timeout_ms)
+        if use_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def sqlite_pragmas(config: Settings) -> list:
+    """
+    Возвращает команды PRAGMA профиля производительности SQLite.
+
+    WAL позволяет читателям работать параллельно с единственным писателем,
+    synchronous=NORMAL в режиме WAL сохраняет целостность базы, но не делает fsync
+    на каждый commit, а busy_timeout заставляет ждать блокировку вместо ошибки.
+
+    :param config: Настройки приложения
+    :return: Список команд PRAGMA
+    """
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(config.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(config.sqlite_cache_size)}",
+        f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}",
+    ]
+
+
+def enable_sqlite_performance_mode(target_engine: Engine, config: Settings) -> None:
+    """
+    Применяет PRAGMA профиля производительности к каждому новому соединению SQLite.
+
+    :param target_engine: Синхронный движок (для асинхронного — async_engine.sync_engine)
+    :param config: Настройки приложения
+    """
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(target_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class PoolMetrics:
+    """
+    Счётчики событий пула соединений, общие для синхронного и асинхронного движков.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.max_checked_out = 0
+        self._checked_out = 0
+
+    def _on_connect(self, *_):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_):
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self._checked_out)
+
+    def _on_checkin(self, *_):
+        with self._lock:
+            self.checkins += 1
+            self._checked_out -= 1
+
+    def _on_invalidate(self, *_):
+        with self._lock:
+            self.invalidations += 1
+
+    def attach(self, target_engine: Engine) -> None:
+        """Подписывается на события пула движка."""
+        event.listen(target_engine, "connect", self._on_connect)
+        event.listen(target_engine, "checkout", self._on_checkout)
+        event.listen(target_engine, "checkin", self._on_checkin)
+        event.listen(target_engine, "invalidate", self._on_invalidate)
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает текущие значения счётчиков и состояние пулов.
+
+        :return: Словарь метрик
+        """
+        pools = {}
+        for name, target_engine in (("sync", engine), ("async", async_engine.sync_engine)):
+            pool = target_engine.pool
+            pools[name] = {
+                "class": type(pool).__name__,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "status": pool.status(),
+            }
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "checked_out": self._checked_out,
+                "max_checked_out": self.max_checked_out,
+                "pools": pools,
+            }
+
+
+DATABASE_URL = build_database_url(settings)
+ASYNC_DATABASE_URL = build_database_url(settings, use_async=True)
 
 # Создаём движок SQLAlchemy
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Только для SQLite
-)
+engine = create_engine(DATABASE_URL, **engine_options(settings, DATABASE_URL))
 
 # Создаём фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок и фабрика сессий для async-маршрутов
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(settings, ASYNC_DATABASE_URL, use_async=True))
+# expire_on_commit=False: после commit атрибуты остаются доступны без ленивой загрузки,
+# которая в асинхронном режиме невозможна
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if settings.sqlite_performance_mode and DATABASE_URL.startswith("sqlite"):
+    enable_sqlite_performance_mode(engine, settings)
+    enable_sqlite_performance_mode(async_engine.sync_engine, settings)
+
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+pool_metrics.attach(async_engine.sync_engine)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
@@ -32,12 +222,55 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
+async def get_async_db():
+    """
+    Асинхронная версия get_db.
+
+    Выдаёт AsyncSession, запросы через которую не блокируют цикл событий.
+    Используется в маршрутах, объявленных через async def.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _alembic_config(connection):
     """
-    Инициализация базы данных.
+    Конфигурация Alembic для миграций из приложения: каталог migrations и готовое
+    соединение, без alembic.ini (его fileConfig перенастроил бы журналирование приложения).
+    """
+    from alembic.config import Config  # pylint: disable=import-outside-toplevel
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["connection"] = connection
+    return config
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    """
+    Инициализация базы данных: приводит схему к последней миграции Alembic.
+
+    Таблицы не создаются через create_all: она не добавляет новые колонки и
+    индексы к существующим таблицам, а созданные ею таблицы ломают следующие
+    миграции. База без таблицы alembic_version, но с таблицами, создана init_db
+    до появления миграций: если её схема уже совпадает с моделями, она отмечается
+    последней версией, иначе — исходной (0001) и обновляется.
 
-    Создаёт все таблицы в базе данных.
+    :param bind: Движок (по умолчанию движок приложения)
     """
+    # pylint: disable=import-outside-toplevel
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
     from . import models  # Импортируем модели, чтобы они зарегистрировались в Base
-    Base.metadata.create_all(bind=engine)
 
+    with (bind or engine).begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Процессы (workers) запускаются одновременно: миграции выполняет один
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+        config = _alembic_config(connection)
+        inspector = inspect(connection)
+        if not inspector.has_table("alembic_version") and inspector.get_table_names():
+            if compare_metadata(MigrationContext.configure(connection), Base.metadata):
+                command.stamp(config, "0001")
+            else:
+                command.stamp(config, "head")
+        command.upgrade(config, "head")
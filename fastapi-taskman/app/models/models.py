@@ -1,9 +1,17 @@
 # app/models/models.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Text
+import secrets
+
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, JSON, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
+
+def new_rng_seed() -> str:
+    """Случайное зерно генератора бросков новой кампании."""
+    return secrets.token_hex(16)
+
+
 # Модель User (Пользователь)
 class User(Base):
     """
@@ -33,8 +41,10 @@ class Campaign(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)  # Добавлено описание кампании
+    # Зерно генератора бросков (app/campaign_rng.py); не меняется после создания
+    rng_seed = Column(String, nullable=False, default=new_rng_seed)
 
-    gm_id = Column(Integer, ForeignKey('users.id'))
+    gm_id = Column(Integer, ForeignKey('users.id'), index=True)
     gm = relationship('User', back_populates='campaigns')
 
     characters = relationship('Character', back_populates='campaign')
@@ -47,6 +57,11 @@ class Character(Base):
     Персонажи могут быть привязаны к кампаниям и пользователям.
     """
     __tablename__ = 'characters'
+    __table_args__ = (
+        # Составные индексы: фильтр по кампании/владельцу + keyset-пагинация по id
+        Index('ix_characters_campaign_id_id', 'campaign_id', 'id'),
+        Index('ix_characters_user_id_id', 'user_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
@@ -63,6 +78,22 @@ class Character(Base):
     skills = relationship('CharacterSkill', back_populates='character')
 
 
+# Модель CharacterSheet (Снимок листа персонажа)
+class CharacterSheet(Base):
+    """
+    Денормализованный снимок листа персонажа для страницы детализации.
+    data хранит поля персонажа, значения его характеристик и бонусы навыков
+    по ID; справочник к нему присоединяется при выводе. Снимок перестраивается
+    при записи персонажа (app/crud/crud_character_sheet.py), а version
+    увеличивается при каждой перестройке.
+    """
+    __tablename__ = 'character_sheets'
+
+    character_id = Column(Integer, ForeignKey('characters.id'), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    data = Column(JSON, nullable=False)
+
+
 # Модель CharacterRole (Роль персонажа в кампании)
 class CharacterRole(Base):
     """
@@ -73,9 +104,9 @@ class CharacterRole(Base):
 
     id = Column(Integer, primary_key=True)
 
-    character_id = Column(Integer, ForeignKey('characters.id'))
+    character_id = Column(Integer, ForeignKey('characters.id'), index=True)
     user_id = Column(Integer, ForeignKey('users.id'))
-    campaign_id = Column(Integer, ForeignKey('campaigns.id'))
+    campaign_id = Column(Integer, ForeignKey('campaigns.id'), index=True)
 
     role = Column(String)  # Пусто для заполнения позже: "GM" или "Player"
 
@@ -94,7 +125,7 @@ class Attribute(Base):
     __tablename__ = 'attributes'
 
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)  # Название характеристики
+    name = Column(String, nullable=False, unique=True, index=True)  # Название характеристики
     dice_type = Column(String, nullable=False)  # Тип кубика для этой характеристики (например, 1d4, 1d6 и т.д.)
     value = Column(Integer, nullable=False, default=1)  # Добавляем значение по умолчанию
 
@@ -112,8 +143,8 @@ class Skill(Base):
     __tablename__ = 'skills'
 
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)  # Название навыка
-    attribute_id = Column(Integer, ForeignKey('attributes.id'), nullable=False)  # Ссылаемся на характеристику
+    name = Column(String, nullable=False, unique=True, index=True)  # Название навыка
+    attribute_id = Column(Integer, ForeignKey('attributes.id'), nullable=False, index=True)  # Ссылаемся на характеристику
     bonus = Column(Integer, default=0)  # Бонус навыка (по умолчанию 0)
 
     # Связь с характеристикой
@@ -128,6 +159,11 @@ class CharacterAttribute(Base):
     Каждая характеристика персонажа может иметь свое значение.
     """
     __tablename__ = 'character_attributes'
+    __table_args__ = (
+        # Одна запись на пару персонаж/характеристика — цель для INSERT ... ON CONFLICT;
+        # заодно служит индексом для выборки по character_id
+        UniqueConstraint('character_id', 'attribute_id', name='uq_character_attribute'),
+    )
 
     id = Column(Integer, primary_key=True)
     character_id = Column(Integer, ForeignKey('characters.id'))
@@ -145,6 +181,11 @@ class CharacterSkill(Base):
     Каждый навык персонажа может иметь бонус.
     """
     __tablename__ = 'character_skills'
+    __table_args__ = (
+        # Одна запись на пару персонаж/навык — цель для INSERT ... ON CONFLICT;
+        # заодно служит индексом для выборки по character_id
+        UniqueConstraint('character_id', 'skill_id', name='uq_character_skill'),
+    )
 
     id = Column(Integer, primary_key=True)
     character_id = Column(Integer, ForeignKey('characters.id'))
@@ -154,3 +195,70 @@ class CharacterSkill(Base):
     character = relationship('Character', back_populates='skills')
     skill = relationship('Skill', back_populates='character_skills')
 
+
+# Журнал бросков
+class RollLog(Base):
+    """
+    Модель записи журнала бросков.
+    Журнал только пополняется: записи не изменяются и не удаляются.
+    character_id и campaign_id намеренно не внешние ключи — история
+    остаётся проверяемой и после удаления персонажа или кампании.
+    """
+    __tablename__ = 'roll_log'
+    __table_args__ = (
+        # keyset-пагинация истории персонажа и кампании от новых записей к старым
+        Index('ix_roll_log_character_id_id', 'character_id', 'id'),
+        Index('ix_roll_log_campaign_id_id', 'campaign_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    character_id = Column(Integer, nullable=False)
+    campaign_id = Column(Integer, nullable=True)
+    attribute = Column(String, nullable=False)  # Название характеристики
+    skill = Column(String, nullable=True)  # Название навыка, если был
+    dice = Column(String, nullable=False)  # Запись броска, например 1d8
+    bonus = Column(Integer, nullable=False, default=0)  # Бонус навыка
+    roll = Column(Integer, nullable=False)  # Выпавшее значение кубиков
+    result = Column(Integer, nullable=False)  # Итог с бонусом
+    created_at = Column(DateTime, nullable=False)  # Время броска (UTC)
+    # Поток генератора кампании, из которого получен бросок: по ним бросок воспроизводится
+    rng_nonce = Column(String, nullable=True)
+    rng_sequence = Column(Integer, nullable=True)
+
+
+# Состояние начальных данных
+class SeedState(Base):
+    """
+    Контрольная сумма последних применённых начальных данных (например,
+    справочника из app/skills.py). Совпадение суммы при запуске означает,
+    что данные уже в базе и применять их заново не нужно.
+    """
+    __tablename__ = 'seed_state'
+
+    name = Column(String, primary_key=True)  # Набор данных, например "catalog"
+    checksum = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)  # Время применения (UTC)
+
+
+# Секреты установки
+class InstallSecret(Base):
+    """
+    Случайные значения, создаваемые один раз на установку (например, зерно
+    генератора бросков персонажей без кампании, app/campaign_rng.py).
+    """
+    __tablename__ = 'install_secrets'
+
+    name = Column(String, primary_key=True)  # Назначение, например "roll_seed"
+    value = Column(String, nullable=False)
+
+
+# Версии сущностей для кэша страниц
+class PageVersion(Base):
+    """
+    Счётчики версий сущностей (список кампаний, кампания, персонаж), общие для
+    всех процессов; по ним кэш страниц (app/page_cache.py) строит ключ и ETag.
+    """
+    __tablename__ = 'page_versions'
+
+    entity = Column(String, primary_key=True)  # Например "campaign:1"
+    version = Column(Integer, nullable=False)
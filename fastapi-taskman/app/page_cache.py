@@ -0,0 +1,266 @@
+# app/page_cache.py
+"""
+Модуль кэша отрисованных HTML-страниц.
+
+Страницы кампаний и персонажей хранятся в памяти процесса уже отрисованными,
+вместе с версиями сущностей, из которых они построены. У каждой сущности
+(список кампаний, кампания, персонаж) есть счётчик версии в таблице
+page_versions, общей для всех процессов (workers); запись увеличивает
+счётчики затронутых сущностей в той же транзакции, и страница с устаревшими
+версиями отрисовывается заново. Версии читаются одним запросом по ключу на
+каждый просмотр, поэтому процесс не отдаёт страницу, изменённую через другой
+процесс. Повторный просмотр неизменённой страницы не обращается к Jinja2 и
+не читает ничего, кроме версий.
+
+ETag страницы выводится из её адреса, версий сущностей и контрольной суммы
+справочника, поэтому одинаков во всех процессах: клиент, приславший
+совпадающий If-None-Match, получает 304, даже если страницу отрисовал другой
+процесс.
+
+Изменённые сущности отмечаются событиями маппера на записях Campaign,
+Character и CharacterSheet, а снимок листа перестраивается при любой записи
+персонажа (app/crud/crud_character_sheet.py), включая массовое обновление
+характеристик. Счётчики увеличиваются перед фиксацией (before_commit) и
+откатываются вместе с транзакцией.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, NamedTuple, Optional, Sequence
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.catalog import catalog_cache
+from app.config import settings
+from app.models.models import Campaign, Character, CharacterSheet, PageVersion
+
+# Ключ в session.info со множеством изменённых сущностей
+_PAGES_DIRTY_KEY = "page_cache_dirty"
+
+# Сущность «список кампаний»: меняется при любой записи кампании или персонажа
+CAMPAIGNS = "campaigns"
+
+# Диалектные конструкции INSERT с поддержкой ON CONFLICT
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def campaign_entity(campaign_id: int) -> str:
+    """Сущность страницы кампании."""
+    return f"campaign:{campaign_id}"
+
+
+def character_entity(character_id: int) -> str:
+    """Сущность страницы персонажа."""
+    return f"character:{character_id}"
+
+
+class CachedPage(NamedTuple):
+    """
+    Отрисованная страница.
+
+    Атрибуты:
+        versions (tuple): Версии сущностей и контрольная сумма справочника на момент отрисовки.
+        etag (str): Сильный ETag содержимого.
+        body (bytes): Тело ответа.
+    """
+    versions: tuple
+    etag: str
+    body: bytes
+
+
+class PageCache:
+    """
+    Потокобезопасный LRU-кэш страниц с версиями сущностей из базы.
+
+    Версии снимаются до чтения данных страницы: если запись зафиксируется во
+    время отрисовки, страница сохранится со старыми версиями и при следующем
+    просмотре будет отрисована заново.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._pages: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = Lock()
+
+    def versions(self, db: Session, entities: Sequence[str]) -> tuple:
+        """
+        Текущие версии сущностей (одним запросом) и контрольная сумма справочника.
+
+        :param db: Сессия базы данных
+        :param entities: Сущности страницы
+        :return: Версии для cached_response и store
+        """
+        stored = dict(db.execute(_versions_statement(entities)).all())
+        return _versions(entities, stored, catalog_cache.get(db).checksum)
+
+    async def versions_async(self, db: AsyncSession, entities: Sequence[str]) -> tuple:
+        """
+        Асинхронная версия versions.
+
+        :param db: Асинхронная сессия базы данных
+        :param entities: Сущности страницы
+        :return: Версии для cached_response и store
+        """
+        stored = dict((await db.execute(_versions_statement(entities))).all())
+        return _versions(entities, stored, (await catalog_cache.get_async(db)).checksum)
+
+    def cached_response(self, request: Request, versions: tuple) -> Optional[Response]:
+        """
+        Ответ из кэша для страницы запроса, если она не устарела.
+
+        Клиенту с актуальным ETag отвечает 304 и без сохранённой страницы:
+        ETag зависит только от адреса и версий.
+
+        :param request: Запрос (ключ кэша — полный URL: url_for в шаблонах зависит от хоста)
+        :param versions: Версии, снятые через versions()
+        :return: 304, 200 с сохранённым телом или None, если страницу нужно отрисовать
+        """
+        key = str(request.url)
+        etag = _etag(key, versions)
+        if _matches(request, etag):
+            return Response(status_code=304, headers=_headers(etag))
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None or page.versions != versions:
+                return None
+            self._pages.move_to_end(key)
+        return self._response(request, page)
+
+    def store(self, request: Request, versions: tuple, response: Response) -> Response:
+        """
+        Сохраняет отрисованную страницу и возвращает ответ с ETag.
+
+        :param request: Запрос
+        :param versions: Версии, снятые через versions() до чтения базы
+        :param response: Отрисованный ответ (TemplateResponse)
+        :return: Ответ с ETag или 304, если клиент уже имеет эту страницу
+        """
+        key = str(request.url)
+        page = CachedPage(versions, _etag(key, versions), bytes(response.body))
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self._max_size:
+                self._pages.popitem(last=False)
+        return self._response(request, page)
+
+    @staticmethod
+    def _response(request: Request, page: CachedPage) -> Response:
+        headers = _headers(page.etag)
+        if _matches(request, page.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=page.body, media_type="text/html; charset=utf-8", headers=headers)
+
+    def clear(self) -> None:
+        """Очищает кэш страниц."""
+        with self._lock:
+            self._pages.clear()
+
+
+page_cache = PageCache(settings.page_cache_size)
+
+
+def _versions_statement(entities: Sequence[str]):
+    return select(PageVersion.entity, PageVersion.version).where(PageVersion.entity.in_(entities))
+
+
+def _versions(entities: Sequence[str], stored: Dict[str, int], catalog_checksum: str) -> tuple:
+    # Сущность без строки ещё не менялась: версия 0
+    return tuple(stored.get(entity, 0) for entity in entities) + (catalog_checksum,)
+
+
+def _etag(key: str, versions: tuple) -> str:
+    return f'"{hashlib.sha1(repr((key, versions)).encode()).hexdigest()}"'
+
+
+def _headers(etag: str) -> Dict[str, str]:
+    # no-cache: браузер хранит страницу, но каждый раз сверяет её по ETag
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (
+        if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+    )
+
+
+def bump_versions(session: Session, entities) -> None:
+    """
+    Увеличивает версии сущностей в текущей транзакции сессии одной командой
+    INSERT ... ON CONFLICT DO UPDATE.
+
+    :param session: Сессия базы данных
+    :param entities: Изменённые сущности
+    """
+    dialect = session.get_bind().dialect.name
+    insert = _UPSERT_INSERTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Версии страниц не поддерживаются для диалекта {dialect}")
+    stmt = insert(PageVersion.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["entity"],
+        set_={"version": PageVersion.__table__.c.version + 1},
+    )
+    # Порядок строк одинаков во всех транзакциях: встречные записи не взаимоблокируются
+    session.execute(stmt, [{"entity": entity, "version": 1} for entity in sorted(entities)])
+
+
+def _mark(session: Optional[Session], entities) -> None:
+    if session is not None:
+        session.info.setdefault(_PAGES_DIRTY_KEY, set()).update(entities)
+
+
+def _campaign_changed(mapper, connection, target):  # pylint: disable=unused-argument
+    _mark(object_session(target), (CAMPAIGNS, campaign_entity(target.id)))
+
+
+def _character_changed(updated: bool):
+    def listener(mapper, connection, target):  # pylint: disable=unused-argument
+        history = inspect(target).attrs.campaign_id.history
+        # after_update вызывается и для персонажей без изменений колонок;
+        # страницы кампаний показывают только имя и состав
+        if updated and not (history.has_changes() or inspect(target).attrs.name.history.has_changes()):
+            return
+        entities = {CAMPAIGNS, character_entity(target.id)}
+        # Персонаж мог перейти в другую кампанию: устаревают страницы обеих
+        for campaign_id in (target.campaign_id, *history.deleted):
+            if campaign_id is not None:
+                entities.add(campaign_entity(campaign_id))
+        _mark(object_session(target), entities)
+    return listener
+
+
+def _sheet_changed(mapper, connection, target):  # pylint: disable=unused-argument
+    _mark(object_session(target), (character_entity(target.character_id),))
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Campaign, _event_name, _campaign_changed)
+    event.listen(Character, _event_name, _character_changed(_event_name == "after_update"))
+    event.listen(CharacterSheet, _event_name, _sheet_changed)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    """Версии изменённых сущностей увеличиваются в той же транзакции, что и сами записи."""
+    # Сессии создаются с autoflush=False, а commit сбрасывает изменения уже после
+    # этого события: события маппера последнего сброса должны успеть отметить сущности
+    session.flush()
+    entities = session.info.pop(_PAGES_DIRTY_KEY, None)
+    if entities:
+        bump_versions(session, entities)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):  # pylint: disable=unused-argument
+    """Снимает пометки при откате: изменений не было."""
+    session.info.pop(_PAGES_DIRTY_KEY, None)
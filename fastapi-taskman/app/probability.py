@@ -0,0 +1,201 @@
+# app/probability.py
+"""
+Модуль точных вероятностей бросков.
+
+Для каждого кубика системы (d4–d12, лестница DIE_CHAIN в app.dice) и для пулов
+из нескольких одинаковых кубиков при импорте заранее вычисляются точные
+распределения сумм (свёрткой) в целых числах: число исходов для каждой суммы
+и «хвосты» — число исходов не меньше данной суммы. Бонус навыка лишь сдвигает
+распределение, поэтому вопрос «какой шанс выбросить не меньше X» решается
+одним обращением к таблице, без моделирования.
+
+Кубик характеристики определяется так же, как при броске: app.dice.attribute_dice
+по базовому кубику (Attribute.dice_type) и значению характеристики.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from app.dice import DIE_CHAIN, DiceExpression
+
+# Максимальный размер пула одинаковых кубиков, для которого таблицы строятся заранее
+MAX_POOL_SIZE = 10
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    Точное распределение суммы кубиков (без бонуса).
+
+    Атрибуты:
+        dice (Tuple[int, ...]): Размеры кубиков пула.
+        min_total (int): Минимальная возможная сумма.
+        counts (Tuple[int, ...]): Число исходов для сумм min_total, min_total + 1, ...
+        at_least (Tuple[int, ...]): Число исходов с суммой не меньше соответствующей.
+        outcomes (int): Общее число равновероятных исходов.
+    """
+    dice: Tuple[int, ...]
+    min_total: int
+    counts: Tuple[int, ...]
+    at_least: Tuple[int, ...]
+    outcomes: int
+
+    @property
+    def max_total(self) -> int:
+        """Максимальная возможная сумма."""
+        return self.min_total + len(self.counts) - 1
+
+    @property
+    def notation(self) -> str:
+        """Запись пула, например 2d6+1d8."""
+        sizes = sorted(set(self.dice), reverse=True)
+        return "+".join(f"{self.dice.count(sides)}d{sides}" for sides in sizes)
+
+    def pmf(self, total: int, bonus: int = 0) -> float:
+        """Вероятность ровно такого результата с учётом бонуса."""
+        index = total - bonus - self.min_total
+        if 0 <= index < len(self.counts):
+            return self.counts[index] / self.outcomes
+        return 0.0
+
+    def p_at_least(self, target: int, bonus: int = 0) -> float:
+        """Вероятность результата не меньше target с учётом бонуса (успех против сложности)."""
+        index = target - bonus - self.min_total
+        if index <= 0:
+            return 1.0
+        if index >= len(self.counts):
+            return 0.0
+        return self.at_least[index] / self.outcomes
+
+    def cdf(self, total: int, bonus: int = 0) -> float:
+        """Вероятность результата не больше total с учётом бонуса."""
+        return 1.0 - self.p_at_least(total + 1, bonus)
+
+    def table(self, bonus: int = 0) -> List[dict]:
+        """Полная таблица PMF/CDF с учётом бонуса."""
+        rows = []
+        cumulative = 0
+        for offset, count in enumerate(self.counts):
+            cumulative += count
+            rows.append({
+                "total": self.min_total + offset + bonus,
+                "pmf": count / self.outcomes,
+                "cdf": cumulative / self.outcomes,
+            })
+        return rows
+
+
+def _convolve(left: List[int], right: List[int]) -> List[int]:
+    """Свёртка двух списков чисел исходов."""
+    result = [0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        if a:
+            for j, b in enumerate(right):
+                result[i + j] += a * b
+    return result
+
+
+def _build(dice: Tuple[int, ...]) -> Distribution:
+    """Строит распределение пула свёрткой распределений отдельных кубиков."""
+    counts = [1]
+    for sides in dice:
+        counts = _convolve(counts, [1] * sides)
+    at_least = [0] * len(counts)
+    running = 0
+    for index in range(len(counts) - 1, -1, -1):
+        running += counts[index]
+        at_least[index] = running
+    return Distribution(
+        dice=dice,
+        min_total=len(dice),
+        counts=tuple(counts),
+        at_least=tuple(at_least),
+        outcomes=running,
+    )
+
+
+def _precompute() -> Dict[Tuple[int, int], Distribution]:
+    """Таблицы для всех кубиков системы и пулов до MAX_POOL_SIZE."""
+    tables = {}
+    for sides in DIE_CHAIN:
+        for dice_count in range(1, MAX_POOL_SIZE + 1):
+            tables[(sides, dice_count)] = _build((sides,) * dice_count)
+    return tables
+
+
+DISTRIBUTIONS = _precompute()
+
+
+def distribution(sides: int, dice_count: int = 1) -> Distribution:
+    """
+    Возвращает распределение пула одинаковых кубиков.
+
+    :param sides: Размер кубика
+    :param dice_count: Число кубиков
+    :return: Заранее вычисленное (или построенное и закэшированное) распределение
+    """
+    table = DISTRIBUTIONS.get((sides, dice_count))
+    if table is not None:
+        return table
+    return pool_distribution((sides,) * dice_count)
+
+
+@lru_cache(maxsize=1024)
+def _pool_distribution(dice: Tuple[int, ...]) -> Distribution:
+    return _build(dice)
+
+
+def pool_distribution(dice: Iterable[int]) -> Distribution:
+    """
+    Распределение смешанного пула (например, d8 + d6); результат кэшируется.
+
+    :param dice: Размеры кубиков
+    :return: Распределение суммы
+    """
+    key = tuple(sorted(dice, reverse=True))
+    if len(set(key)) == 1 and (key[0], len(key)) in DISTRIBUTIONS:
+        return DISTRIBUTIONS[(key[0], len(key))]
+    return _pool_distribution(key)
+
+
+def expression_distribution(dice: DiceExpression, dice_count: int = 1) -> Distribution:
+    """
+    Распределение суммы кубиков выражения, брошенного dice_count раз (без модификатора выражения).
+
+    :param dice: Выражение броска, например кубик характеристики из attribute_dice
+    :param dice_count: Сколько раз выражение входит в пул
+    :return: Распределение суммы
+    :raises ValueError: Для выражений со взрывами, отбором или вычитаемыми кубиками
+    """
+    if not dice.plain or not dice.terms:
+        raise ValueError(f"Точная вероятность для броска {dice.notation} не вычисляется")
+    return pool_distribution(dice.dice * dice_count)
+
+
+def success_probability(dice: DiceExpression, bonus: int, difficulty: int, dice_count: int = 1) -> float:
+    """
+    Вероятность выбросить не меньше difficulty по правилам roll_attribute.
+
+    :param dice: Кубик проверки, например кубик характеристики из attribute_dice
+    :param bonus: Бонус навыка
+    :param difficulty: Сложность проверки
+    :param dice_count: Сколько раз выражение входит в пул (модификатор — за каждое)
+    :return: Вероятность успеха
+    :raises ValueError: Если точное распределение для выражения не вычисляется
+    """
+    return expression_distribution(dice, dice_count).p_at_least(difficulty, bonus + dice.modifier * dice_count)
+
+
+def pool_notation(dice: DiceExpression, dice_count: int = 1) -> str:
+    """
+    Запись пула из dice_count бросков выражения с модификатором, например 4d8+2 для 2d8+1 дважды.
+
+    :param dice: Выражение броска без взрывов и отбора
+    :param dice_count: Сколько раз выражение входит в пул
+    :return: Запись пула
+    """
+    pool = dice.dice * dice_count
+    modifier = dice.modifier * dice_count
+    notation = "+".join(f"{pool.count(sides)}d{sides}" for sides in sorted(set(pool), reverse=True))
+    return notation + (f"{modifier:+d}" if modifier else "")
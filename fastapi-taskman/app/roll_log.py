@@ -0,0 +1,186 @@
+# app/roll_log.py
+"""
+Модуль буферизированной записи журнала бросков.
+
+Обработчики бросков не пишут в базу сами: записи складываются в буфер в
+памяти, а фоновый поток раз в roll_log_flush_interval_seconds (или сразу по
+накоплении roll_log_batch_size записей) вставляет весь буфер одним
+INSERT ... executemany в одной транзакции. Так фиксация одной транзакции
+обслуживает сотни бросков, а эндпоинт броска не ждёт диска.
+
+Записи становятся видны в истории с задержкой не больше интервала сброса.
+При остановке приложения буфер записывается до конца.
+
+Добавление в буфер никогда не обращается к базе и не бросает исключений:
+бросок уже выполнен и разослан столу кампании. Буфер ограничен
+roll_log_max_buffer записями; если база долго недоступна и буфер полон,
+новые записи отбрасываются, а их число копится в счётчике dropped и
+попадает в лог.
+"""
+
+from datetime import datetime, timezone
+from threading import Event, Lock, Thread
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.models.database import engine
+from app.models.models import RollLog
+
+logger = logging.getLogger(__name__)
+
+
+def roll_entry(character_id: int, campaign_id: Optional[int], attribute: str, skill: Optional[str],
+               dice: str, bonus: int, roll: int, rng_nonce: Optional[str] = None,
+               rng_sequence: Optional[int] = None) -> Dict:
+    """
+    Готовит запись журнала для одного броска.
+
+    :param character_id: ID персонажа
+    :param campaign_id: ID кампании персонажа
+    :param attribute: Название характеристики
+    :param skill: Название навыка
+    :param dice: Запись броска
+    :param bonus: Бонус навыка
+    :param roll: Выпавшее значение кубиков
+    :param rng_nonce: nonce генератора кампании (app/campaign_rng.py)
+    :param rng_sequence: Номер броска в генераторе кампании
+    :return: Словарь значений колонок RollLog
+    """
+    return {
+        "character_id": character_id,
+        "campaign_id": campaign_id,
+        "attribute": attribute,
+        "skill": skill,
+        "dice": dice,
+        "bonus": bonus,
+        "roll": roll,
+        "result": roll + bonus,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "rng_nonce": rng_nonce,
+        "rng_sequence": rng_sequence,
+    }
+
+
+class RollLogWriter:
+    """
+    Буфер журнала бросков с групповой фиксацией.
+
+    Добавление в буфер — операция в памяти под короткой блокировкой.
+    Если база недоступна, записи возвращаются в начало буфера и будут
+    записаны при следующем сбросе; то, что не помещается в предел буфера,
+    отбрасывается и учитывается в dropped.
+    """
+
+    def __init__(self, db_engine: Engine, batch_size: int, flush_interval: float, max_buffer: int):
+        self._engine = db_engine
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_buffer = max_buffer
+        self._buffer: List[Dict] = []
+        # Отброшено из-за переполнения: всего и с последней успешной записи
+        self.dropped = 0
+        self._dropped_since_flush = 0
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """Число записей, ещё не записанных в базу."""
+        return len(self._buffer)
+
+    def _keep_within_limit(self) -> int:
+        """Обрезает буфер до max_buffer записей (вызывается под self._lock); возвращает число отброшенных."""
+        excess = len(self._buffer) - self._max_buffer
+        if excess <= 0:
+            return 0
+        del self._buffer[self._max_buffer:]
+        if not self._dropped_since_flush:
+            logger.warning("Буфер журнала бросков переполнен (%d записей), новые записи отбрасываются",
+                           self._max_buffer)
+        self.dropped += excess
+        self._dropped_since_flush += excess
+        return excess
+
+    def append(self, entries: Iterable[Dict]) -> None:
+        """
+        Добавляет записи в буфер; к базе не обращается и исключений не бросает.
+
+        Запись в базу выполняет фоновый поток. Если буфер полон (база недоступна
+        или поток не успевает), не поместившиеся записи отбрасываются.
+
+        :param entries: Записи, подготовленные roll_entry
+        """
+        with self._lock:
+            self._buffer.extend(entries)
+            self._keep_within_limit()
+            size = len(self._buffer)
+        if size >= self._batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Записывает весь буфер одной транзакцией.
+
+        :return: Число записанных записей
+        """
+        # Сбросы выполняются по одному, чтобы id шли в порядке бросков
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(insert(RollLog), batch)
+            except SQLAlchemyError:
+                # Невыполненная пачка возвращается в начало, буфер по-прежнему ограничен
+                with self._lock:
+                    self._buffer[:0] = batch
+                    self._keep_within_limit()
+                raise
+            with self._lock:
+                dropped, self._dropped_since_flush = self._dropped_since_flush, 0
+            if dropped:
+                logger.warning("Журнал бросков снова записывается; отброшено записей: %d", dropped)
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except SQLAlchemyError:
+                logger.exception("Не удалось записать журнал бросков, повторим при следующем сбросе")
+
+    def start(self) -> None:
+        """Запускает фоновый поток сброса."""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = Thread(target=self._run, name="roll-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновый поток и записывает остаток буфера."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+roll_log = RollLogWriter(
+    engine,
+    settings.roll_log_batch_size,
+    settings.roll_log_flush_interval_seconds,
+    settings.roll_log_max_buffer,
+)
@@ -3,12 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Form
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schemas
-from app.models.database import get_db
-from app.auth.hash import hash_password, verify_password
-from app.crud import crud_user
+from app.models.database import get_async_db
+from app.auth.hash import hash_password_async, verify_password_async
+from app.crud import crud_user_async
 
 router = APIRouter(tags=["Auth"])
 templates = Jinja2Templates(directory="app/templates")
@@ -19,18 +19,18 @@ async def register(
     nickname: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Регистрация нового пользователя."""
     from app.schemas.user import UserCreate
 
-    existing_user = crud_user.get_user_by_email(db, email)
+    existing_user = await crud_user_async.get_user_by_email(db, email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash_password(password)
+    hashed_pw = await hash_password_async(password)
     user_data = UserCreate(nickname=nickname, email=email, password=password)
-    user = crud_user.create_user(db, user_data, hashed_pw)
+    user = await crud_user_async.create_user(db, user_data, hashed_pw)
     return user
 
 
@@ -38,13 +38,13 @@ async def register(
 async def login_post(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Логин пользователя."""
-    user = crud_user.get_user_by_email(db, form_data.username)
+    user = await crud_user_async.get_user_by_email(db, form_data.username)
 
     # Проверяем, что пользователь существует и что пароли совпадают
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await verify_password_async(form_data.password, user.password):
         return templates.TemplateResponse("auth/login.html", {"request": request, "message": "Неверные данные"})
     
     # Если всё совпало
@@ -1,19 +1,29 @@
 # app/routes/campaigns.py
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from typing import Iterator, Optional
+
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Request, Form, Query, UploadFile, WebSocket, WebSocketException, status,
+)
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, schemas  # Импортируем схемы
 
 from fastapi.security import OAuth2PasswordRequestForm
-from app.models.database import get_db
+from app.models.database import SessionLocal, get_db, get_async_db
 from app.schemas.campaign import CampaignCreate, CampaignOut
-from app.crud import crud_campaign
-from app.dependencies import get_current_user
-from app.models.models import User
+from app.schemas.campaign_archive import CampaignImportResult
+from app.schemas.roll_log import RollLogPage, RollVerifyResult
+from app.crud import crud_campaign, crud_campaign_async, crud_roll_log
+from app.campaign_archive import export_campaign, import_campaign
+from app.config import settings
+from app.dependencies import get_current_user, get_stream_user, get_websocket_user
+from app.live import campaign_hub
+from app.page_cache import CAMPAIGNS, campaign_entity, page_cache
+from app.models.models import Campaign, User
 from app.schemas.user import UserOut
-from app.crud import crud_character
 
 router = APIRouter(
     prefix="/campaigns",
@@ -24,18 +34,32 @@ templates = Jinja2Templates(directory="app/templates")
 
 # Путь для получения списка кампаний
 @router.get("/", response_class=HTMLResponse)
-def read_campaigns(request: Request, db: Session = Depends(get_db)):
+def read_campaigns(
+    request: Request,
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
     """
-    Получение списка всех кампаний.
+    Получение списка кампаний с необязательной keyset-пагинацией.
 
     :param request: Запрос для передачи в шаблон
+    :param after_id: ID последней кампании предыдущей страницы
+    :param limit: Размер страницы (без него выводятся все кампании)
     :param db: Сессия базы данных
-    :return: Ответ с HTML-шаблоном списка кампаний
+    :return: Ответ с HTML-шаблоном списка кампаний (из кэша страниц, если ничего не менялось)
     """
-    campaigns = crud_campaign.get_all_campaigns(db)
-    return templates.TemplateResponse("campaigns/list.html", {
-        "request": request, "campaigns": campaigns
-    })
+    versions = page_cache.versions(db, [CAMPAIGNS])
+    cached = page_cache.cached_response(request, versions)
+    if cached is not None:
+        return cached
+
+    campaigns = crud_campaign.get_all_campaigns(db, after_id=after_id, limit=limit)
+    # Ссылка на следующую страницу нужна, только если текущая заполнена целиком
+    next_after_id = campaigns[-1]["id"] if limit and len(campaigns) == limit else None
+    return page_cache.store(request, versions, templates.TemplateResponse("campaigns/list.html", {
+        "request": request, "campaigns": campaigns, "limit": limit, "next_after_id": next_after_id
+    }))
 
 # Путь для логина
 @router.post("/login")
@@ -96,7 +120,7 @@ def create_campaign_post(
 async def create_campaign_route(
     name: str = Form(...),
     description: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -110,7 +134,7 @@ async def create_campaign_route(
     """
     campaign = CampaignCreate(name=name, description=description)
     try:
-        return crud_campaign.create_campaign(db=db, campaign=campaign, gm_id=current_user.id)
+        return await crud_campaign_async.create_campaign(db=db, campaign=campaign, gm_id=current_user.id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Ошибка при создании кампании: {str(e)}")
 
@@ -123,12 +147,232 @@ def campaign_detail(campaign_id: int, request: Request, db: Session = Depends(ge
     :param campaign_id: ID кампании
     :param request: Запрос для передачи в шаблон
     :param db: Сессия базы данных
-    :return: Ответ с HTML-шаблоном подробностей кампании
+    :return: Ответ с HTML-шаблоном подробностей кампании (из кэша страниц, если ничего не менялось)
     """
+    versions = page_cache.versions(db, [campaign_entity(campaign_id)])
+    cached = page_cache.cached_response(request, versions)
+    if cached is not None:
+        return cached
+
     campaign = crud_campaign.get_campaign_by_id(db, campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Кампания не найдена")
-    characters = crud_character.get_characters_by_campaign_id(db, campaign_id)
-    return templates.TemplateResponse("campaigns/detail.html", {
-        "request": request, "campaign": campaign, "characters": characters
-    })
+    # Персонажи уже загружены вместе с кампанией, повторный запрос не нужен
+    return page_cache.store(request, versions, templates.TemplateResponse("campaigns/detail.html", {
+        "request": request, "campaign": campaign, "characters": campaign["characters"]
+    }))
+
+
+# История бросков кампании
+@router.get("/{campaign_id}/rolls", response_model=RollLogPage)
+def read_campaign_rolls(
+    campaign_id: int,
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Возвращает историю бросков всех персонажей кампании, новые первыми.
+
+    :param campaign_id: ID кампании
+    :param before_id: id последней записи предыдущей страницы
+    :param limit: Размер страницы
+    :param db: Сессия базы данных
+    :return: Страница журнала и курсор следующей страницы
+    """
+    items = crud_roll_log.get_rolls_by_campaign(db, campaign_id, before_id, limit)
+    return RollLogPage(items=items, next_before_id=items[-1].id if len(items) == limit else None)
+
+
+# Проверка журнала бросков кампании
+@router.get("/{campaign_id}/rolls/verify", response_model=RollVerifyResult)
+def verify_campaign_rolls(
+    campaign_id: int,
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    Повторяет броски из журнала кампании по их nonce и номеру и сверяет с записанными.
+
+    Пустой список mismatches означает, что все проверенные броски действительно
+    получены генератором кампании. Журнал проверяется страницами, новые первыми.
+
+    :param campaign_id: ID кампании
+    :param before_id: id последней записи предыдущей страницы
+    :param limit: Размер страницы
+    :param db: Сессия базы данных
+    :return: Число проверенных и пропущенных записей, расхождения и курсор следующей страницы
+    """
+    result = crud_roll_log.verify_campaign_rolls(db, campaign_id, before_id, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Кампания не найдена")
+    return result
+
+
+# Экспорт кампании в архив
+@router.get("/{campaign_id}/export")
+def export_campaign_archive(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Выгружает кампанию с персонажами, их характеристиками, навыками и ролями
+    потоком NDJSON, сжатым gzip (формат — app/campaign_archive.py).
+
+    :param campaign_id: ID кампании
+    :param db: Сессия базы данных
+    :param current_user: Текущий пользователь (должен быть ведущим кампании)
+    :return: Потоковый ответ application/gzip
+    """
+    campaign = db.get(Campaign, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Кампания не найдена")
+    if campaign.gm_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Выгружать кампанию может только её ведущий")
+    return StreamingResponse(
+        _stream_export(campaign_id),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="campaign-{campaign_id}.ndjson.gz"'},
+    )
+
+
+def _stream_export(campaign_id: int) -> Iterator[bytes]:
+    """
+    Куски архива кампании.
+
+    Сессия открывается здесь, а не через Depends(get_db): зависимость
+    закрывается до того, как начнёт передаваться тело потокового ответа.
+    """
+    db = SessionLocal()
+    try:
+        yield from export_campaign(db, campaign_id)
+    finally:
+        db.close()
+
+
+# Импорт кампании из архива
+@router.post("/import", response_model=CampaignImportResult)
+def import_campaign_archive(
+    archive: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Создаёт новую кампанию из архива, выгруженного через /campaigns/{id}/export.
+
+    Ведущим кампании и владельцем персонажей становится текущий пользователь.
+    Архив читается потоком и записывается пачками в одной транзакции.
+
+    :param archive: Файл архива (gzip или несжатый NDJSON)
+    :param db: Сессия базы данных
+    :param current_user: Текущий пользователь
+    :return: ID новой кампании и число импортированных записей
+    """
+    try:
+        return import_campaign(db, archive.file, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Ошибка импорта кампании: {e}")
+
+
+def _require_campaign_member(db: Session, campaign_id: int, user_id: int) -> None:
+    """
+    Проверяет доступ к событиям кампании: 404, если кампании нет, 403 — если пользователь в ней не участвует.
+
+    :param db: Сессия базы данных
+    :param campaign_id: ID кампании
+    :param user_id: ID пользователя
+    """
+    campaign = db.get(Campaign, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Кампания не найдена")
+    if not crud_campaign.is_campaign_member(db, campaign, user_id):
+        raise HTTPException(status_code=403, detail="События кампании доступны только её участникам")
+
+
+def live_table_access(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_websocket_user),
+) -> None:
+    """
+    Зависимость WebSocket-канала: пускает только участников существующей кампании.
+
+    Ошибка отклоняет подключение до его принятия с кодом 1008.
+
+    :param campaign_id: ID кампании
+    :param db: Сессия базы данных
+    :param current_user: Пользователь подключения
+    """
+    try:
+        _require_campaign_member(db, campaign_id, current_user.id)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail) from e
+    finally:
+        # Сессия зависимости закрывается только после отключения клиента — соединение возвращаем в пул сразу
+        db.close()
+
+
+def live_events_access(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_stream_user),
+) -> None:
+    """
+    Зависимость потока событий: 404 для несуществующей кампании, 403 — для пользователя не из неё.
+
+    Проверка выполняется до начала потока и до подписки на события кампании.
+
+    :param campaign_id: ID кампании
+    :param db: Сессия базы данных
+    :param current_user: Пользователь потока
+    """
+    _require_campaign_member(db, campaign_id, current_user.id)
+
+
+# Живой стол кампании
+@router.websocket("/{campaign_id}/ws", dependencies=[Depends(live_table_access)])
+async def campaign_table(websocket: WebSocket, campaign_id: int):
+    """
+    WebSocket-канал кампании: броски и изменения персонажей всех участников.
+
+    Подключаться могут только участники кампании; токен передаётся параметром
+    token, заголовком Authorization или в cookies (connection_token).
+    Каждое сообщение — JSON-событие с полем type (roll или character).
+    Клиент, который не успевает читать, отключается с кодом 1013.
+
+    :param websocket: Подключение клиента
+    :param campaign_id: ID кампании
+    """
+    await websocket.accept()
+    await campaign_hub.serve(websocket, campaign_id)
+
+
+# Поток событий кампании для клиентов без WebSocket
+@router.get("/{campaign_id}/events", dependencies=[Depends(live_events_access)])
+async def campaign_events(
+    campaign_id: int,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event: Optional[str] = Query(None, alias="lastEventId"),
+):
+    """
+    Server-Sent Events кампании: те же события, что и в WebSocket-канале.
+
+    Доступен только участникам кампании; токен передаётся так же, как для WebSocket.
+
+    При переподключении браузер сам присылает заголовок Last-Event-ID, и
+    пропущенные события досылаются из буфера в памяти. Параметр lastEventId
+    нужен для первого подключения, когда клиент уже знает последнее событие.
+
+    :param campaign_id: ID кампании
+    :param last_event_id: Заголовок Last-Event-ID
+    :param last_event: То же значение в строке запроса
+    :return: Поток text/event-stream
+    """
+    return StreamingResponse(
+        campaign_hub.stream(campaign_id, last_event_id or last_event, settings.sse_keepalive_seconds),
+        media_type="text/event-stream",
+        # Прокси не должны буферизовать или кэшировать поток
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,17 +1,27 @@
 """Маршруты для работы с персонажами."""
 
-from typing import List
-from collections import defaultdict
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.dependencies import get_db
-from app.schemas.character import Character, CharacterCreate, CharacterUpdate
-from app.crud import crud_character
-from app.models.models import Attribute, Skill, CharacterAttribute, CharacterSkill
+from app.campaign_rng import CampaignNotFound
+from app.catalog import catalog_cache
+from app.config import settings
+from app.dependencies import get_current_user, get_db
+from app.models.database import SessionLocal, get_async_db
+from app.models.models import Campaign, User
+from app.page_cache import character_entity, page_cache
+from app.schemas.character import (
+    Character, CharacterBulkCreate, CharacterCreate, CharacterOut, CharacterPage, CharacterSummary, CharacterUpdate,
+)
+from app.serialization import dump_row, dump_rows, json_response, row_type, type_adapter
+from app.schemas.roll import RollBatchRequest, RollResult
+from app.schemas.roll_log import RollLogPage
+from app.crud import crud_campaign, crud_character, crud_character_async, crud_character_sheet, crud_roll_log
 
 router = APIRouter(
     prefix="/characters",
@@ -21,10 +31,58 @@ router = APIRouter(
 templates = Jinja2Templates(directory="app/templates")
 
 
-@router.get("/", response_model=List[Character])
-def get_characters(db: Session = Depends(get_db)):
-    """Получение всех персонажей."""
-    return crud_character.get_characters(db)
+@router.get("/", response_model=CharacterPage)
+def get_characters(
+    request: Request,
+    user_id: Optional[int] = Query(None, ge=1),
+    campaign_id: Optional[int] = Query(None, ge=1),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),  # pylint: disable=redefined-builtin
+    db: Session = Depends(get_db),
+):
+    """
+    Получение персонажей с фильтрами по владельцу и кампании и keyset-пагинацией.
+
+    В обычном режиме возвращается страница (по умолчанию 100 персонажей) и курсор
+    следующей. В режиме NDJSON (format=ndjson или Accept: application/x-ndjson)
+    персонажи передаются потоком, по одному JSON-объекту в строке, без ограничения
+    размера, если не задан limit: строки читаются из базы пачками по мере отправки.
+
+    Ответ собирается из колонок запроса и сериализуется напрямую (app/serialization.py).
+    """
+    ndjson = format == "ndjson" or (format is None and "application/x-ndjson" in request.headers.get("accept", ""))
+    if ndjson:
+        return StreamingResponse(
+            _stream_characters(user_id, campaign_id, after_id, limit),
+            media_type="application/x-ndjson",
+        )
+
+    limit = limit or 100
+    items = crud_character.get_character_rows(db, user_id, campaign_id, after_id, limit)
+    return json_response(dump_row(CharacterPage, {
+        "items": items,
+        "next_after_id": items[-1]["id"] if len(items) == limit else None,
+    }))
+
+
+def _stream_characters(user_id: Optional[int], campaign_id: Optional[int], after_id: Optional[int],
+                       limit: Optional[int]) -> Iterator[bytes]:
+    """
+    Строки NDJSON со списком персонажей, по одному куску на пачку строк из базы.
+
+    Сессия открывается здесь, а не через Depends(get_db): зависимость
+    закрывается до того, как начнёт передаваться тело потокового ответа.
+    """
+    dump = type_adapter(row_type(CharacterSummary)).dump_json
+    db = SessionLocal()
+    try:
+        for batch in crud_character.iter_character_rows(
+            db, user_id, campaign_id, after_id, limit, settings.character_stream_batch_size
+        ):
+            yield b"".join(dump(row) + b"\n" for row in batch)
+    finally:
+        db.close()
 
 
 @router.post("/", response_model=Character)
@@ -35,6 +93,27 @@ def create_character(character_data: CharacterCreate, db: Session = Depends(get_
     return crud_character.create_character(db, character_data, user_id, campaign_id)
 
 
+@router.post("/bulk", response_model=List[CharacterOut])
+def create_characters_bulk(
+    bulk_data: CharacterBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Массовое создание персонажей кампании в одной транзакции.
+
+    Владельцем персонажей становится текущий пользователь; создавать их
+    может только участник кампании (ведущий, владелец персонажа или игрок с ролью).
+    """
+    campaign = db.get(Campaign, bulk_data.campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Кампания не найдена")
+    if not crud_campaign.is_campaign_member(db, campaign, current_user.id):
+        raise HTTPException(status_code=403, detail="Создавать персонажей могут только участники кампании")
+    characters = crud_character.create_characters(db, bulk_data.characters, current_user.id, campaign.id)
+    return json_response(dump_rows(CharacterOut, ({"id": c.id, "name": c.name} for c in characters)))
+
+
 @router.put("/{character_id}", response_model=Character)
 def update_character(character_id: int, character_data: CharacterUpdate, db: Session = Depends(get_db)):
     """Обновление существующего персонажа."""
@@ -44,9 +123,9 @@ def update_character(character_id: int, character_data: CharacterUpdate, db: Ses
     return character
 
 
-@router.delete("/{character_id}", response_model=Character)
+@router.delete("/{character_id}", response_model=CharacterSummary)
 def delete_character(character_id: int, db: Session = Depends(get_db)):
-    """Удаление персонажа по ID."""
+    """Удаление персонажа по ID. В ответе — поля удалённого персонажа, без характеристик и навыков."""
     character = crud_character.delete_character(db, character_id)
     if not character:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
@@ -56,45 +135,61 @@ def delete_character(character_id: int, db: Session = Depends(get_db)):
 @router.get("/roll/{character_id}/{attribute}/{skill}", response_model=int)
 def roll_for_attribute_and_skill(character_id: int, attribute: str, skill: str, db: Session = Depends(get_db)):
     """Выполнение броска по атрибуту и навыку."""
-    character = crud_character.get_character_by_id(db, character_id)
+    character = crud_character.get_character_by_id(db, character_id, "roll")
     if not character:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
-    return crud_character.roll_attribute(character, attribute, skill)
+    try:
+        return crud_character.roll_attribute(character, attribute, skill)
+    except CampaignNotFound:
+        raise HTTPException(status_code=404, detail="Кампания персонажа не найдена")
+
+
+@router.post("/roll/batch", response_model=List[RollResult])
+def roll_batch(batch: RollBatchRequest, db: Session = Depends(get_db)):
+    """Пакетные броски для нескольких персонажей (инициатива, групповая проверка)."""
+    try:
+        results = crud_character.roll_batch(db, batch.rolls)
+    except CampaignNotFound:
+        raise HTTPException(status_code=404, detail="Кампания персонажа не найдена")
+    if results is None:
+        raise HTTPException(status_code=404, detail="Персонаж не найден")
+    return results
+
+
+@router.get("/{character_id}/rolls", response_model=RollLogPage)
+def get_character_rolls(
+    character_id: int,
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """История бросков персонажа, новые первыми (keyset-пагинация по before_id)."""
+    items = crud_roll_log.get_rolls_by_character(db, character_id, before_id, limit)
+    return RollLogPage(items=items, next_before_id=items[-1].id if len(items) == limit else None)
 
 
 @router.get("/attributes_and_skills")
 def get_attributes_and_skills(db: Session = Depends(get_db)):
     """Получение всех атрибутов и сгруппированных по ним навыков."""
-    attributes = db.query(Attribute).all()
-    skills = db.query(Skill).all()
-
-    grouped_skills = {attr.name: [] for attr in attributes}
-    for skill in skills:
-        grouped_skills[skill.attribute.name].append(skill)
-
-    return {"attributes": attributes, "grouped_skills": grouped_skills}
+    catalog = catalog_cache.get(db)
+    return {"attributes": catalog.attributes, "grouped_skills": catalog.grouped_skills}
 
 
 @router.get("/create/{campaign_id}", response_class=HTMLResponse)
-async def create_character_form(request: Request, campaign_id: int, db: Session = Depends(get_db)):
+async def create_character_form(request: Request, campaign_id: int, db: AsyncSession = Depends(get_async_db)):
     """Форма для создания нового персонажа."""
-    attributes = db.query(Attribute).all()
-    skills = db.query(Skill).all()
-
-    grouped_skills = {attr.name: [] for attr in attributes}
-    for skill in skills:
-        grouped_skills[skill.attribute.name].append(skill)
+    catalog = await catalog_cache.get_async(db)
 
     return templates.TemplateResponse("characters/create.html", {
         "request": request,
-        "attributes": attributes,
-        "grouped_skills": grouped_skills,
+        "attributes": catalog.attributes,
+        "grouped_skills": catalog.grouped_skills,
         "campaign_id": campaign_id
     })
 
 
 @router.post("/create", response_class=HTMLResponse)
-async def create_character_post(request: Request, db: Session = Depends(get_db)):
+async def create_character_post(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Обработка формы создания персонажа."""
     form = await request.form()
     name = form.get("name")
@@ -117,71 +212,55 @@ async def create_character_post(request: Request, db: Session = Depends(get_db))
         attributes=attributes,
         skills=skills
     )
-    crud_character.create_character(db, character_data, user_id, campaign_id)
+    await crud_character_async.create_character(db, character_data, user_id, campaign_id)
     return RedirectResponse(url=f"/campaigns/{campaign_id}", status_code=303)
 
 
 @router.get("/{character_id}", response_class=HTMLResponse)
-async def character_detail(character_id: int, request: Request, db: Session = Depends(get_db)):
-    """Детализация персонажа."""
-    character = crud_character.get_character_by_id(db, character_id)
-    if not character:
+async def character_detail(character_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Детализация персонажа: страница строится из снимка листа (одно чтение по ключу)
+    и справочника из кэша, а неизменённая страница отдаётся из кэша страниц,
+    которому достаточно прочитать версии.
+    """
+    versions = await page_cache.versions_async(db, [character_entity(character_id)])
+    cached = page_cache.cached_response(request, versions)
+    if cached is not None:
+        return cached
+
+    sheet = await crud_character_async.get_character_sheet(db, character_id)
+    if not sheet:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
 
-    char_attr_values = {ca.attribute.name: ca.value for ca in character.attributes}
-    char_skill_values = {cs.skill.name: cs.bonus for cs in character.skills}
-
-    all_skills = db.query(Skill).all()
-    grouped_skills = defaultdict(list)
-    for skill in all_skills:
-        grouped_skills[skill.attribute.name].append(skill)
-
-    attribute_names = [attr.name for attr in db.query(Attribute).all()]
-
-    return templates.TemplateResponse("characters/detail.html", {
-        "request": request,
-        "character": character,
-        "attribute_names": attribute_names,
-        "grouped_skills": dict(grouped_skills),
-        "char_attr_values": char_attr_values,
-        "char_skill_values": char_skill_values
-    })
+    catalog = await catalog_cache.get_async(db)
+    return page_cache.store(request, versions, templates.TemplateResponse(
+        "characters/detail.html", {"request": request, **crud_character_sheet.sheet_context(catalog, sheet)}
+    ))
 
 
 @router.get("/{character_id}/edit", response_class=HTMLResponse)
-async def edit_character(request: Request, character_id: int, db: Session = Depends(get_db)):
+async def edit_character(request: Request, character_id: int, db: AsyncSession = Depends(get_async_db)):
     """Форма редактирования персонажа."""
-    character = crud_character.get_character_by_id(db, character_id)
+    character = await crud_character_async.get_character_by_id(db, character_id, "sheet")
     if not character:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
 
-    attributes = db.query(Attribute).all()
-    skills = db.query(Skill).all()
-    grouped_skills = {attr.name: [] for attr in attributes}
-    for skill in skills:
-        grouped_skills[skill.attribute.name].append(skill)
-
-    char_attr_values = {
-        ca.attribute.name: ca.value
-        for ca in db.query(CharacterAttribute).filter_by(character_id=character_id).all()
-    }
-    char_skill_values = {
-        cs.skill.name: cs.bonus
-        for cs in db.query(CharacterSkill).filter_by(character_id=character_id).all()
-    }
+    catalog = await catalog_cache.get_async(db)
+    char_attr_values = {catalog.attribute_names_by_id[ca.attribute_id]: ca.value for ca in character.attributes}
+    char_skill_values = {catalog.skill_names_by_id[cs.skill_id]: cs.bonus for cs in character.skills}
 
     return templates.TemplateResponse("characters/edit.html", {
         "request": request,
         "character": character,
-        "attributes": attributes,
-        "grouped_skills": grouped_skills,
+        "attributes": catalog.attributes,
+        "grouped_skills": catalog.grouped_skills,
         "char_attr_values": char_attr_values,
         "char_skill_values": char_skill_values
     })
 
 
 @router.post("/{character_id}", response_class=HTMLResponse)
-async def edit_character_post(request: Request, character_id: int, db: Session = Depends(get_db)):
+async def edit_character_post(request: Request, character_id: int, db: AsyncSession = Depends(get_async_db)):
     """Обработка формы редактирования персонажа."""
     form_data = await request.form()
     name = form_data.get("name")
@@ -196,28 +275,15 @@ async def edit_character_post(request: Request, character_id: int, db: Session =
         for k, v in form_data.items() if k.startswith("skills[")
     }
 
-    character = crud_character.get_character_by_id(db, character_id)
+    character = await crud_character_async.get_character_by_id(db, character_id, "summary")
     if not character:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
 
     character.name = name
     character.description = description
-
-    for attribute_id, value in attributes.items():
-        attr = db.query(CharacterAttribute).filter_by(character_id=character_id, attribute_id=attribute_id).first()
-        if attr:
-            attr.value = value
-        else:
-            db.add(CharacterAttribute(character_id=character_id, attribute_id=attribute_id, value=value))
-
-    for skill_id, bonus in skills.items():
-        skill = db.query(CharacterSkill).filter_by(character_id=character_id, skill_id=skill_id).first()
-        if skill:
-            skill.bonus = bonus
-        else:
-            db.add(CharacterSkill(character_id=character_id, skill_id=skill_id, bonus=bonus))
-
-    db.commit()
+    await crud_character_async.upsert_character_stats(db, character_id, attributes, skills)
+    await db.run_sync(crud_character_sheet.rebuild_character_sheets, [character_id])
+    await db.commit()
 
     return RedirectResponse(url=f"/characters/{character_id}", status_code=303)
 
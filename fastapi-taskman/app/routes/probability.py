@@ -0,0 +1,178 @@
+# app/routes/probability.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import probability
+from app.catalog import catalog_cache
+from app.crud import crud_character
+from app.dice import DiceExpression, attribute_dice
+from app.models.database import get_db, get_async_db
+from app.schemas.probability import DistributionOut, SuccessProbability
+from app.schemas.simulation import EncounterRequest, EncounterResult, PairResult
+from app.simulation import encounter_simulator
+
+router = APIRouter(
+    prefix="/probability",
+    tags=["Probability"]
+)
+
+# Все ответы берутся из заранее вычисленных таблиц модуля app.probability
+
+
+def _attribute_dice(db: Session, attribute: Optional[str], attribute_value: int) -> DiceExpression:
+    """
+    Кубик характеристики так же, как при броске: базовый кубик из справочника
+    (если характеристика указана, иначе 1d4), повышенный её значением.
+    """
+    dice_type = "1d4"
+    if attribute is not None:
+        catalog = catalog_cache.get(db)
+        attribute_id = catalog.attribute_ids.get(attribute)
+        if attribute_id is None:
+            raise HTTPException(status_code=404, detail="Характеристика не найдена")
+        dice_type = catalog.attribute_dice_types.get(attribute_id, dice_type)
+    return attribute_dice(dice_type, attribute_value)
+
+
+def _no_exact_probability(dice: DiceExpression) -> HTTPException:
+    """Ответ 400 для выражения, точное распределение которого не вычисляется."""
+    return HTTPException(
+        status_code=400,
+        detail=f"Точная вероятность для броска {dice.notation} не вычисляется, используйте моделирование встречи",
+    )
+
+
+def _exact_distribution(dice: DiceExpression, dice_count: int = 1) -> probability.Distribution:
+    """Точное распределение пула или ответ 400, если для выражения его нет."""
+    try:
+        return probability.expression_distribution(dice, dice_count)
+    except ValueError:
+        raise _no_exact_probability(dice)
+
+
+def _success_probability(dice: DiceExpression, bonus: int, difficulty: int, dice_count: int = 1) -> SuccessProbability:
+    """Шанс пройти проверку в формате ответа или ответ 400, если точного распределения нет."""
+    try:
+        p_success = probability.success_probability(dice, bonus, difficulty, dice_count)
+    except ValueError:
+        raise _no_exact_probability(dice)
+    return SuccessProbability(
+        dice=probability.pool_notation(dice, dice_count), bonus=bonus, difficulty=difficulty, p_success=p_success,
+    )
+
+
+@router.get("/check", response_model=SuccessProbability)
+def check_probability(
+    difficulty: int,
+    attribute_value: int = Query(1, ge=1),
+    bonus: int = 0,
+    dice_count: int = Query(1, ge=1, le=probability.MAX_POOL_SIZE),
+    attribute: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Шанс выбросить не меньше сложности при данном значении характеристики и бонусе.
+
+    :param difficulty: Сложность проверки
+    :param attribute_value: Значение характеристики (выше 5 — d12, как при броске)
+    :param bonus: Бонус навыка
+    :param dice_count: Число кубиков в пуле
+    :param attribute: Название характеристики, чей базовый кубик использовать (по умолчанию 1d4)
+    :param db: Сессия базы данных
+    :return: Вероятность успеха
+    """
+    return _success_probability(_attribute_dice(db, attribute, attribute_value), bonus, difficulty, dice_count)
+
+
+@router.get("/distribution", response_model=DistributionOut)
+def get_distribution(
+    attribute_value: int = Query(1, ge=1),
+    bonus: int = 0,
+    dice_count: int = Query(1, ge=1, le=probability.MAX_POOL_SIZE),
+    attribute: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Полная таблица PMF/CDF результата броска.
+
+    :param attribute_value: Значение характеристики (выше 5 — d12, как при броске)
+    :param bonus: Бонус навыка
+    :param dice_count: Число кубиков в пуле
+    :param attribute: Название характеристики, чей базовый кубик использовать (по умолчанию 1d4)
+    :param db: Сессия базы данных
+    :return: Распределение результатов
+    """
+    dice = _attribute_dice(db, attribute, attribute_value)
+    dist = _exact_distribution(dice, dice_count)
+    shift = bonus + dice.modifier * dice_count
+    return DistributionOut(
+        dice=probability.pool_notation(dice, dice_count),
+        bonus=bonus,
+        min_total=dist.min_total + shift,
+        max_total=dist.max_total + shift,
+        table=dist.table(shift),
+    )
+
+
+@router.get("/character/{character_id}/{attribute}/{skill}", response_model=SuccessProbability)
+def character_check_probability(
+    character_id: int, attribute: str, skill: str, difficulty: int, db: Session = Depends(get_db)
+):
+    """
+    Шанс персонажа пройти проверку по характеристике и навыку.
+
+    :param character_id: ID персонажа
+    :param attribute: Название характеристики
+    :param skill: Название навыка
+    :param difficulty: Сложность проверки
+    :param db: Сессия базы данных
+    :return: Вероятность успеха
+    """
+    character = crud_character.get_character_by_id(db, character_id, profile="roll")
+    if not character:
+        raise HTTPException(status_code=404, detail="Персонаж не найден")
+
+    dice, bonus = crud_character.roll_parameters(catalog_cache.get(db), character, attribute, skill)
+    return _success_probability(dice, bonus, difficulty)
+
+
+@router.post("/encounter", response_model=EncounterResult)
+async def simulate_encounter(encounter: EncounterRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Моделирование встречи методом Монте-Карло: группа против противников.
+
+    :param encounter: Участники, число испытаний и необязательное зерно
+    :param db: Асинхронная сессия базы данных
+    :return: Доли побед, статистика по парам и распределение числа выигранных пар
+    """
+    params = await db.run_sync(crud_character.load_roll_parameters, encounter.party + encounter.opponents)
+    if params is None:
+        raise HTTPException(status_code=404, detail="Персонаж не найден")
+    party, opponents = params[:len(encounter.party)], params[len(encounter.party):]
+
+    stats = await encounter_simulator.simulate(party, opponents, encounter.trials, encounter.seed)
+    trials = stats.trials
+    pairs = [
+        PairResult(
+            party_character_id=member.character_id,
+            opponent_character_id=opponent.character_id,
+            win_rate=stats.pair_wins[i][j] / trials,
+            tie_rate=stats.pair_ties[i][j] / trials,
+            loss_rate=(trials - stats.pair_wins[i][j] - stats.pair_ties[i][j]) / trials,
+            mean_margin=stats.pair_margin_mean[i][j],
+        )
+        for i, member in enumerate(encounter.party)
+        for j, opponent in enumerate(encounter.opponents)
+    ]
+    return EncounterResult(
+        trials=trials,
+        capped=stats.capped,
+        party_win_rate=stats.party_wins / trials,
+        opponent_win_rate=stats.opponent_wins / trials,
+        draw_rate=stats.draws / trials,
+        pairs=pairs,
+        party_wins_distribution=[count / trials for count in stats.party_wins_histogram],
+    )
@@ -1,11 +1,11 @@
 # app/routes/users.py
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from app.models.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import get_async_db
 from app.schemas.user import UserCreate
-from app.crud import crud_user
-from app.auth.hash import hash_password
+from app.crud import crud_user_async
+from app.auth.hash import hash_password_async
 from fastapi.templating import Jinja2Templates
 
 templates = Jinja2Templates(directory="app/templates")
@@ -22,17 +22,17 @@ async def register_post(
     nickname: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Регистрация нового пользователя."""
     user_data = UserCreate(nickname=nickname, email=email, password=password)
 
-    existing_user = crud_user.get_user_by_email(db, user_data.email)
+    existing_user = await crud_user_async.get_user_by_email(db, user_data.email)
     if existing_user:
         return templates.TemplateResponse("auth/register.html", {"request": request, "message": "Почта уже занята"})
 
-    hashed_password = hash_password(user_data.password)
-    crud_user.create_user(db, user_data, hashed_password)
+    hashed_password = await hash_password_async(user_data.password)
+    await crud_user_async.create_user(db, user_data, hashed_password)
 
     return templates.TemplateResponse("auth/register.html", {"request": request, "message": "Вы зарегистрированы! Теперь войдите в систему"})
 
@@ -1,8 +1,10 @@
 # app/schemas/attribute.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional
 
+from app.dice import compile_dice
+
 # Модели для характеристик
 # Этот модуль содержит схемы для работы с характеристиками персонажей.
 
@@ -14,6 +16,14 @@ class AttributeBase(BaseModel):
     name: str
     dice_type: str  # Тип кубика для характеристики (например, 1d4, 1d6 и т.д.)
 
+    @field_validator("dice_type")
+    @classmethod
+    def check_dice_type(cls, value):
+        """Проверяет, что тип кубика записан в поддерживаемой нотации (см. app/dice.py)."""
+        if value is not None:
+            compile_dice(value)  # DiceSyntaxError — подкласс ValueError, pydantic вернёт 422
+        return value
+
 class AttributeCreate(AttributeBase):
     """
     Модель для создания новой характеристики.
@@ -40,5 +50,5 @@ class Attribute(AttributeBase):
         """
         Конфигурация для работы с объектами, используя ORM (объектно-реляционное отображение).
         """
-        orm_mode = True
+        from_attributes = True
 
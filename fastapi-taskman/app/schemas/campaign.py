@@ -1,6 +1,8 @@
 # app/schemas/campaign.py
 
+from typing import List
 from pydantic import BaseModel
+from .character import CharacterOut
 
 # Модели для работы с кампаниями.
 # Этот модуль включает схемы для создания, обновления и вывода информации о кампаниях.
@@ -17,6 +19,7 @@ class CampaignCreate(BaseModel):
     """
     Модель для создания кампании.
     Включает имя и описание кампании.
+    Зерно генератора бросков (Campaign.rng_seed) выбирается сервером и из запроса не принимается.
     """
     name: str
     description: str
@@ -38,11 +41,12 @@ class Campaign(CampaignBase):
 class CampaignOut(CampaignBase):
     """
     Модель для вывода информации о кампании.
-    Включает идентификатор кампании, идентификатор гейм-мастера и описание.
+    Включает идентификатор кампании, идентификатор гейм-мастера, описание и персонажей.
     """
     id: int
     gm_id: int
     description: str
+    characters: List[CharacterOut] = []
 
     class Config:
         """
@@ -0,0 +1,57 @@
+# app/schemas/campaign_archive.py
+
+from typing import Dict, Literal, Optional, Union
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+# Модели записей архива кампании (app/campaign_archive.py).
+# Архив — NDJSON, сжатый gzip: первая строка — заголовок кампании, затем по строке
+# на персонажа и на роль. ID в архиве — идентификаторы исходного сервера.
+
+class ArchiveHeader(BaseModel):
+    """
+    Заголовок архива: кампания и справочник исходного сервера.
+    Справочник (ID -> название) нужен, чтобы сопоставить характеристики и навыки
+    с ID справочника сервера, на который выполняется импорт.
+    """
+    type: Literal["campaign"] = "campaign"
+    format: int
+    name: str
+    description: str
+    attributes: Dict[int, str] = {}
+    skills: Dict[int, str] = {}
+
+class ArchiveCharacter(BaseModel):
+    """
+    Персонаж архива вместе со значениями характеристик и бонусами навыков.
+    """
+    type: Literal["character"] = "character"
+    id: int
+    name: str
+    description: Optional[str] = None
+    attributes: Dict[int, int] = {}  # ID характеристики: значение
+    skills: Dict[int, int] = {}      # ID навыка: бонус
+
+class ArchiveRole(BaseModel):
+    """
+    Роль персонажа в кампании.
+    """
+    type: Literal["role"] = "role"
+    character_id: Optional[int] = None
+    role: Optional[str] = None
+
+# Строка архива: тип записи определяется полем type
+ArchiveRecord = Annotated[Union[ArchiveHeader, ArchiveCharacter, ArchiveRole], Field(discriminator="type")]
+
+class CampaignImportResult(BaseModel):
+    """
+    Итог импорта кампании.
+    skipped — значения характеристик и навыков, которых нет в справочнике сервера,
+    и роли персонажей, отсутствующих в архиве.
+    """
+    campaign_id: int
+    characters: int
+    attributes: int
+    skills: int
+    roles: int
+    skipped: int
@@ -3,8 +3,8 @@
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from fastapi import Form
-from .attribute import Attribute  # Импортируем Attribute
-from .skill import Skill  # Импортируем Skill
+from .character_attribute import CharacterAttribute
+from .character_skill import CharacterSkill
 
 # Модели для работы с персонажами.
 # Этот модуль включает схемы для создания, обновления и вывода информации о персонажах.
@@ -42,30 +42,42 @@ class CharacterCreate(BaseModel):
         # Это невозможно напрямую — решение ниже
         pass
 
+class CharacterBulkCreate(BaseModel):
+    """
+    Модель для массового создания персонажей одной кампании.
+    Используется для импорта группы игроков или списка NPC.
+    """
+    campaign_id: int
+    characters: List[CharacterCreate]
+
 class CharacterUpdate(CharacterBase):
     """
     Модель для обновления информации о персонаже.
-    Позволяет обновить имя и описание персонажа.
+    Позволяет обновить имя, описание, а также значения характеристик и бонусы навыков по их названиям.
     """
     name: Optional[str] = None
     description: Optional[str] = None
+    attributes: Optional[Dict[str, int]] = None  # Название характеристики: значение
+    skills: Optional[Dict[str, int]] = None      # Название навыка: бонус
 
 class Character(CharacterBase):
     """
     Модель персонажа, которая включает атрибуты и навыки.
     Используется для отображения полного персонажа в системе.
+    attributes и skills — значения персонажа (строки character_attributes и
+    character_skills), а не записи справочника.
     """
     id: int
     campaign_id: Optional[int] = None
     user_id: int
-    attributes: List[Attribute]  # Добавляем атрибуты
-    skills: List[Skill]  # Добавляем навыки
+    attributes: List[CharacterAttribute] = []
+    skills: List[CharacterSkill] = []
 
     class Config:
         """
         Конфигурация для работы с аттрибутами модели в Pydantic V2.
         """
-        orm_mode = True
+        from_attributes = True
 
 class CharacterOut(BaseModel):
     """
@@ -75,3 +87,25 @@ class CharacterOut(BaseModel):
     id: int
     name: str
 
+
+class CharacterSummary(CharacterBase):
+    """
+    Модель персонажа в списке: только собственные поля, без характеристик и навыков.
+    """
+    id: int
+    campaign_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+    class Config:
+        """
+        Конфигурация для работы с аттрибутами модели в Pydantic V2.
+        """
+        from_attributes = True
+
+class CharacterPage(BaseModel):
+    """
+    Модель страницы списка персонажей.
+    next_after_id передаётся как after_id для следующей страницы; None — персонажей больше нет.
+    """
+    items: List[CharacterSummary]
+    next_after_id: Optional[int] = None
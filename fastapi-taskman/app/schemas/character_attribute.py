@@ -39,5 +39,5 @@ class CharacterAttribute(CharacterAttributeBase):
         """
         Конфигурация для работы с объектами, используя ORM.
         """
-        orm_mode = True
+        from_attributes = True
 
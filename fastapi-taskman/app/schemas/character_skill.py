@@ -40,5 +40,5 @@ class CharacterSkill(CharacterSkillBase):
         """
         Конфигурация для работы с объектами, используя ORM (объектно-реляционное отображение).
         """
-        orm_mode = True
+        from_attributes = True
 
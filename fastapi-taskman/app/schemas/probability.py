@@ -0,0 +1,35 @@
+# app/schemas/probability.py
+
+from pydantic import BaseModel
+from typing import List
+
+# Модели для вероятностей бросков.
+# Этот модуль содержит схемы ответов на вопросы «какой шанс пройти проверку».
+
+class SuccessProbability(BaseModel):
+    """
+    Модель шанса пройти проверку.
+    Включает пул кубиков, бонус, сложность и вероятность успеха (результат не меньше сложности).
+    """
+    dice: str
+    bonus: int
+    difficulty: int
+    p_success: float
+
+class DistributionRow(BaseModel):
+    """
+    Строка таблицы распределения: итоговый результат, его вероятность и накопленная вероятность.
+    """
+    total: int
+    pmf: float
+    cdf: float
+
+class DistributionOut(BaseModel):
+    """
+    Модель полного распределения результатов броска с учётом бонуса.
+    """
+    dice: str
+    bonus: int
+    min_total: int
+    max_total: int
+    table: List[DistributionRow]
@@ -0,0 +1,37 @@
+# app/schemas/roll.py
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Модели для бросков кубиков.
+# Этот модуль содержит схемы для пакетных бросков по характеристикам и навыкам персонажей.
+
+class RollRequest(BaseModel):
+    """
+    Модель одного запроса на бросок.
+    Включает ID персонажа, название характеристики, необязательный навык и число бросков.
+    """
+    character_id: int
+    attribute: str
+    skill: Optional[str] = None
+    count: int = Field(1, ge=1, le=100)
+
+class RollBatchRequest(BaseModel):
+    """
+    Модель пакетного запроса на броски.
+    Позволяет выполнить броски для многих персонажей за один запрос (инициатива, групповая проверка).
+    """
+    rolls: List[RollRequest] = Field(..., min_length=1, max_length=200)
+
+class RollResult(BaseModel):
+    """
+    Модель результата бросков по одному запросу.
+    Включает тип кубика, бонус навыка, выпавшие значения и итоговые результаты.
+    """
+    character_id: int
+    attribute: str
+    skill: Optional[str] = None
+    dice: str
+    bonus: int
+    rolls: List[int]
+    results: List[int]
@@ -0,0 +1,60 @@
+# app/schemas/roll_log.py
+
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Модели для журнала бросков.
+# Этот модуль содержит схемы записи журнала и страницы истории с keyset-пагинацией.
+
+class RollLogOut(BaseModel):
+    """
+    Модель записи журнала бросков.
+    rng_nonce и rng_sequence задают поток генератора кампании, из которого получен бросок.
+    """
+    id: int
+    character_id: int
+    campaign_id: Optional[int] = None
+    attribute: str
+    skill: Optional[str] = None
+    dice: str
+    bonus: int
+    roll: int
+    result: int
+    created_at: datetime
+    rng_nonce: Optional[str] = None
+    rng_sequence: Optional[int] = None
+
+    class Config:
+        """
+        Конфигурация для работы с объектами, используя ORM (объектно-реляционное отображение).
+        """
+        from_attributes = True
+
+class RollLogPage(BaseModel):
+    """
+    Модель страницы истории бросков.
+    next_before_id передаётся как before_id для следующей (более старой) страницы; None — записей больше нет.
+    """
+    items: List[RollLogOut]
+    next_before_id: Optional[int] = None
+
+class RollVerifyMismatch(BaseModel):
+    """
+    Модель записи журнала, которая не совпала с повторённым броском.
+    """
+    id: int
+    dice: str
+    logged: int
+    replayed: int
+
+class RollVerifyResult(BaseModel):
+    """
+    Модель результата проверки журнала бросков кампании.
+    skipped — записи без данных генератора (сделанные до его появления).
+    next_before_id передаётся как before_id для проверки следующей (более старой) страницы.
+    """
+    checked: int
+    skipped: int
+    mismatches: List[RollVerifyMismatch]
+    next_before_id: Optional[int] = None
@@ -0,0 +1,51 @@
+# app/schemas/simulation.py
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Модели для моделирования встреч.
+# Этот модуль содержит схемы запроса и результата встречных проверок группы против противников.
+
+class Combatant(BaseModel):
+    """
+    Модель участника встречи.
+    Включает ID персонажа, характеристику и необязательный навык, которыми он бросает проверку.
+    """
+    character_id: int
+    attribute: str
+    skill: Optional[str] = None
+
+class EncounterRequest(BaseModel):
+    """
+    Модель запроса на моделирование встречи.
+    В каждом испытании каждый участник группы проходит встречную проверку против каждого противника.
+    Число испытаний может быть урезано бюджетом сервера.
+    """
+    party: List[Combatant] = Field(..., min_length=1, max_length=20)
+    opponents: List[Combatant] = Field(..., min_length=1, max_length=20)
+    trials: int = Field(10000, ge=1, le=1_000_000)
+    seed: Optional[int] = Field(None, ge=0)
+
+class PairResult(BaseModel):
+    """
+    Модель итогов одной пары: участник группы против противника.
+    """
+    party_character_id: int
+    opponent_character_id: int
+    win_rate: float
+    tie_rate: float
+    loss_rate: float
+    mean_margin: float
+
+class EncounterResult(BaseModel):
+    """
+    Модель результата моделирования встречи.
+    party_wins_distribution[k] — доля испытаний, в которых группа выиграла ровно k пар.
+    """
+    trials: int
+    capped: bool
+    party_win_rate: float
+    opponent_win_rate: float
+    draw_rate: float
+    pairs: List[PairResult]
+    party_wins_distribution: List[float]
@@ -41,5 +41,5 @@ class Skill(SkillBase):
         """
         Конфигурация для работы с объектами, используя ORM (объектно-реляционное отображение).
         """
-        orm_mode = True
+        from_attributes = True
 
@@ -0,0 +1,95 @@
+# app/serialization.py
+"""
+Модуль быстрой сериализации JSON-ответов.
+
+Обычный путь FastAPI для response_model — ORM-объекты, затем валидация
+модели Pydantic для каждого объекта, затем model_dump в словари Python, затем
+json.dumps — тратит время в основном на Python-код вокруг каждой строки.
+Здесь ответ собирается из строк SQL-запроса по колонкам (Row._asdict()) и
+сериализуется в байты одним вызовом сериализатора pydantic-core (Rust).
+
+Для каждой схемы ответа строится TypedDict с теми же полями (row_type):
+TypeAdapter над ним сериализует словари напрямую, без создания экземпляров
+моделей. TypeAdapter строится один раз и кэшируется (type_adapter).
+Строки из базы считаются доверенными: валидация не выполняется, поэтому
+словари должны содержать ровно поля схемы.
+"""
+
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    TypeAdapter для типа; строится один раз на процесс.
+
+    :param tp: Тип (модель, List[...], TypedDict)
+    :return: Готовый TypeAdapter
+    """
+    return TypeAdapter(tp)
+
+
+def _row_annotation(annotation: Any) -> Any:
+    """Заменяет в аннотации поля модели Pydantic на их row_type (в том числе внутри List и Optional)."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return row_type(annotation)
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Union:
+        return Union[tuple(_row_annotation(arg) for arg in args)]
+    if origin in (list, List) and args:
+        return List[_row_annotation(args[0])]
+    return annotation
+
+
+@lru_cache(maxsize=None)
+def row_type(model: type) -> type:
+    """
+    TypedDict с полями схемы ответа: словарь-строка сериализуется так же, как модель.
+
+    :param model: Схема ответа (подкласс BaseModel)
+    :return: TypedDict с теми же полями и порядком полей
+    """
+    fields = {name: _row_annotation(field.annotation) for name, field in model.model_fields.items()}
+    return TypedDict(f"{model.__name__}Row", fields)
+
+
+def dump_rows(model: type, rows: Iterable[Mapping[str, Any]]) -> bytes:
+    """
+    Сериализует список словарей-строк как JSON-массив схемы model.
+
+    :param model: Схема элемента
+    :param rows: Словари с полями схемы (например, Row._asdict())
+    :return: JSON в байтах
+    """
+    return type_adapter(List[row_type(model)]).dump_json(list(rows))
+
+
+def dump_row(model: type, row: Mapping[str, Any]) -> bytes:
+    """
+    Сериализует один словарь-строку как JSON-объект схемы model.
+
+    :param model: Схема ответа
+    :param row: Словарь с полями схемы
+    :return: JSON в байтах
+    """
+    return type_adapter(row_type(model)).dump_json(row)
+
+
+def json_response(content: bytes, status_code: int = 200) -> Response:
+    """
+    Ответ с уже сериализованным JSON.
+
+    Возвращённый из обработчика Response FastAPI отдаёт как есть, минуя
+    повторную проверку по response_model (она остаётся для документации OpenAPI).
+
+    :param content: JSON в байтах (dump_row, dump_rows)
+    :param status_code: Код ответа
+    :return: Ответ application/json
+    """
+    return Response(content=content, status_code=status_code, media_type="application/json")
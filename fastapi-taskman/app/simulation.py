@@ -0,0 +1,254 @@
+# app/simulation.py
+"""
+Модуль моделирования встреч методом Монте-Карло.
+
+Встреча — серия встречных проверок: в каждом испытании каждый участник группы
+бросает свою характеристику и навык (например, «Фехтование») против каждого
+противника (например, «Уклонение»). Правила броска те же, что в roll_attribute:
+кубик характеристики (запись app.dice, повышенная её значением) плюс бонус навыка.
+
+Броски выполняются векторно в NumPy блоками по simulation_chunk_contests парных
+проверок, блоки раздаются пулу процессов, поэтому расчёт не занимает ни цикл
+событий, ни GIL веб-процесса. Число парных проверок на запрос ограничено
+simulation_max_contests, число одновременных запросов — simulation_max_pending.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Sequence, Tuple
+import asyncio
+import multiprocessing
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.config import settings
+from app.dice import MAX_EXPLOSIONS, DiceExpression
+
+# Параметры броска участника: (кубик, бонус)
+RollParams = Tuple[DiceExpression, int]
+
+
+@dataclass(frozen=True)
+class EncounterStats:
+    """
+    Итоги моделирования встречи.
+
+    Атрибуты:
+        trials (int): Число выполненных испытаний.
+        capped (bool): Было ли число испытаний урезано бюджетом запроса.
+        party_wins (int): Испытания, в которых группа выиграла больше пар, чем проиграла.
+        opponent_wins (int): Испытания, в которых противники выиграли больше пар.
+        draws (int): Испытания с равным счётом.
+        pair_wins (List[List[int]]): Победы участника группы i над противником j.
+        pair_ties (List[List[int]]): Ничьи в паре (i, j).
+        pair_margin_mean (List[List[float]]): Средняя разница результатов в паре (i, j).
+        party_wins_histogram (List[int]): Число испытаний, в которых группа выиграла ровно k пар.
+    """
+    trials: int
+    capped: bool
+    party_wins: int
+    opponent_wins: int
+    draws: int
+    pair_wins: List[List[int]]
+    pair_ties: List[List[int]]
+    pair_margin_mean: List[List[float]]
+    party_wins_histogram: List[int]
+
+
+def _roll_expression(rng: np.random.Generator, dice: DiceExpression, trials: int) -> np.ndarray:
+    """Векторный аналог DiceExpression.roll: итоги trials бросков выражения."""
+    totals = np.full(trials, dice.modifier, dtype=np.int32)
+    for term in dice.terms:
+        values = rng.integers(1, term.sides + 1, size=(trials, term.count), dtype=np.int32)
+        if term.explode:
+            exploding = values == term.sides
+            for _ in range(MAX_EXPLOSIONS):
+                if not exploding.any():
+                    break
+                extra = rng.integers(1, term.sides + 1, size=int(exploding.sum()), dtype=np.int32)
+                values[exploding] += extra
+                exploding[exploding] = extra == term.sides
+        if term.keep != term.count:
+            values = np.sort(values, axis=1)
+            values = values[:, -term.keep:] if term.keep_highest else values[:, :term.keep]
+        totals += term.sign * values.sum(axis=1, dtype=np.int32)
+    return totals
+
+
+def _roll(rng: np.random.Generator, params: Sequence[RollParams], trials: int) -> np.ndarray:
+    """Бросает кубики всех участников: массив trials × участники с учётом бонусов."""
+    return np.stack([_roll_expression(rng, dice, trials) + bonus for dice, bonus in params], axis=1)
+
+
+def simulate_chunk(party: Sequence[RollParams], opponents: Sequence[RollParams], trials: int,
+                   seed: np.random.SeedSequence) -> Tuple[np.ndarray, ...]:
+    """
+    Моделирует блок испытаний. Выполняется в процессе пула.
+
+    Аргументы:
+    party (Sequence[RollParams]): параметры бросков участников группы.
+    opponents (Sequence[RollParams]): параметры бросков противников.
+    trials (int): число испытаний в блоке.
+    seed (np.random.SeedSequence): независимое зерно блока.
+
+    Возвращает:
+    Tuple[np.ndarray, ...]: исходы испытаний (победы группы, противников, ничьи),
+    победы, ничьи и сумма разниц по парам, гистограмма выигранных группой пар.
+    """
+    rng = np.random.default_rng(seed)
+    # margin[t, i, j] — насколько участник i превзошёл противника j в испытании t
+    margin = _roll(rng, party, trials)[:, :, None] - _roll(rng, opponents, trials)[:, None, :]
+    won = margin > 0
+    lost = margin < 0
+
+    party_won = won.sum(axis=(1, 2))
+    party_lost = lost.sum(axis=(1, 2))
+    outcomes = np.array([
+        np.count_nonzero(party_won > party_lost),
+        np.count_nonzero(party_won < party_lost),
+        np.count_nonzero(party_won == party_lost),
+    ])
+    pairs = len(party) * len(opponents)
+    return (
+        outcomes,
+        won.sum(axis=0),
+        (margin == 0).sum(axis=0),
+        margin.sum(axis=0, dtype=np.int64),
+        np.bincount(party_won, minlength=pairs + 1),
+    )
+
+
+class EncounterSimulator:
+    """
+    Сервис моделирования встреч на ограниченном пуле процессов.
+
+    Пул создаётся при первом запросе. Если одновременно выполняется уже
+    max_pending моделирований, новый запрос сразу получает 503. Место запроса
+    освобождается, когда завершатся все его блоки: при отмене запроса ещё не
+    начатые блоки отменяются, а начатые дорабатывают в процессах пула.
+    """
+
+    def __init__(self, workers: int, max_pending: int, max_contests: int, chunk_contests: int):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._max_contests = max_contests
+        self._chunk_contests = chunk_contests
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: веб-процесс многопоточный, fork в нём небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _acquire(self) -> None:
+        """Резервирует место или отклоняет запрос с кодом 503."""
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Сервер перегружен, повторите попытку позже",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _release_after(self, futures: List[Future]) -> None:
+        """Освобождает место запроса по завершении (или отмене) последнего из его блоков."""
+        if not futures:
+            self._release()
+            return
+        remaining = len(futures)
+
+        def done(_future: Future) -> None:
+            nonlocal remaining
+            with self._lock:
+                remaining -= 1
+                if remaining == 0:
+                    self._pending -= 1
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def pending(self) -> int:
+        """Число запросов, занимающих место в пуле."""
+        with self._lock:
+            return self._pending
+
+    def budget(self, trials: int, pairs: int) -> int:
+        """Число испытаний, которое поместится в бюджет запроса."""
+        return max(1, min(trials, self._max_contests // pairs))
+
+    async def simulate(self, party: Sequence[RollParams], opponents: Sequence[RollParams],
+                       trials: int, seed: Optional[int] = None) -> EncounterStats:
+        """
+        Моделирует встречу, распределяя блоки испытаний по процессам пула.
+
+        Аргументы:
+        party (Sequence[RollParams]): параметры бросков участников группы.
+        opponents (Sequence[RollParams]): параметры бросков противников.
+        trials (int): запрошенное число испытаний.
+        seed (Optional[int]): зерно для воспроизводимого результата.
+
+        Возвращает:
+        EncounterStats: итоги моделирования.
+        """
+        pairs = len(party) * len(opponents)
+        budget = self.budget(trials, pairs)
+        chunk = max(1, self._chunk_contests // pairs)
+        sizes = [chunk] * (budget // chunk) + ([budget % chunk] if budget % chunk else [])
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        self._acquire()
+        futures: List[Future] = []
+        try:
+            executor = self._get_executor()
+            for size, chunk_seed in zip(sizes, seeds):
+                futures.append(executor.submit(simulate_chunk, tuple(party), tuple(opponents), size, chunk_seed))
+            chunks = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        except BaseException:
+            # Запрос отменён или блок упал: ещё не начатые блоки не нужны
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            # Место занято, пока начатые блоки не доработают в процессах пула
+            self._release_after(futures)
+
+        outcomes, wins, ties, margin_sum, histogram = (sum(parts) for parts in zip(*chunks))
+        return EncounterStats(
+            trials=budget,
+            capped=budget < trials,
+            party_wins=int(outcomes[0]),
+            opponent_wins=int(outcomes[1]),
+            draws=int(outcomes[2]),
+            pair_wins=wins.tolist(),
+            pair_ties=ties.tolist(),
+            pair_margin_mean=(margin_sum / budget).tolist(),
+            party_wins_histogram=histogram.tolist(),
+        )
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов, если он был создан."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+encounter_simulator = EncounterSimulator(
+    settings.simulation_workers,
+    settings.simulation_max_pending,
+    settings.simulation_max_contests,
+    settings.simulation_chunk_contests,
+)
@@ -1,192 +1,232 @@
-# app/skill.py
-"""Модуль инициализации характеристик и навыков в базе данных."""
-
-from sqlalchemy import create_engine
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
-
-from app.models.models import Attribute, Skill
-from app.models.database import DATABASE_URL
-
-# Установка соединения с базой данных
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = Session()
-
-# Список характеристик и их значений (просто числовые значения от 1 до 5)
-attributes = [
-    {"name": "Физ форма", "value": 1},
-    {"name": "Сноровка", "value": 1},
-    {"name": "Восприятие", "value": 1},
-    {"name": "Мудрость", "value": 1},
-    {"name": "Интеллект", "value": 1},
-    {"name": "Интуиция", "value": 1},
-    {"name": "Харизма", "value": 1},
-    {"name": "Сила воли", "value": 1},
-    {"name": "Эмпатия", "value": 1},
-]
-
-# Список навыков и связанных с ними характеристик
-skills = [
-    {"name": "Атлетика", "attribute_name": "Физ форма", "bonus": 0},
-    {"name": "Ратное дело", "attribute_name": "Физ форма", "bonus": 0},
-    {"name": "Блокирование", "attribute_name": "Физ форма", "bonus": 0},
-    {"name": "Рукопашный бой", "attribute_name": "Физ форма", "bonus": 0},
-    {"name": "Выживание*", "attribute_name": "Физ форма", "bonus": 0},
-    {"name": "Проворство", "attribute_name": "Сноровка", "bonus": 0},
-    {"name": "Фехтование", "attribute_name": "Сноровка", "bonus": 0},
-    {"name": "Скрытность", "attribute_name": "Сноровка", "bonus": 0},
-    {"name": "Боевое искусство", "attribute_name": "Сноровка", "bonus": 0},
-    {"name": "Уклонение", "attribute_name": "Сноровка", "bonus": 0},
-    {"name": "Внимательность", "attribute_name": "Восприятие", "bonus": 0},
-    {"name": "Стрелковое оружие", "attribute_name": "Восприятие", "bonus": 0},
-    {"name": "Огнестрельное оружие", "attribute_name": "Восприятие", "bonus": 0},
-    {"name": "Метание", "attribute_name": "Восприятие", "bonus": 0},
-    {"name": "Реакция", "attribute_name": "Восприятие", "bonus": 0},
-    {"name": "Эрудиция", "attribute_name": "Мудрость", "bonus": 0},
-    {"name": "Тактика", "attribute_name": "Мудрость", "bonus": 0},
-    {"name": "Языки*", "attribute_name": "Мудрость", "bonus": 0},
-    {"name": "Авторитет", "attribute_name": "Мудрость", "bonus": 0},
-    {"name": "Ритуализм", "attribute_name": "Мудрость", "bonus": 0},
-    {"name": "Знания", "attribute_name": "Интеллект", "bonus": 0},
-    {"name": "Анализ", "attribute_name": "Интеллект", "bonus": 0},
-    {"name": "Матрица", "attribute_name": "Интеллект", "bonus": 0},
-    {"name": "Пиротехника", "attribute_name": "Интеллект", "bonus": 0},
-    {"name": "Артефакторика", "attribute_name": "Интеллект", "bonus": 0},
-    {"name": "Понимание", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Смекалка", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Чутьё", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Концептуализация", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Прорицание", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Убеждение", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Имитация", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Лидерство", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Обман", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Торг", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Давление", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Хладнокровие", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Решительность", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Превозмогание", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Концентрация", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Влияние", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Оценка поведения", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Выступление", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Проницательность", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Самоанализ", "attribute_name": "Эмпатия", "bonus": 0},
-]
-
-
-def add_attributes_and_skills():
-    """Добавляет характеристики и навыки в базу данных, если их ещё нет."""
+# app/skills.py
+"""
+Модуль справочника характеристик и навыков: декларация и её применение к базе.
+
+Справочник задан декларативно (CATALOG) и применяется целиком, по одной
+команде INSERT ... ON CONFLICT DO UPDATE на таблицу: существующие записи
+находятся по названию и приводятся к декларации, недостающие добавляются.
+Записи, которых нет в декларации, не удаляются: на них могут ссылаться
+характеристики и навыки персонажей.
+
+Ключ конфликта — уникальные индексы названий из миграции 0002. В базе
+без них (схема не обновлена миграциями, например применение справочника
+в обход init_db) справочник применяется медленнее, через ORM: записи ищутся
+по названию одним запросом на таблицу, и в журнал пишется предупреждение
+с просьбой выполнить alembic upgrade head.
+
+Контрольная сумма применённой декларации хранится в таблице seed_state.
+При запуске приложения (lifespan) сумма сверяется одним запросом по
+первичному ключу, и если декларация не менялась, справочник не трогается.
+
+Применить вручную (--force — даже если сумма совпадает):
+    python3 -m app.skills [--force]
+"""
+
+from datetime import datetime, timezone
+from typing import NamedTuple, Tuple
+import argparse
+import hashlib
+import json
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.catalog import catalog_cache
+from app.models.models import Attribute, SeedState, Skill
+
+logger = logging.getLogger(__name__)
+
+# Имя набора данных в seed_state
+CATALOG_SEED = "catalog"
+
+# Бонус навыка в справочнике
+SKILL_BONUS = 0
+
+
+class AttributeSpec(NamedTuple):
+    """
+    Характеристика справочника и её навыки.
+
+    Атрибуты:
+        name (str): Название характеристики.
+        skills (Tuple[str, ...]): Названия навыков характеристики.
+        dice_type (str): Кубик характеристики.
+        value (int): Значение по умолчанию.
+    """
+    name: str
+    skills: Tuple[str, ...]
+    dice_type: str = "1d4"
+    value: int = 1
+
+
+# Порядок задаёт ID при первом заполнении, а значит, и порядок в листе персонажа
+CATALOG: Tuple[AttributeSpec, ...] = (
+    AttributeSpec("Физ форма", ("Атлетика", "Ратное дело", "Блокирование", "Рукопашный бой", "Выживание*")),
+    AttributeSpec("Сноровка", ("Проворство", "Фехтование", "Скрытность", "Боевое искусство", "Уклонение")),
+    AttributeSpec("Восприятие", ("Внимательность", "Стрелковое оружие", "Огнестрельное оружие", "Метание", "Реакция")),
+    AttributeSpec("Мудрость", ("Эрудиция", "Тактика", "Языки*", "Авторитет", "Ритуализм")),
+    AttributeSpec("Интеллект", ("Знания", "Анализ", "Матрица", "Пиротехника", "Артефакторика")),
+    AttributeSpec("Интуиция", ("Понимание", "Смекалка", "Чутьё", "Концептуализация", "Прорицание")),
+    AttributeSpec("Харизма", ("Убеждение", "Имитация", "Лидерство", "Обман", "Торг")),
+    AttributeSpec("Сила воли", ("Давление", "Хладнокровие", "Решительность", "Превозмогание", "Концентрация")),
+    AttributeSpec("Эмпатия", ("Влияние", "Оценка поведения", "Выступление", "Проницательность", "Самоанализ")),
+)
+
+# Диалектные конструкции INSERT с поддержкой ON CONFLICT
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def catalog_checksum(catalog: Tuple[AttributeSpec, ...] = CATALOG) -> str:
+    """
+    Контрольная сумма содержимого декларации.
+
+    :param catalog: Декларация справочника
+    :return: SHA-256 в шестнадцатеричном виде
+    """
+    content = json.dumps([[*spec] for spec in catalog] + [SKILL_BONUS], ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+CATALOG_CHECKSUM = catalog_checksum()
+
+
+def _upsert(dialect: str, model, rows: list, update_columns: Tuple[str, ...]):
+    """
+    Строит одну команду INSERT ... VALUES (...), (...) ON CONFLICT (name) DO UPDATE.
+
+    :param dialect: Имя диалекта базы данных
+    :param model: Модель таблицы (ключ конфликта — уникальное название)
+    :param rows: Строки декларации
+    :param update_columns: Колонки, приводимые к декларации у существующих записей
+    :return: Команда для однократного выполнения
+    """
+    insert = _UPSERT_INSERTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Заполнение справочника не поддерживается для диалекта {dialect}")
+    stmt = insert(model.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[model.__table__.c.name],
+        set_={column: stmt.excluded[column] for column in update_columns},
+    )
+
+
+def _has_unique_names(db: Session) -> bool:
+    """Есть ли у таблиц справочника уникальные индексы названий (ключ ON CONFLICT)."""
+    inspector = inspect(db.connection())
+    for model in (Attribute, Skill):
+        table = model.__tablename__
+        keys = inspector.get_indexes(table) + inspector.get_unique_constraints(table)
+        if not any(key.get("unique", True) and key["column_names"] == ["name"] for key in keys):
+            return False
+    return True
+
+
+def _upsert_catalog(db: Session, dialect: str) -> None:
+    """Применяет справочник одной командой INSERT ... ON CONFLICT на таблицу."""
+    attribute_table = Attribute.__table__
+    # RETURNING отдаёт и вставленные, и обновлённые строки: ID навыкам без отдельного запроса
+    attribute_rows = db.execute(_upsert(dialect, Attribute, [
+        {"name": spec.name, "dice_type": spec.dice_type, "value": spec.value} for spec in CATALOG
+    ], ("dice_type", "value")).returning(attribute_table.c.id, attribute_table.c.name))
+    attribute_ids = {name: attribute_id for attribute_id, name in attribute_rows}
+    db.execute(_upsert(dialect, Skill, [
+        {"name": skill, "attribute_id": attribute_ids[spec.name], "bonus": SKILL_BONUS}
+        for spec in CATALOG for skill in spec.skills
+    ], ("attribute_id", "bonus")))
+
+
+def _merge_catalog(db: Session) -> None:
+    """
+    Применяет справочник через ORM для базы без уникальных индексов названий:
+    существующие записи читаются одним запросом на таблицу, остальные добавляются.
+    """
+    attributes = {
+        attribute.name: attribute
+        for attribute in db.query(Attribute).filter(Attribute.name.in_([spec.name for spec in CATALOG]))
+    }
+    for spec in CATALOG:
+        attribute = attributes.get(spec.name)
+        if attribute is None:
+            attribute = attributes[spec.name] = Attribute(name=spec.name)
+            db.add(attribute)
+        attribute.dice_type = spec.dice_type
+        attribute.value = spec.value
+    db.flush()
+
+    skill_names = [skill for spec in CATALOG for skill in spec.skills]
+    skills = {skill.name: skill for skill in db.query(Skill).filter(Skill.name.in_(skill_names))}
+    for spec in CATALOG:
+        for name in spec.skills:
+            skill = skills.get(name)
+            if skill is None:
+                skill = skills[name] = Skill(name=name)
+                db.add(skill)
+            skill.attribute_id = attributes[spec.name].id
+            skill.bonus = SKILL_BONUS
+    db.flush()
+
+
+def apply_catalog(db: Session, force: bool = False) -> bool:
+    """
+    Приводит справочник в базе к декларации CATALOG, если она изменилась.
+
+    Без изменений выполняется один запрос (строка seed_state по ключу);
+    при изменениях — по одной команде на таблицу справочника и запись суммы,
+    всё в одной транзакции. Повторное и одновременное применение безопасно:
+    каждая команда идемпотентна. В базе без уникальных индексов названий
+    справочник применяется через ORM (_merge_catalog) с предупреждением.
+
+    :param db: Сессия базы данных
+    :param force: Применить, даже если сохранённая сумма совпадает
+    :return: True, если справочник был применён
+    """
+    state = db.get(SeedState, CATALOG_SEED)
+    if state is not None and state.checksum == CATALOG_CHECKSUM and not force:
+        return False
+
+    dialect = db.get_bind().dialect.name
+    if _has_unique_names(db):
+        _upsert_catalog(db, dialect)
+    else:
+        logger.warning(
+            "У таблиц attributes и skills нет уникальных индексов названий: схема базы не обновлена. "
+            "Справочник применяется без ON CONFLICT; выполните alembic upgrade head"
+        )
+        _merge_catalog(db)
+    db.execute(_upsert(dialect, SeedState, [{
+        "name": CATALOG_SEED,
+        "checksum": CATALOG_CHECKSUM,
+        "applied_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    }], ("checksum", "applied_at")))
+    db.commit()
+    # Команды выполнены в обход ORM, события справочника не срабатывали
+    catalog_cache.invalidate()
+    return True
+
+
+def main() -> None:
+    """Применяет справочник из командной строки."""
+    from app.models.database import SessionLocal, init_db  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Заполнение справочника характеристик и навыков")
+    parser.add_argument("--force", action="store_true", help="Применить, даже если справочник не менялся")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
     try:
-        for attr in attributes:
-            existing_attr = session.query(Attribute).filter(
-                Attribute.name == attr["name"]
-            ).first()
-            if not existing_attr:
-                new_attribute = Attribute(
-                    name=attr["name"],
-                    dice_type="1d4",
-                    value=attr["value"]
-                )
-                session.add(new_attribute)
-
-        session.commit()
-
-        for skill in skills:
-            attribute = session.query(Attribute).filter(
-                Attribute.name == skill["attribute_name"]
-            ).first()
-            if attribute:
-                existing_skill = session.query(Skill).filter(
-                    Skill.name == skill["name"]
-                ).first()
-                if not existing_skill:
-                    new_skill = Skill(
-                        name=skill["name"],
-                        attribute_id=attribute.id,
-                        bonus=skill["bonus"]
-                    )
-                    session.add(new_skill)
-
-        session.commit()
-        print("Данные успешно добавлены!")
-
-    except IntegrityError:
-        session.rollback()
-        print("Ошибка добавления данных. Возможно, они уже есть в базе.")
-
+        if apply_catalog(db, force=args.force):
+            print("Справочник применён.")
+        else:
+            print("Справочник не изменился.")
     finally:
-        session.close()
+        db.close()
 
 
 if __name__ == "__main__":
-    add_attributes_and_skills()
-
-    {"name": "Смекалка", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Чутьё", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Концептуализация", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Прорицание", "attribute_name": "Интуиция", "bonus": 0},
-    {"name": "Убеждение", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Имитация", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Лидерство", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Обман", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Торг", "attribute_name": "Харизма", "bonus": 0},
-    {"name": "Давление", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Хладнокровие", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Решительность", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Превозмогание", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Концентрация", "attribute_name": "Сила воли", "bonus": 0},
-    {"name": "Влияние", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Оценка поведения", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Выступление", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Проницательность", "attribute_name": "Эмпатия", "bonus": 0},
-    {"name": "Самоанализ", "attribute_name": "Эмпатия", "bonus": 0},
-]
-
-# Функция для добавления данных в базу
-def add_attributes_and_skills():
-    try:
-        # Добавление характеристик
-        for attr in attributes:
-            existing_attr = session.query(Attribute).filter(Attribute.name == attr["name"]).first()
-            if not existing_attr:
-                new_attribute = Attribute(
-                    name=attr["name"],
-                    dice_type="1d4",
-                    value=attr["value"]
-                )
-                session.add(new_attribute)
-
-        # Сохранение изменений характеристик
-        session.commit()
-
-        # Добавление навыков с бонусом
-        for skill in skills:
-            attribute = session.query(Attribute).filter(Attribute.name == skill["attribute_name"]).first()
-            if attribute:
-                existing_skill = session.query(Skill).filter(Skill.name == skill["name"]).first()
-                if not existing_skill:
-                    new_skill = Skill(
-                        name=skill["name"],
-                        attribute_id=attribute.id,
-                        bonus=skill["bonus"]  # Добавляем бонус
-                    )
-                    session.add(new_skill)
-
-        # Сохранение изменений навыков
-        session.commit()
-
-        print("Данные успешно добавлены!")
-
-    except IntegrityError:
-        session.rollback()
-        print("Ошибка добавления данных. Возможно, эти данные уже есть в базе.")
-
-    finally:
-        session.close()
-
-# Запуск добавления характеристик и навыков
-if __name__ == "__main__":
-    add_attributes_and_skills()
-
+    main()
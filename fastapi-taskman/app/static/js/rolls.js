@@ -1,16 +1,38 @@
 // app/static/js/rolls.js
 
-// Выполнение броска кубика
+// Текст результата броска: "1d8: 5 + 2 = 7"
+function formatRoll(dice, roll, bonus, result) {
+  return `${dice}: ${roll} + ${bonus} = ${result}`;
+}
+
+// Добавление записи в начало истории бросков
+function addHistoryEntry(history, time, skill, attribute, text) {
+  const entry = document.createElement("li");
+  entry.textContent = `[${time.toLocaleTimeString()}] ${skill || "—"} (${attribute}): ${text}`;
+  history.prepend(entry);
+}
+
+// Выполнение броска кубика (сервер сам записывает бросок в журнал)
 async function roll(characterId, attribute, skill, resultElement) {
   try {
-    const response = await fetch(`/characters/roll/${characterId}/${attribute}/${skill}`);
+    const response = await fetch("/characters/roll/batch", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        rolls: [{ character_id: parseInt(characterId), attribute: attribute, skill: skill }]
+      })
+    });
     if (!response.ok) throw new Error("Ошибка при получении результата броска");
 
-    const result = await response.json();
-    console.log(`Результат броска для ${attribute} с навыком ${skill}:`, result);
+    const [result] = await response.json();
+    const text = formatRoll(result.dice, result.rolls[0], result.bonus, result.results[0]);
 
     if (resultElement) {
-      resultElement.textContent = `🎲 ${result.result}`;
+      resultElement.textContent = `🎲 ${text}`;
+    }
+    const history = document.getElementById("roll-history");
+    if (history) {
+      addHistoryEntry(history, new Date(), skill, attribute, text);
     }
   } catch (error) {
     console.error("Ошибка броска:", error);
@@ -20,8 +42,106 @@ async function roll(characterId, attribute, skill, resultElement) {
   }
 }
 
+// Загрузка сохранённой истории бросков персонажа
+async function loadHistory(history) {
+  const characterId = history.dataset.characterId;
+  if (!characterId) return;
+  try {
+    const response = await fetch(`/characters/${characterId}/rolls?limit=20`);
+    if (!response.ok) throw new Error("Ошибка при загрузке истории бросков");
+    const page = await response.json();
+    // Записи приходят новыми первыми; добавляем с конца, чтобы новые оказались сверху
+    page.items.reverse().forEach(item => {
+      const text = formatRoll(item.dice, item.roll, item.bonus, item.result);
+      addHistoryEntry(history, new Date(item.created_at + "Z"), item.skill, item.attribute, text);
+    });
+  } catch (error) {
+    console.error("Ошибка истории бросков:", error);
+  }
+}
+
+// Подписка на стол кампании: броски и изменения персонажей других участников
+const CHARACTER_ACTIONS = { created: "создан", updated: "изменён", deleted: "удалён" };
+
+// Обновление списка персонажей на странице кампании без перезагрузки
+function updateCharacterList(data) {
+  const list = document.getElementById("campaign-characters");
+  if (!list) return;
+  let item = list.querySelector(`[data-character-id="${data.character_id}"]`);
+  if (data.action === "deleted") {
+    if (item) item.remove();
+    return;
+  }
+  if (!item) {
+    item = document.createElement("li");
+    item.dataset.characterId = data.character_id;
+    item.appendChild(document.createElement("a"));
+    list.appendChild(item);
+    const empty = document.getElementById("campaign-characters-empty");
+    if (empty) empty.remove();
+  }
+  const link = item.querySelector("a");
+  link.href = `/characters/${data.character_id}`;
+  link.textContent = data.name;
+}
+
+function showLiveEvent(feed, data) {
+  const entry = document.createElement("li");
+  const time = new Date().toLocaleTimeString();
+  if (data.type === "roll") {
+    const rolls = data.rolls.map((roll, i) => formatRoll(data.dice, roll, data.bonus, data.results[i])).join("; ");
+    entry.textContent = `[${time}] ${data.character_name}: ${data.skill || "—"} (${data.attribute}): ${rolls}`;
+  } else if (data.type === "character") {
+    entry.textContent = `[${time}] Персонаж ${data.name} ${CHARACTER_ACTIONS[data.action] || data.action}`;
+    updateCharacterList(data);
+  } else {
+    return;
+  }
+  feed.prepend(entry);
+}
+
+// Запасной канал — Server-Sent Events: работает через прокси, закрывающие WebSocket.
+// После обрыва браузер переподключается сам и присылает Last-Event-ID.
+function connectCampaignEvents(feed) {
+  const source = new EventSource(`/campaigns/${feed.dataset.campaignId}/events`);
+  ["roll", "character"].forEach(type => {
+    source.addEventListener(type, message => showLiveEvent(feed, JSON.parse(message.data)));
+  });
+  // Пропущенные события уже не восстановить из памяти сервера — перечитываем страницу
+  source.addEventListener("reset", () => window.location.reload());
+}
+
+function connectCampaignFeed(feed) {
+  const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+  const socket = new WebSocket(`${scheme}://${window.location.host}/campaigns/${feed.dataset.campaignId}/ws`);
+  let opened = false;
+
+  socket.addEventListener("open", () => { opened = true; });
+  socket.addEventListener("message", message => showLiveEvent(feed, JSON.parse(message.data)));
+
+  socket.addEventListener("close", () => {
+    if (opened) {
+      // Переподключение после обрыва (в том числе после отключения за медленное чтение)
+      setTimeout(() => connectCampaignFeed(feed), 3000);
+    } else {
+      // WebSocket не проходит (например, режется прокси) — переходим на SSE
+      connectCampaignEvents(feed);
+    }
+  });
+}
+
 // Назначение обработчиков всем кнопкам бросков
 document.addEventListener("DOMContentLoaded", () => {
+  const history = document.getElementById("roll-history");
+  if (history) {
+    loadHistory(history);
+  }
+
+  const feed = document.getElementById("campaign-feed");
+  if (feed) {
+    connectCampaignFeed(feed);
+  }
+
   const buttons = document.querySelectorAll(".roll-button");
   if (buttons.length > 0) {
     buttons.forEach(button => {
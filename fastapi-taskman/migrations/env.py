@@ -0,0 +1,62 @@
+"""Окружение Alembic: подключение к базе приложения и метаданные моделей."""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.models.database import Base, DATABASE_URL, engine_options
+from app.models import models  # noqa: F401  Импорт регистрирует модели в Base.metadata
+from app.config import settings
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Соединение, переданное приложением (app.models.database.init_db)
+CONNECTION = config.attributes.get("connection")
+
+target_metadata = Base.metadata
+
+# URL можно переопределить: alembic -x url=sqlite:///./other.db upgrade head
+DB_URL = context.get_x_argument(as_dictionary=True).get("url", DATABASE_URL)
+
+
+def run_migrations_offline() -> None:
+    """Генерирует SQL без подключения к базе (alembic upgrade --sql)."""
+    context.configure(
+        url=DB_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DB_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite не умеет ALTER для ограничений — Alembic пересоздаёт таблицу
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Применяет миграции к базе из настроек приложения или к переданному соединению."""
+    if CONNECTION is not None:
+        _run_with(CONNECTION)
+        return
+    connectable = create_engine(DB_URL, **engine_options(settings, DB_URL))
+    with connectable.connect() as connection:
+        _run_with(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,91 @@
+"""Исходная схема базы данных
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-05-20 00:00:00
+
+Соответствует таблицам, которые создавал init_db до появления миграций.
+Для существующей базы выполните `alembic stamp 0001`, затем `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nickname', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False, unique=True),
+        sa.Column('password', sa.String(), nullable=False),
+    )
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('gm_id', sa.Integer(), sa.ForeignKey('users.id')),
+    )
+    op.create_table(
+        'characters',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.id'), nullable=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+    )
+    op.create_table(
+        'character_roles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('character_id', sa.Integer(), sa.ForeignKey('characters.id')),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.id')),
+        sa.Column('role', sa.String()),
+    )
+    op.create_table(
+        'attributes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('dice_type', sa.String(), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'skills',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('attribute_id', sa.Integer(), sa.ForeignKey('attributes.id'), nullable=False),
+        sa.Column('bonus', sa.Integer()),
+    )
+    op.create_table(
+        'character_attributes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('character_id', sa.Integer(), sa.ForeignKey('characters.id')),
+        sa.Column('attribute_id', sa.Integer(), sa.ForeignKey('attributes.id')),
+        sa.Column('value', sa.Integer()),
+    )
+    op.create_table(
+        'character_skills',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('character_id', sa.Integer(), sa.ForeignKey('characters.id')),
+        sa.Column('skill_id', sa.Integer(), sa.ForeignKey('skills.id')),
+        sa.Column('bonus', sa.Integer()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        'character_skills', 'character_attributes', 'skills', 'attributes',
+        'character_roles', 'characters', 'campaigns', 'users',
+    ):
+        op.drop_table(table)
@@ -0,0 +1,89 @@
+"""Вторичные индексы и уникальные ограничения
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-05-21 00:00:00
+
+Индексы по внешним ключам и полям поиска, а также уникальность пар
+персонаж/характеристика и персонаж/навык, на которую опирается массовый
+INSERT ... ON CONFLICT в crud_character, и названий характеристик и навыков
+(заполнение справочника, app/skills.py). Повторяющиеся названия сводятся к
+записи с наименьшим ID: ссылки на остальные переводятся на неё.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _delete_duplicates(table: str, key_column: str) -> None:
+    """Оставляет по одной (последней) записи на пару character_id/key_column."""
+    op.execute(sa.text(
+        f"DELETE FROM {table} WHERE id NOT IN ("
+        f"SELECT MAX(id) FROM {table} GROUP BY character_id, {key_column})"
+    ))
+
+
+def _merge_duplicate_names(table: str, references) -> None:
+    """
+    Оставляет по одной (первой) записи на название и переводит на неё ссылки.
+
+    :param table: Таблица справочника (attributes или skills)
+    :param references: Пары (таблица, колонка), ссылающиеся на table.id
+    """
+    keep = f"SELECT MIN(id) FROM {table} GROUP BY name"
+    for ref_table, ref_column in references:
+        op.execute(sa.text(
+            f"UPDATE {ref_table} SET {ref_column} = ("
+            f"SELECT MIN(kept.id) FROM {table} kept JOIN {table} old ON old.name = kept.name "
+            f"WHERE old.id = {ref_table}.{ref_column}) "
+            f"WHERE {ref_column} NOT IN ({keep})"
+        ))
+    op.execute(sa.text(f"DELETE FROM {table} WHERE id NOT IN ({keep})"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Сначала названия: перевод ссылок может создать повторяющиеся пары персонажа
+    _merge_duplicate_names('attributes', [('character_attributes', 'attribute_id'), ('skills', 'attribute_id')])
+    _merge_duplicate_names('skills', [('character_skills', 'skill_id')])
+    _delete_duplicates('character_attributes', 'attribute_id')
+    _delete_duplicates('character_skills', 'skill_id')
+
+    with op.batch_alter_table('character_attributes') as batch_op:
+        batch_op.create_unique_constraint('uq_character_attribute', ['character_id', 'attribute_id'])
+    with op.batch_alter_table('character_skills') as batch_op:
+        batch_op.create_unique_constraint('uq_character_skill', ['character_id', 'skill_id'])
+
+    op.create_index('ix_campaigns_gm_id', 'campaigns', ['gm_id'])
+    op.create_index('ix_characters_campaign_id_id', 'characters', ['campaign_id', 'id'])
+    op.create_index('ix_characters_user_id_id', 'characters', ['user_id', 'id'])
+    op.create_index('ix_character_roles_character_id', 'character_roles', ['character_id'])
+    op.create_index('ix_character_roles_campaign_id', 'character_roles', ['campaign_id'])
+    op.create_index('ix_attributes_name', 'attributes', ['name'], unique=True)
+    op.create_index('ix_skills_name', 'skills', ['name'], unique=True)
+    op.create_index('ix_skills_attribute_id', 'skills', ['attribute_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_skills_attribute_id', table_name='skills')
+    op.drop_index('ix_skills_name', table_name='skills')
+    op.drop_index('ix_attributes_name', table_name='attributes')
+    op.drop_index('ix_character_roles_campaign_id', table_name='character_roles')
+    op.drop_index('ix_character_roles_character_id', table_name='character_roles')
+    op.drop_index('ix_characters_user_id_id', table_name='characters')
+    op.drop_index('ix_characters_campaign_id_id', table_name='characters')
+    op.drop_index('ix_campaigns_gm_id', table_name='campaigns')
+
+    with op.batch_alter_table('character_skills') as batch_op:
+        batch_op.drop_constraint('uq_character_skill', type_='unique')
+    with op.batch_alter_table('character_attributes') as batch_op:
+        batch_op.drop_constraint('uq_character_attribute', type_='unique')
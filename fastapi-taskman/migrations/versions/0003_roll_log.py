@@ -0,0 +1,50 @@
+"""Журнал бросков
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-05-28 00:00:00
+
+Таблица roll_log только пополняется; составные индексы (character_id, id)
+и (campaign_id, id) обслуживают keyset-пагинацию истории.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицу мог создать init_db (create_all) до перехода на миграции
+    if sa.inspect(op.get_bind()).has_table('roll_log'):
+        return
+    op.create_table(
+        'roll_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('character_id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=True),
+        sa.Column('attribute', sa.String(), nullable=False),
+        sa.Column('skill', sa.String(), nullable=True),
+        sa.Column('dice', sa.String(), nullable=False),
+        sa.Column('bonus', sa.Integer(), nullable=False),
+        sa.Column('roll', sa.Integer(), nullable=False),
+        sa.Column('result', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_roll_log_character_id_id', 'roll_log', ['character_id', 'id'])
+    op.create_index('ix_roll_log_campaign_id_id', 'roll_log', ['campaign_id', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_roll_log_campaign_id_id', table_name='roll_log')
+    op.drop_index('ix_roll_log_character_id_id', table_name='roll_log')
+    op.drop_table('roll_log')
@@ -0,0 +1,55 @@
+"""Генератор бросков кампании
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-06-02 00:00:00
+
+campaigns.rng_seed — зерно детерминированного генератора бросков кампании
+(существующим кампаниям назначается случайное); roll_log.rng_nonce и
+roll_log.rng_sequence — поток генератора, из которого получен бросок.
+"""
+from typing import Sequence, Union
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {info['name'] for info in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    campaigns = sa.table('campaigns', sa.column('id', sa.Integer()), sa.column('rng_seed', sa.String()))
+    if not _has_column('campaigns', 'rng_seed'):
+        op.add_column('campaigns', sa.Column('rng_seed', sa.String(), nullable=True))
+        for (campaign_id,) in conn.execute(sa.select(campaigns.c.id)).fetchall():
+            conn.execute(
+                campaigns.update().where(campaigns.c.id == campaign_id).values(rng_seed=secrets.token_hex(16))
+            )
+        with op.batch_alter_table('campaigns') as batch_op:
+            batch_op.alter_column('rng_seed', existing_type=sa.String(), nullable=False)
+
+    # roll_log мог создать init_db (create_all) уже с этими колонками
+    if not _has_column('roll_log', 'rng_nonce'):
+        op.add_column('roll_log', sa.Column('rng_nonce', sa.String(), nullable=True))
+    if not _has_column('roll_log', 'rng_sequence'):
+        op.add_column('roll_log', sa.Column('rng_sequence', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('roll_log') as batch_op:
+        batch_op.drop_column('rng_sequence')
+        batch_op.drop_column('rng_nonce')
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.drop_column('rng_seed')
@@ -0,0 +1,98 @@
+"""Снимки листов персонажей
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-06-04 00:00:00
+
+Таблица character_sheets хранит снимок листа персонажа: его поля, значения
+характеристик и бонусы навыков по ID (app/crud/crud_character_sheet.py).
+Существующим персонажам без снимка снимки строятся здесь же, пачками по ID;
+дальше их перестраивает запись персонажа.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH_SIZE = 1000
+
+_characters = sa.table(
+    'characters',
+    sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('description', sa.Text),
+    sa.column('campaign_id', sa.Integer), sa.column('user_id', sa.Integer),
+)
+_character_attributes = sa.table(
+    'character_attributes',
+    sa.column('character_id', sa.Integer), sa.column('attribute_id', sa.Integer), sa.column('value', sa.Integer),
+)
+_character_skills = sa.table(
+    'character_skills',
+    sa.column('character_id', sa.Integer), sa.column('skill_id', sa.Integer), sa.column('bonus', sa.Integer),
+)
+_character_sheets = sa.table(
+    'character_sheets',
+    sa.column('character_id', sa.Integer), sa.column('version', sa.Integer), sa.column('data', sa.JSON),
+)
+
+
+def _build_sheets(connection, characters) -> list:
+    """Строки снимков для пачки персонажей (тот же вид, что у build_sheet_data)."""
+    ids = [row.id for row in characters]
+    attributes = {character_id: {} for character_id in ids}
+    for row in connection.execute(
+        sa.select(_character_attributes).where(_character_attributes.c.character_id.in_(ids))
+    ):
+        attributes[row.character_id][str(row.attribute_id)] = row.value
+    skills = {character_id: {} for character_id in ids}
+    for row in connection.execute(
+        sa.select(_character_skills).where(_character_skills.c.character_id.in_(ids))
+    ):
+        skills[row.character_id][str(row.skill_id)] = row.bonus
+    return [
+        {
+            'character_id': row.id,
+            'version': 1,
+            'data': {'character': dict(row._mapping), 'attributes': attributes[row.id], 'skills': skills[row.id]},
+        }
+        for row in characters
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    # Таблицу мог создать init_db (create_all) до перехода на миграции
+    if not sa.inspect(connection).has_table('character_sheets'):
+        op.create_table(
+            'character_sheets',
+            sa.Column('character_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('data', sa.JSON(), nullable=False),
+            sa.ForeignKeyConstraint(['character_id'], ['characters.id']),
+            sa.PrimaryKeyConstraint('character_id'),
+        )
+
+    # Снимки строятся только персонажам, у которых их ещё нет
+    has_sheet = sa.exists().where(_character_sheets.c.character_id == _characters.c.id)
+    after_id = 0
+    while True:
+        characters = connection.execute(
+            sa.select(_characters).where(_characters.c.id > after_id, ~has_sheet)
+            .order_by(_characters.c.id).limit(_BATCH_SIZE)
+        ).all()
+        if not characters:
+            break
+        connection.execute(sa.insert(_character_sheets), _build_sheets(connection, characters))
+        after_id = characters[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('character_sheets')
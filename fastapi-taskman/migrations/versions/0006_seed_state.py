@@ -0,0 +1,40 @@
+"""Состояние начальных данных
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-06-08 00:00:00
+
+Таблица seed_state хранит контрольную сумму применённого справочника
+характеристик и навыков (app/skills.py). Строка появляется при первом
+запуске приложения или python3 -m app.skills.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицу мог создать init_db (create_all) до перехода на миграции
+    if sa.inspect(op.get_bind()).has_table('seed_state'):
+        return
+    op.create_table(
+        'seed_state',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('checksum', sa.String(), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('seed_state')
@@ -0,0 +1,40 @@
+"""Секреты установки
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-06-09 00:00:00
+
+Таблица install_secrets хранит случайные значения, создаваемые один раз на
+установку: зерно генератора бросков персонажей без кампании
+(app/campaign_rng.py) вместо ключа, выведенного из secret_key. Строка
+появляется при первом таком броске.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицу мог создать init_db (create_all) до перехода на миграции
+    if sa.inspect(op.get_bind()).has_table('install_secrets'):
+        return
+    op.create_table(
+        'install_secrets',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('install_secrets')
@@ -0,0 +1,39 @@
+"""Версии страниц
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-06-10 00:00:00
+
+Таблица page_versions хранит счётчики версий сущностей для кэша страниц
+(app/page_cache.py), общие для всех процессов. Строка сущности появляется
+при её первой записи; до этого её версия считается нулевой.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицу мог создать init_db (create_all) до перехода на миграции
+    if sa.inspect(op.get_bind()).has_table('page_versions'):
+        return
+    op.create_table(
+        'page_versions',
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('entity'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('page_versions')
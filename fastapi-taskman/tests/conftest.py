@@ -0,0 +1,16 @@
+# tests/conftest.py
+"""Общие фикстуры тестов: схема моделей в SQLite в памяти."""
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.models.database import Base
+
+
+@pytest.fixture
+def engine():
+    """Движок SQLite в памяти со схемой, созданной по моделям (create_all)."""
+    target = create_engine("sqlite://")
+    Base.metadata.create_all(target)
+    yield target
+    target.dispose()
@@ -0,0 +1,41 @@
+# tests/test_campaign_membership.py
+"""Участие пользователя в кампании (crud_campaign.is_campaign_member)."""
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.crud.crud_campaign import is_campaign_member
+from app.models.models import Campaign, Character, CharacterRole
+
+GM_ID, OWNER_ID, PLAYER_ID, STRANGER_ID = 1, 2, 3, 4
+
+
+@pytest.fixture
+def db(engine):
+    """Кампания с ведущим, владельцем персонажа и игроком с ролью; вторая кампания без участников."""
+    with Session(engine) as session:
+        session.execute(insert(Campaign), [
+            {"id": 1, "name": "Кампания", "description": "Описание", "gm_id": GM_ID, "rng_seed": "1"},
+            {"id": 2, "name": "Другая", "description": "Описание", "gm_id": STRANGER_ID, "rng_seed": "2"},
+        ])
+        session.execute(insert(Character), [{"id": 1, "name": "Герой", "user_id": OWNER_ID, "campaign_id": 1}])
+        session.execute(insert(CharacterRole), [
+            {"character_id": 1, "user_id": PLAYER_ID, "campaign_id": 1, "role": "Player"},
+        ])
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize("user_id", [GM_ID, OWNER_ID, PLAYER_ID])
+def test_members(db, user_id):
+    assert is_campaign_member(db, db.get(Campaign, 1), user_id)
+
+
+def test_stranger_is_not_member(db):
+    assert not is_campaign_member(db, db.get(Campaign, 1), STRANGER_ID)
+
+
+@pytest.mark.parametrize("user_id", [OWNER_ID, PLAYER_ID])
+def test_membership_is_per_campaign(db, user_id):
+    assert not is_campaign_member(db, db.get(Campaign, 2), user_id)
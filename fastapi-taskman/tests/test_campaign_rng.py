@@ -0,0 +1,92 @@
+# tests/test_campaign_rng.py
+"""Генератор бросков кампании (app/campaign_rng.py): пакетные броски и их повтор."""
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.campaign_rng import CampaignNotFound, CampaignRng, install_seed
+from app.config import settings
+from app.crud import crud_campaign
+from app.dice import compile_dice
+from app.models.models import Campaign, InstallSecret
+from app.schemas.campaign import CampaignCreate
+
+EXPRESSIONS = ["1d4", "1d12", "3d6", "2d8+1d6-2", "8d6", "9d4", "4d6kh3", "2d10!+1d6", "5"]
+
+
+@pytest.fixture
+def rng():
+    return CampaignRng("проверка")
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_roll_many_matches_replay(rng, expression):
+    dice = compile_dice(expression)
+
+    rolled = rng.roll_many(None, dice, 200)
+
+    assert [sequence for _, sequence in rolled] == list(range(1, 201))
+    for result, sequence in rolled:
+        assert result == rng.replay(None, dice, rng.nonce, sequence)
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_roll_many_matches_single_rolls(expression):
+    dice = compile_dice(expression)
+    batch, single = CampaignRng("проверка"), CampaignRng("проверка")
+    single.nonce = batch.nonce
+
+    rolled = batch.roll_many(None, dice, 50)
+
+    assert rolled == [(result, sequence) for result, _, sequence in (single.roll(None, dice) for _ in range(50))]
+
+
+def test_rolls_stay_within_die(rng):
+    totals = [result.total for result, _ in rng.roll_many(None, compile_dice("1d6"), 2000)]
+
+    assert set(totals) == set(range(1, 7))
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        session.execute(insert(Campaign), [{"id": 1, "name": "Кампания", "description": "", "gm_id": 1, "rng_seed": "a"}])
+        session.commit()
+        yield session
+
+
+def test_missing_campaign_is_reported(db):
+    rng = CampaignRng()
+
+    with pytest.raises(CampaignNotFound) as error:
+        rng.load_keys(db, [1, 2])
+    assert error.value.campaign_ids == [2]
+    with pytest.raises(CampaignNotFound):
+        rng.key(2)
+    assert rng.key(1) is not None
+
+
+def test_default_key_comes_from_install_seed(db):
+    dice = compile_dice("3d6")
+    first, second = CampaignRng(), CampaignRng()
+    second.nonce = first.nonce
+
+    first.load_keys(db, [None])
+    second.load_keys(db, [None])
+
+    # Зерно создано один раз и общее для всех процессов установки
+    assert db.execute(select(InstallSecret.value)).scalars().all() == [install_seed(db)]
+    assert first.roll(None, dice) == second.roll(None, dice)
+    # Ключ не выводится из secret_key
+    predictable = CampaignRng(settings.secret_key)
+    assert [first.replay(None, dice, "n", sequence) for sequence in range(1, 11)] != \
+        [predictable.replay(None, dice, "n", sequence) for sequence in range(1, 11)]
+
+
+def test_seed_is_not_taken_from_request(db):
+    campaign = crud_campaign.create_campaign(
+        db, CampaignCreate.model_validate({"name": "Новая", "description": "Описание", "rng_seed": "a"}), gm_id=1,
+    )
+
+    assert campaign.rng_seed and campaign.rng_seed != "a"
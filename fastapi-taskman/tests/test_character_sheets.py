@@ -0,0 +1,76 @@
+# tests/test_character_sheets.py
+"""Снимки листов персонажей (crud_character_sheet): запись при изменении, чтение без записи."""
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.catalog import load_catalog
+from app.crud.crud_character_sheet import get_character_sheet, rebuild_character_sheets, sheet_context
+from app.models.models import Attribute, Character, CharacterAttribute, CharacterSheet, CharacterSkill, Skill
+
+
+@pytest.fixture
+def db(engine):
+    """Справочник из двух характеристик и навыка; персонаж со значениями, но без снимка."""
+    with Session(engine) as session:
+        session.execute(insert(Attribute), [
+            {"id": 1, "name": "Сила", "dice_type": "1d4", "value": 1},
+            {"id": 2, "name": "Ловкость", "dice_type": "1d4", "value": 1},
+        ])
+        session.execute(insert(Skill), [{"id": 1, "name": "Атлетика", "attribute_id": 1, "bonus": 0}])
+        session.execute(insert(Character), [{"id": 1, "name": "Герой", "description": "Описание", "user_id": 1}])
+        session.execute(insert(CharacterAttribute), [{"character_id": 1, "attribute_id": 1, "value": 3}])
+        session.execute(insert(CharacterSkill), [{"character_id": 1, "skill_id": 1, "bonus": 2}])
+        session.commit()
+        yield session
+
+
+def test_read_without_sheet_does_not_write(db):
+    data = get_character_sheet(db, 1)
+
+    assert data["attributes"] == {"1": 3}
+    assert not db.new and not db.dirty
+    assert db.scalars(select(CharacterSheet)).first() is None
+
+
+def test_missing_character(db):
+    assert get_character_sheet(db, 2) is None
+
+
+def test_sheet_stores_only_character_data(db):
+    rebuild_character_sheets(db, [1])
+    db.commit()
+
+    assert db.get(CharacterSheet, 1).data == {
+        "character": {"id": 1, "name": "Герой", "description": "Описание", "campaign_id": None, "user_id": 1},
+        "attributes": {"1": 3},
+        "skills": {"1": 2},
+    }
+
+
+def test_rebuild_bumps_version(db):
+    rebuild_character_sheets(db, [1])
+    db.commit()
+    db.get(Character, 1).name = "Другой"
+    rebuild_character_sheets(db, [1])
+    db.commit()
+
+    sheet = db.get(CharacterSheet, 1)
+    assert sheet.version == 2
+    assert sheet.data["character"]["name"] == "Другой"
+
+
+def test_context_joins_current_catalog(db):
+    rebuild_character_sheets(db, [1])
+    db.commit()
+    # Переименование в справочнике видно без перестройки снимка
+    db.get(Skill, 1).name = "Бег"
+    db.commit()
+
+    context = sheet_context(load_catalog(db), get_character_sheet(db, 1))
+
+    assert context["attribute_names"] == ["Сила", "Ловкость"]
+    assert [skill.name for skill in context["grouped_skills"]["Сила"]] == ["Бег"]
+    assert context["char_attr_values"] == {"Сила": 3}
+    assert context["char_skill_values"] == {"Бег": 2}
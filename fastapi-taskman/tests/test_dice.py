@@ -0,0 +1,47 @@
+# tests/test_dice.py
+"""Запись бросков и кубик характеристики (app/dice.py)."""
+
+import pytest
+
+from app.dice import DiceSyntaxError, attribute_dice, compile_dice
+
+
+@pytest.mark.parametrize("value, notation", [(1, "1d4"), (2, "1d6"), (3, "1d8"), (4, "1d10"), (5, "1d12")])
+def test_attribute_dice_ladder(value, notation):
+    # Значения 1–5 совпадают с прежней таблицей roll_attribute
+    assert attribute_dice("1d4", value).notation == notation
+
+
+@pytest.mark.parametrize("value", [6, 7, 100])
+def test_attribute_dice_clamps_to_top_of_ladder(value):
+    # Прежняя таблица давала d4 для значений выше 5; теперь высокая характеристика бросает d12
+    assert attribute_dice("1d4", value).notation == "1d12"
+
+
+@pytest.mark.parametrize("value", [0, -3])
+def test_attribute_dice_below_one_is_base_die(value):
+    assert attribute_dice("1d4", value).notation == "1d4"
+
+
+def test_attribute_dice_uses_base_die_type():
+    assert attribute_dice("1d8", 2).notation == "1d10"
+    assert attribute_dice("2d6+1", 3).notation == "2d10+1"
+    # Кубики вне лестницы значение характеристики не меняет
+    assert attribute_dice("1d20", 4).notation == "1d20"
+
+
+def test_stepped_down_clamps_to_bottom_of_ladder():
+    assert compile_dice("1d6").stepped(-5).notation == "1d4"
+
+
+@pytest.mark.parametrize("expression, notation", [
+    ("1d4", "1d4"), ("d%", "1d100"), ("4d6k3", "4d6kh3"), ("2d10! + 1d6 - 2", "2d10!+1d6-2"), ("1d20kl1+5", "1d20+5"),
+])
+def test_compile_dice_notation(expression, notation):
+    assert compile_dice(expression).notation == notation
+
+
+@pytest.mark.parametrize("expression", ["", "1d4 2", "0d6", "1d1!", "3d6kh4", "d"])
+def test_compile_dice_rejects_invalid(expression):
+    with pytest.raises(DiceSyntaxError):
+        compile_dice(expression)
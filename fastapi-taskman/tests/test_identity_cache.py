@@ -0,0 +1,102 @@
+# tests/test_identity_cache.py
+"""Кэш аутентифицированных пользователей (app/auth/identity_cache.py)."""
+
+import time
+
+import pytest
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.auth.identity_cache import IdentityCache, identity_cache
+from app.models.models import User
+
+
+def make_user(user_id: int) -> User:
+    return User(id=user_id, nickname=f"user{user_id}", email=f"user{user_id}@example.com", password="x")
+
+
+def test_ttl_capped_by_token_exp():
+    cache = IdentityCache(8, 60)
+    cache.put("token", make_user(1), token_exp=time.time() + 0.05)
+
+    assert cache.get("token").id == 1
+    time.sleep(0.1)
+    assert cache.get("token") is None
+
+
+def test_expired_token_not_cached():
+    cache = IdentityCache(8, 60)
+    cache.put("token", make_user(1), token_exp=time.time() - 1)
+
+    assert cache.get("token") is None
+
+
+def test_least_recently_used_evicted():
+    cache = IdentityCache(2, 60)
+    cache.put("a", make_user(1))
+    cache.put("b", make_user(2))
+    cache.get("a")
+    cache.put("c", make_user(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a").id == 1
+    assert cache.get("c").id == 3
+
+
+@pytest.fixture
+def db(engine):
+    """Два пользователя, оба в глобальном кэше (его сбрасывают события сессии)."""
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"id": user.id, "nickname": user.nickname, "email": user.email, "password": user.password}
+            for user in (make_user(1), make_user(2))
+        ])
+        session.commit()
+        identity_cache.clear()
+        identity_cache.put("first", session.get(User, 1))
+        identity_cache.put("second", session.get(User, 2))
+        yield session
+    identity_cache.clear()
+
+
+def cached_ids():
+    return [user.id for user in (identity_cache.get("first"), identity_cache.get("second")) if user is not None]
+
+
+def test_update_invalidates_user(db):
+    db.get(User, 1).nickname = "Другой"
+    db.flush()
+    assert cached_ids() == [1, 2]
+
+    db.commit()
+    assert cached_ids() == [2]
+
+
+def test_delete_invalidates_user(db):
+    db.delete(db.get(User, 2))
+    db.commit()
+
+    assert cached_ids() == [1]
+
+
+def test_rollback_keeps_entries(db):
+    db.get(User, 1).nickname = "Другой"
+    db.flush()
+    db.rollback()
+
+    assert cached_ids() == [1, 2]
+
+
+@pytest.mark.parametrize("write", [
+    lambda db: db.query(User).filter(User.id == 1).update({"nickname": "Другой"}),
+    lambda db: db.query(User).filter(User.id == 1).delete(),
+    lambda db: db.execute(update(User).where(User.id == 1).values(nickname="Другой")),
+    lambda db: db.execute(delete(User).where(User.id == 1)),
+])
+def test_bulk_write_clears_cache(db, write):
+    # Массовая запись не сообщает изменённые ID — после commit кэш пуст
+    write(db)
+    assert cached_ids() == [1, 2]
+
+    db.commit()
+    assert cached_ids() == []
@@ -0,0 +1,118 @@
+# tests/test_init_db.py
+"""
+Инициализация базы (app.models.database.init_db): схема приводится к
+последней миграции Alembic для новой базы, для базы, созданной до миграций,
+и для базы, в которую прежний init_db уже добавил таблицы через create_all.
+"""
+
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.models.database import Base, init_db
+from app.models.models import Attribute, Campaign, CharacterAttribute, CharacterSheet, CharacterSkill, Skill
+
+COMMITTED_DB = Path(__file__).resolve().parent.parent / "app" / "app.db"
+
+
+def alembic_config(url: str) -> Config:
+    config = Config("alembic.ini")
+    config.cmd_opts = Namespace(x=[f"url={url}"])
+    return config
+
+
+def head() -> str:
+    return ScriptDirectory.from_config(alembic_config("sqlite://")).get_current_head()
+
+
+def assert_at_head(engine):
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        assert context.get_current_revision() == head()
+        assert compare_metadata(context, Base.metadata) == []
+
+
+def legacy_engine(tmp_path):
+    """База в исходной схеме (0001) без таблицы alembic_version, как до миграций."""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    command.upgrade(alembic_config(url), "0001")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+    return engine
+
+
+def test_new_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    init_db(engine)
+    init_db(engine)
+    assert_at_head(engine)
+
+
+def test_database_before_migrations(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO campaigns (id, name, description, gm_id) VALUES (1, 'К', 'О', 1)"))
+    init_db(engine)
+
+    assert_at_head(engine)
+    with Session(engine) as db:
+        assert db.get(Campaign, 1).rng_seed
+
+
+def test_database_after_create_all(tmp_path):
+    # Прежний init_db добавлял новые таблицы create_all, но не колонки и индексы
+    engine = legacy_engine(tmp_path)
+    Base.metadata.create_all(engine)
+    init_db(engine)
+    assert_at_head(engine)
+
+
+def test_models_schema_without_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    Base.metadata.create_all(engine)
+    init_db(engine)
+    assert_at_head(engine)
+
+
+def test_duplicate_catalog_names_are_merged(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO attributes (id, name, dice_type, value) VALUES (1, 'Сила', '1d4', 1), (2, 'Сила', '1d4', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO skills (id, name, attribute_id, bonus) VALUES (1, 'Бег', 2, 0), (2, 'Бег', 1, 0)"
+        ))
+        connection.execute(text("INSERT INTO characters (id, name, user_id) VALUES (1, 'Герой', 1)"))
+        connection.execute(text(
+            "INSERT INTO character_attributes (id, character_id, attribute_id, value) VALUES (1, 1, 1, 2), (2, 1, 2, 3)"
+        ))
+        connection.execute(text("INSERT INTO character_skills (id, character_id, skill_id, bonus) VALUES (1, 1, 2, 4)"))
+    init_db(engine)
+
+    with Session(engine) as db:
+        assert db.scalars(select(Attribute.id)).all() == [1]
+        assert db.execute(select(Skill.id, Skill.attribute_id)).all() == [(1, 1)]
+        # Из повторяющихся пар персонажа остаётся последняя
+        assert db.execute(select(CharacterAttribute.attribute_id, CharacterAttribute.value)).all() == [(1, 3)]
+        assert db.execute(select(CharacterSkill.skill_id, CharacterSkill.bonus)).all() == [(1, 4)]
+        assert db.get(CharacterSheet, 1).data["attributes"] == {"1": 3}
+
+
+@pytest.mark.skipif(not COMMITTED_DB.exists(), reason="нет app/app.db")
+def test_committed_database(tmp_path):
+    path = tmp_path / "app.db"
+    shutil.copy(COMMITTED_DB, path)
+    engine = create_engine(f"sqlite:///{path}")
+    init_db(engine)
+    assert_at_head(engine)
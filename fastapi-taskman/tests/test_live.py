@@ -0,0 +1,103 @@
+# tests/test_live.py
+"""Живой стол кампании (app/live.py): доступ к WebSocket-каналу и потоку SSE, буферы событий."""
+
+import asyncio
+
+import pytest
+from fastapi import Query
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.websockets import WebSocketDisconnect
+
+from app.dependencies import get_stream_user, get_websocket_user
+from app.live import CampaignHub
+from app.main import app
+from app.models.database import Base, get_db
+from app.models.models import Campaign, User
+
+GM_ID, STRANGER_ID = 1, 2
+
+
+def as_user(user_id: int = Query(..., alias="user")) -> User:
+    """Пользователь из параметра user вместо токена."""
+    return User(id=user_id)
+
+
+@pytest.fixture
+def client(tmp_path):
+    # Зависимости выполняются в пуле потоков, поэтому база в файле, а не в памяти соединения
+    engine = create_engine(f"sqlite:///{tmp_path / 'live.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(Campaign), [
+            {"id": 1, "name": "Кампания", "description": "Описание", "gm_id": GM_ID, "rng_seed": "1"},
+        ])
+        session.commit()
+    factory = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_websocket_user] = as_user
+    app.dependency_overrides[get_stream_user] = as_user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def test_member_connects(client):
+    with client.websocket_connect(f"/campaigns/1/ws?user={GM_ID}"):
+        pass
+
+
+@pytest.mark.parametrize("path, reason", [
+    (f"/campaigns/1/ws?user={STRANGER_ID}", "События кампании доступны только её участникам"),
+    (f"/campaigns/2/ws?user={GM_ID}", "Кампания не найдена"),
+])
+def test_connection_rejected_before_accept(client, path, reason):
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect(path):
+            pass
+    assert (error.value.code, error.value.reason) == (1008, reason)
+
+
+@pytest.mark.parametrize("path, status", [
+    (f"/campaigns/1/events?user={STRANGER_ID}", 403),
+    (f"/campaigns/2/events?user={GM_ID}", 404),
+])
+def test_events_rejected_before_stream(client, path, status):
+    response = client.get(path)
+    assert response.status_code == status
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_buffer_dropped_without_subscribers():
+    async def scenario():
+        hub = CampaignHub(4, 8)
+        subscription = hub.subscribe(1)
+        hub.publish(1, {"type": "roll"})
+        hub.unsubscribe(subscription)
+        # Клиент с событием из удалённого буфера получает reset
+        return hub.buffered(1), hub.missed_since(1, f"{hub.boot}-0")
+
+    assert asyncio.run(scenario()) == (False, None)
+
+
+def test_buffer_kept_while_client_reconnects():
+    async def scenario():
+        hub = CampaignHub(4, 8, buffer_idle=0.05)
+        hub.unsubscribe(hub.subscribe(1))
+        subscription = hub.subscribe(1)
+        await asyncio.sleep(0.1)
+        kept = hub.buffered(1)
+        hub.unsubscribe(subscription)
+        await asyncio.sleep(0.1)
+        return kept, hub.buffered(1)
+
+    assert asyncio.run(scenario()) == (True, False)
@@ -0,0 +1,115 @@
+# tests/test_loading_profiles.py
+"""
+Профили загрузки персонажа (crud_character.LOAD_PROFILES).
+
+В SQLite в памяти создаётся справочник (9 характеристик по 5 навыков) и
+персонаж со всеми характеристиками и навыками. Каждый профиль загружает
+персонажа, а тест считает запросы и прочитанные строки: ни один профиль
+не должен выходить за свой бюджет, а полный лист — читать больше строк,
+чем прежний запрос с вложенными joinedload.
+"""
+
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.crud.crud_character import LOAD_PROFILES, character_load_options
+from app.models.models import Attribute, Character, CharacterAttribute, CharacterSkill, Skill
+
+ATTRIBUTES = 9
+SKILLS_PER_ATTRIBUTE = 5
+CHARACTER_ID = 1
+
+# Бюджет профиля: (запросов, строк)
+BUDGETS = {
+    "roll": (3, 1 + ATTRIBUTES + ATTRIBUTES * SKILLS_PER_ATTRIBUTE),
+    "sheet": (3, 1 + ATTRIBUTES + ATTRIBUTES * SKILLS_PER_ATTRIBUTE),
+    "summary": (1, 1),
+    "for-delete": (1, 1),
+}
+
+
+@pytest.fixture
+def seeded(engine):
+    """Справочник и персонаж со всеми характеристиками и навыками."""
+    with Session(engine) as db:
+        db.execute(insert(Attribute), [
+            {"id": a, "name": f"Характеристика {a}", "dice_type": "1d4", "value": 1}
+            for a in range(1, ATTRIBUTES + 1)
+        ])
+        db.execute(insert(Skill), [
+            {"id": (a - 1) * SKILLS_PER_ATTRIBUTE + s, "name": f"Навык {a}.{s}", "attribute_id": a, "bonus": 0}
+            for a in range(1, ATTRIBUTES + 1) for s in range(1, SKILLS_PER_ATTRIBUTE + 1)
+        ])
+        db.execute(insert(Character), [{"id": CHARACTER_ID, "name": "Проверка", "user_id": 1}])
+        db.execute(insert(CharacterAttribute), [
+            {"character_id": CHARACTER_ID, "attribute_id": a, "value": 2} for a in range(1, ATTRIBUTES + 1)
+        ])
+        db.execute(insert(CharacterSkill), [
+            {"character_id": CHARACTER_ID, "skill_id": s, "bonus": 1}
+            for s in range(1, ATTRIBUTES * SKILLS_PER_ATTRIBUTE + 1)
+        ])
+        db.commit()
+    return engine
+
+
+def measure(engine, statement) -> Tuple[int, int]:
+    """
+    Загружает персонажа в новой сессии и считает запросы и прочитанные строки.
+
+    Строки считаются повторным выполнением каждого перехваченного запроса.
+
+    :param engine: Движок базы данных
+    :param statement: Запрос select(Character) с опциями загрузки
+    :return: (число запросов, число строк)
+    """
+    captured: List[tuple] = []
+
+    def capture(conn, cursor, sql, parameters, context, executemany):  # pylint: disable=unused-argument
+        captured.append((sql, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as db:
+            assert db.execute(statement).unique().scalars().first() is not None
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        rows = sum(len(conn.exec_driver_sql(sql, parameters).fetchall()) for sql, parameters in captured)
+    return len(captured), rows
+
+
+def test_every_profile_has_budget():
+    assert set(BUDGETS) == set(LOAD_PROFILES)
+
+
+@pytest.mark.parametrize("profile", BUDGETS)
+def test_profile_within_budget(seeded, profile):
+    max_queries, max_rows = BUDGETS[profile]
+    statement = select(Character).options(*character_load_options(profile)).where(Character.id == CHARACTER_ID)
+
+    queries, rows = measure(seeded, statement)
+
+    assert queries <= max_queries
+    assert rows <= max_rows
+
+
+def test_sheet_reads_fewer_rows_than_cartesian_join(seeded):
+    legacy = select(Character).options(
+        joinedload(Character.attributes).joinedload(CharacterAttribute.attribute).joinedload(Attribute.skills),
+        joinedload(Character.skills).joinedload(CharacterSkill.skill),
+    ).where(Character.id == CHARACTER_ID)
+    sheet = select(Character).options(*character_load_options("sheet")).where(Character.id == CHARACTER_ID)
+
+    _, legacy_rows = measure(seeded, legacy)
+    _, sheet_rows = measure(seeded, sheet)
+
+    assert sheet_rows < legacy_rows
+
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        character_load_options("everything")
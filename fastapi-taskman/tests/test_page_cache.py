@@ -0,0 +1,73 @@
+# tests/test_page_cache.py
+"""Кэш страниц (app/page_cache.py): версии сущностей в базе, общие для процессов."""
+
+import pytest
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.models import Campaign
+from app.page_cache import CAMPAIGNS, PageCache, campaign_entity
+
+ENTITIES = [campaign_entity(1)]
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"host", b"testserver")]
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "scheme": "http", "server": ("testserver", 80),
+                    "path": "/campaigns/1", "query_string": b"", "headers": headers})
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        session.execute(insert(Campaign), [
+            {"id": 1, "name": "Кампания", "description": "Описание", "gm_id": 1, "rng_seed": "1"},
+        ])
+        session.commit()
+        yield session
+
+
+def rename(db, name):
+    db.get(Campaign, 1).name = name
+    db.commit()
+
+
+def test_write_bumps_shared_versions(db):
+    before = PageCache(8).versions(db, [CAMPAIGNS, *ENTITIES])
+    rename(db, "Другая")
+    assert PageCache(8).versions(db, [CAMPAIGNS, *ENTITIES])[:2] == (before[0] + 1, before[1] + 1)
+
+
+def test_rollback_keeps_versions(db):
+    before = PageCache(8).versions(db, ENTITIES)
+    db.get(Campaign, 1).name = "Другая"
+    db.flush()
+    db.rollback()
+    assert PageCache(8).versions(db, ENTITIES) == before
+
+
+def test_page_from_other_process_is_stale_after_write(db):
+    worker, other = PageCache(8), PageCache(8)
+    versions = worker.versions(db, ENTITIES)
+    worker.store(make_request(), versions, HTMLResponse("<p>Кампания</p>"))
+    assert worker.cached_response(make_request(), worker.versions(db, ENTITIES)).status_code == 200
+
+    # Запись через другой процесс: тот же счётчик в базе
+    rename(db, "Другая")
+    assert other.versions(db, ENTITIES) != versions
+    assert worker.cached_response(make_request(), worker.versions(db, ENTITIES)) is None
+
+
+def test_etag_is_shared_between_processes(db):
+    worker, other = PageCache(8), PageCache(8)
+    page = worker.store(make_request(), worker.versions(db, ENTITIES), HTMLResponse("<p>Кампания</p>"))
+    etag = page.headers["etag"]
+
+    # Другой процесс страницу не отрисовывал, но отвечает 304 на актуальный ETag
+    assert other.cached_response(make_request(etag), other.versions(db, ENTITIES)).status_code == 304
+    rename(db, "Другая")
+    assert other.cached_response(make_request(etag), other.versions(db, ENTITIES)) is None
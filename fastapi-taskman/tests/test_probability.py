@@ -0,0 +1,42 @@
+# tests/test_probability.py
+"""Точные вероятности бросков (app/probability.py)."""
+
+import pytest
+
+from app.dice import attribute_dice, compile_dice
+from app.probability import expression_distribution, pool_distribution, pool_notation, success_probability
+
+
+@pytest.mark.parametrize("value, sides", [(1, 4), (3, 8), (5, 12), (6, 12), (9, 12)])
+def test_success_probability_uses_rolled_die(value, sides):
+    # Кубик тот же, что бросает roll_attribute: значения выше 5 — d12
+    assert attribute_dice("1d4", value).dice == (sides,)
+    dice = attribute_dice("1d4", value)
+    assert success_probability(dice, 0, sides) == pytest.approx(1 / sides)
+    assert success_probability(dice, 0, sides + 1) == 0.0
+
+
+def test_success_probability_uses_base_die_type():
+    assert success_probability(attribute_dice("1d20", 1), 0, 20) == pytest.approx(1 / 20)
+    assert success_probability(attribute_dice("1d8", 2), 0, 10) == pytest.approx(1 / 10)
+
+
+def test_success_probability_pool_and_modifier():
+    # 2d8+1 дважды: 4d8, модификатор +2, бонус +1
+    expected = pool_distribution((8, 8, 8, 8)).p_at_least(20, 3)
+    dice = attribute_dice("2d8+1", 1)
+    assert success_probability(dice, 1, 20, dice_count=2) == pytest.approx(expected)
+    assert pool_notation(dice, 2) == "4d8+2"
+
+
+def test_two_d6_counts():
+    dist = expression_distribution(compile_dice("2d6"))
+    assert (dist.min_total, dist.max_total, dist.outcomes) == (2, 12, 36)
+    assert dist.counts == (1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1)
+    assert dist.p_at_least(7) == pytest.approx(21 / 36)
+
+
+@pytest.mark.parametrize("expression", ["4d6kh3", "1d6!", "1d8-1d4"])
+def test_expression_distribution_rejects_non_plain(expression):
+    with pytest.raises(ValueError):
+        expression_distribution(compile_dice(expression))
@@ -0,0 +1,111 @@
+# tests/test_query_plans.py
+"""
+Планы выполнения «горячих» запросов.
+
+Для каждого запроса, на котором держатся страницы персонажей, кампаний и
+журнал бросков, EXPLAIN QUERY PLAN в SQLite должен искать по ожидаемому
+индексу (SEARCH ... USING INDEX), а не читать таблицу целиком (SCAN).
+Схема проверяется дважды: созданная по моделям (create_all) и полученная
+миграциями Alembic, — так пропавший индекс обнаруживается в любом из путей.
+"""
+
+from argparse import Namespace
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, select, text
+
+from app.models.database import Base
+from app.models.models import (
+    Attribute, Campaign, Character, CharacterAttribute, CharacterRole, CharacterSkill, RollLog, Skill,
+)
+
+# Запрос -> индекс, по которому он должен выполняться (None — любой индекс,
+# например автоматический индекс ограничения уникальности)
+HOT_QUERIES = {
+    "персонажи кампании": (
+        select(Character).where(Character.campaign_id == 1).order_by(Character.id),
+        "ix_characters_campaign_id_id",
+    ),
+    "персонажи пользователя": (
+        select(Character).where(Character.user_id == 1).order_by(Character.id),
+        "ix_characters_user_id_id",
+    ),
+    "характеристики персонажа": (
+        select(CharacterAttribute).where(CharacterAttribute.character_id == 1),
+        None,
+    ),
+    "навыки персонажа": (
+        select(CharacterSkill).where(CharacterSkill.character_id == 1),
+        None,
+    ),
+    "характеристика по названию": (
+        select(Attribute).where(Attribute.name == "Сноровка"),
+        "ix_attributes_name",
+    ),
+    "навык по названию": (
+        select(Skill).where(Skill.name == "Фехтование"),
+        "ix_skills_name",
+    ),
+    "навыки характеристики": (
+        select(Skill).where(Skill.attribute_id == 1),
+        "ix_skills_attribute_id",
+    ),
+    "роли кампании": (
+        select(CharacterRole).where(CharacterRole.campaign_id == 1),
+        "ix_character_roles_campaign_id",
+    ),
+    "кампании мастера": (
+        select(Campaign).where(Campaign.gm_id == 1),
+        "ix_campaigns_gm_id",
+    ),
+    "журнал бросков персонажа": (
+        select(RollLog).where(RollLog.character_id == 1, RollLog.id < 1000).order_by(RollLog.id.desc()).limit(50),
+        "ix_roll_log_character_id_id",
+    ),
+    "журнал бросков кампании": (
+        select(RollLog).where(RollLog.campaign_id == 1, RollLog.id < 1000).order_by(RollLog.id.desc()).limit(50),
+        "ix_roll_log_campaign_id_id",
+    ),
+}
+
+
+@pytest.fixture(scope="module", params=["models", "migrations"])
+def schema_engine(request, tmp_path_factory):
+    """Движок SQLite со схемой по моделям или по миграциям Alembic (upgrade head)."""
+    path = tmp_path_factory.mktemp("plans") / f"{request.param}.db"
+    url = f"sqlite:///{path}"
+    if request.param == "models":
+        target = create_engine(url)
+        Base.metadata.create_all(target)
+    else:
+        config = Config("alembic.ini")
+        config.cmd_opts = Namespace(x=[f"url={url}"])
+        command.upgrade(config, "head")
+        target = create_engine(url)
+    yield target
+    target.dispose()
+
+
+def query_plan(engine, statement) -> list:
+    """
+    Выполняет EXPLAIN QUERY PLAN и возвращает текстовые строки плана.
+
+    :param engine: Движок SQLite
+    :param statement: Проверяемый запрос
+    :return: Строки плана (последняя колонка результата EXPLAIN)
+    """
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(schema_engine, name):
+    statement, index = HOT_QUERIES[name]
+    plan = query_plan(schema_engine, statement)
+
+    assert not [line for line in plan if line.startswith("SCAN")], plan
+    expected = f"USING INDEX {index} " if index else "USING INDEX "
+    assert any(line.startswith("SEARCH") and expected in line for line in plan), plan
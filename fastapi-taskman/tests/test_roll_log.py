@@ -0,0 +1,56 @@
+# tests/test_roll_log.py
+"""Буфер журнала бросков (app/roll_log.py): групповая запись и предел буфера."""
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.models import RollLog
+from app.roll_log import RollLogWriter, roll_entry
+
+
+def entries(count: int, start: int = 0) -> list:
+    return [roll_entry(1, 1, "Сноровка", None, "1d6", 0, (start + i) % 6 + 1) for i in range(count)]
+
+
+def test_flush_writes_buffer_in_one_batch(engine):
+    writer = RollLogWriter(engine, batch_size=100, flush_interval=60, max_buffer=1000)
+    writer.append(entries(10))
+
+    assert writer.pending == 10
+    assert writer.flush() == 10
+    assert writer.pending == 0
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(RollLog)).scalar() == 10
+
+
+def test_append_never_touches_database_and_drops_overflow():
+    # В базе без таблиц любая запись завершается ошибкой
+    broken = create_engine("sqlite://")
+    writer = RollLogWriter(broken, batch_size=5, flush_interval=60, max_buffer=20)
+
+    for _ in range(10):
+        writer.append(entries(3))
+
+    assert writer.pending == 20
+    assert writer.dropped == 10
+
+
+def test_failed_flush_requeues_within_limit(engine):
+    broken = create_engine("sqlite://")
+    writer = RollLogWriter(broken, batch_size=5, flush_interval=60, max_buffer=20)
+    writer.append(entries(15))
+
+    with pytest.raises(SQLAlchemyError):
+        writer.flush()
+    assert writer.pending == 15
+
+    writer.append(entries(10, start=15))
+    assert (writer.pending, writer.dropped) == (20, 5)
+
+    # База снова доступна: сохраняются старые записи в прежнем порядке
+    writer._engine = engine  # pylint: disable=protected-access
+    assert writer.flush() == 20
+    with engine.connect() as conn:
+        rolls = conn.execute(select(RollLog.roll).order_by(RollLog.id)).scalars().all()
+    assert rolls == [entry["roll"] for entry in entries(20)]
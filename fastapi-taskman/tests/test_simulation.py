@@ -0,0 +1,84 @@
+# tests/test_simulation.py
+"""Моделирование встреч (app/simulation.py): итоги, бюджет запроса и ограничение нагрузки."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.dice import compile_dice
+from app.simulation import EncounterSimulator
+
+PARTY = [(compile_dice("1d6"), 0), (compile_dice("1d6"), 2)]
+OPPONENTS = [(compile_dice("1d6"), 1)]
+
+
+@pytest.fixture
+def simulator():
+    service = EncounterSimulator(workers=1, max_pending=1, max_contests=10_000, chunk_contests=1_000)
+    yield service
+    service.shutdown()
+
+
+def test_result_shape(simulator):
+    stats = asyncio.run(simulator.simulate(PARTY, OPPONENTS, 2000, seed=1))
+
+    assert (stats.trials, stats.capped) == (2000, False)
+    assert stats.party_wins + stats.opponent_wins + stats.draws == 2000
+    assert [len(row) for row in stats.pair_wins] == [1, 1]
+    assert [len(row) for row in stats.pair_margin_mean] == [1, 1]
+    assert len(stats.party_wins_histogram) == len(PARTY) * len(OPPONENTS) + 1
+    assert sum(stats.party_wins_histogram) == 2000
+    # Зерно задаёт результат целиком, независимо от распределения блоков по процессам
+    assert asyncio.run(simulator.simulate(PARTY, OPPONENTS, 2000, seed=1)) == stats
+    assert simulator.pending() == 0
+
+
+def test_trials_capped_by_budget(simulator):
+    stats = asyncio.run(simulator.simulate(PARTY, OPPONENTS, 8000, seed=1))
+
+    # Бюджет 10 000 парных проверок на 2 пары
+    assert (stats.trials, stats.capped) == (5000, True)
+    assert sum(stats.party_wins_histogram) == 5000
+
+
+def test_overload_is_rejected(simulator):
+    async def scenario():
+        running = asyncio.create_task(simulator.simulate(PARTY, OPPONENTS, 2000))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as error:
+                await simulator.simulate(PARTY, OPPONENTS, 10)
+        finally:
+            await running
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert simulator.pending() == 0
+
+
+def test_cancelled_request_keeps_slot_until_chunks_finish():
+    simulator = EncounterSimulator(workers=1, max_pending=1, max_contests=20_000_000, chunk_contests=2_000_000)
+
+    async def scenario():
+        request = asyncio.create_task(simulator.simulate(PARTY, OPPONENTS, 1_000_000))
+        await asyncio.sleep(0)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        # Начатые блоки ещё считаются в пуле: место не освобождено
+        with pytest.raises(HTTPException):
+            await simulator.simulate(PARTY, OPPONENTS, 10)
+
+    try:
+        asyncio.run(scenario())
+        deadline = time.monotonic() + 60
+        while simulator.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert simulator.pending() == 0
+        assert asyncio.run(simulator.simulate(PARTY, OPPONENTS, 10)).trials == 10
+    finally:
+        simulator.shutdown()
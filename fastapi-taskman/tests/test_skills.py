@@ -0,0 +1,58 @@
+# tests/test_skills.py
+"""Применение справочника характеристик и навыков (app/skills.py)."""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.database import Base
+from app.models.models import Attribute, Skill
+from app.skills import CATALOG, apply_catalog
+
+SKILL_COUNT = sum(len(spec.skills) for spec in CATALOG)
+
+# База из репозитория создана до миграций: без уникальных индексов названий
+COMMITTED_DB = Path(__file__).resolve().parent.parent / "app" / "app.db"
+
+
+def counts(db):
+    return db.scalar(select(func.count()).select_from(Attribute)), db.scalar(select(func.count()).select_from(Skill))
+
+
+def test_apply_once(engine):
+    with Session(engine) as db:
+        assert apply_catalog(db)
+        assert not apply_catalog(db)
+        assert counts(db) == (len(CATALOG), SKILL_COUNT)
+
+
+def test_unmigrated_schema_falls_back(engine, caplog, monkeypatch):
+    # fileConfig миграций (test_query_plans) отключает уже созданные логгеры
+    monkeypatch.setattr(logging.getLogger("app.skills"), "disabled", False)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_attributes_name"))
+        connection.execute(text("DROP INDEX ix_skills_name"))
+
+    with Session(engine) as db:
+        assert apply_catalog(db)
+        assert apply_catalog(db, force=True)
+        assert counts(db) == (len(CATALOG), SKILL_COUNT)
+    assert "alembic upgrade head" in caplog.text
+
+
+@pytest.mark.skipif(not COMMITTED_DB.exists(), reason="нет app/app.db")
+def test_committed_database(tmp_path):
+    path = tmp_path / "app.db"
+    shutil.copy(COMMITTED_DB, path)
+    engine = create_engine(f"sqlite:///{path}")
+    # Как прежний init_db: новые таблицы создаются, существующие не меняются
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        assert apply_catalog(db)
+        names = set(db.scalars(select(Skill.name)))
+    engine.dispose()
+    assert {skill for spec in CATALOG for skill in spec.skills} <= names